@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Contadores de ocupación para los reportes del administrador.
+
+`registrar` suma (o resta, al cancelar) cada reserva en dos resúmenes,
+dentro de la transacción que la escribe:
+
+- `ocupacion_horaria` (fecha, cancha, hora): minutos jugados dentro de
+  cada hora y reservas que empiezan en ella. Un turno de 16:30 a 18:00
+  suma 30 minutos a las 16 y 60 a las 17.
+- `uso_jugador` (mes, usuario): reservas y minutos de cada jugador.
+
+Los reportes (`OcupacionManager` en backendPRUEBA) leen solo estos
+resúmenes. Para cargarlos por primera vez o corregirlos:
+
+    python analitica.py reconstruir [--engine sqlite --sqlite-path padelclub.db]
+
+Las reservas que entren mientras corre la reconstrucción pueden quedar
+contadas de más o de menos en MySQL: conviene correrla con el club cerrado.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+OCUPACION = ('ocupacion_horaria', ('fecha', 'cancha', 'hora'), ('reservas', 'minutos'))
+USO       = ('uso_jugador', ('mes', 'usuario_id'), ('reservas', 'minutos'))
+
+
+def _a_datetime(valor):
+    if isinstance(valor, datetime):
+        return valor
+    return datetime.strptime(str(valor), "%Y-%m-%d %H:%M:%S")
+
+
+def repartir(inicio, fin):
+    """[(fecha, hora, minutos)] de las horas que toca [inicio, fin)."""
+    partes = []
+    t = inicio
+    while t < fin:
+        corte = min(fin, t.replace(minute=0, second=0) + timedelta(hours=1))
+        partes.append((t.strftime("%Y-%m-%d"), t.hour, int((corte - t).total_seconds() // 60)))
+        t = corte
+    return partes
+
+
+def acumular(reservas, signo=1, ocupacion=None, uso=None):
+    """Suma reservas (usuario_id, cancha, inicio, fin) en los dos resúmenes
+    en memoria: {(fecha, cancha, hora): [reservas, minutos]} y
+    {(mes, usuario_id): [reservas, minutos]}."""
+    ocupacion = {} if ocupacion is None else ocupacion
+    uso = {} if uso is None else uso
+    for usuario_id, cancha, inicio, fin in reservas:
+        inicio, fin = _a_datetime(inicio), _a_datetime(fin)
+        for i, (fecha, hora, minutos) in enumerate(repartir(inicio, fin)):
+            fila = ocupacion.setdefault((fecha, cancha, hora), [0, 0])
+            fila[0] += signo if i == 0 else 0
+            fila[1] += signo * minutos
+        fila = uso.setdefault((inicio.strftime("%Y-%m-01"), usuario_id), [0, 0])
+        fila[0] += signo
+        fila[1] += signo * int((fin - inicio).total_seconds() // 60)
+    return ocupacion, uso
+
+
+def sentencias(storage, reservas, signo=1):
+    """[(sql, filas)] que suman las reservas a los resúmenes; para ejecutarlas
+    con `executemany` desde cualquier cursor (también el de backend_async)."""
+    ocupacion, uso = acumular(reservas, signo)
+    return [(storage.upsert_add(tabla, claves, columnas),
+             [clave + tuple(valores) for clave, valores in filas.items()])
+            for (tabla, claves, columnas), filas in ((OCUPACION, ocupacion), (USO, uso))
+            if filas]
+
+
+def registrar(cur, storage, reservas, signo=1):
+    """Aplica reservas nuevas (`signo=1`) o canceladas (`signo=-1`) a los
+    resúmenes, con el cursor de la transacción que las escribe."""
+    for sql, filas in sentencias(storage, reservas, signo):
+        cur.executemany(sql, filas)
+
+
+def reconstruir(pool, storage, lote=5000):
+    """Rehace los resúmenes recorriendo `reservas` con un cursor del servidor.
+    En memoria solo quedan los resúmenes, no las reservas."""
+    ocupacion, uso, n = {}, {}, 0
+    with pool.connection() as db:
+        cur = storage.server_cursor(db)
+        try:
+            cur.execute(
+                f"SELECT usuario_id, cancha, {storage.fmt_datetime('fecha_inicio')}, "
+                f"{storage.fmt_datetime('fecha_fin')} FROM reservas", ())
+            while True:
+                filas = cur.fetchmany(lote)
+                if not filas:
+                    break
+                acumular(filas, 1, ocupacion, uso)
+                n += len(filas)
+        finally:
+            cur.close()
+
+    with pool.connection() as db, db.cursor() as cur:
+        storage.begin(cur)
+        try:
+            for (tabla, claves, columnas), filas in ((OCUPACION, ocupacion), (USO, uso)):
+                cur.execute(f"DELETE FROM {tabla}", ())
+                sql = (f"INSERT INTO {tabla} ({', '.join(claves + columnas)}) "
+                       f"VALUES ({', '.join(['%s'] * (len(claves) + len(columnas)))})")
+                pendientes = [clave + tuple(valores) for clave, valores in filas.items()]
+                for i in range(0, len(pendientes), lote):
+                    cur.executemany(sql, pendientes[i:i + lote])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return n, len(ocupacion), len(uso)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('accion', choices=('reconstruir',))
+    ap.add_argument('--engine', choices=('mysql', 'sqlite'), default='mysql')
+    ap.add_argument('--sqlite-path', default='padelclub.db')
+    args = ap.parse_args()
+
+    import backendPRUEBA
+    if args.engine == 'sqlite':
+        backendPRUEBA.configure_storage('sqlite', sqlite_path=args.sqlite_path)
+    t0 = time.perf_counter()
+    n, horas, jugadores = backendPRUEBA.OcupacionManager().reconstruir()
+    print(f"{n} reservas -> {horas} filas de ocupación, {jugadores} de uso por jugador "
+          f"({time.perf_counter() - t0:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import pymysql
 import hashlib
+import hmac
 
 # Configuración de conexión
 DB_HOST = "127.0.0.1"
@@ -46,16 +47,16 @@ class UsuarioManager:
             return False
 
     def iniciar_sesion(self, nombre_usuario, clave):
-        if not self.usuario_existe(nombre_usuario):
+        # Una sola consulta por el índice único de `usuario`
+        consulta = "SELECT tipo, contraseña FROM usuarios WHERE usuario = %s"
+        self.cursor.execute(consulta, (nombre_usuario,))
+        resultado = self.cursor.fetchone()
+
+        if resultado is None:
             print("❌ El nombre de usuario no existe.")
             return None
 
-        clave_segura = self.hash_password(clave)
-        consulta = "SELECT tipo FROM usuarios WHERE usuario = %s AND contraseña = %s"
-        self.cursor.execute(consulta, (nombre_usuario, clave_segura))
-        resultado = self.cursor.fetchone()
-
-        if resultado:
+        if hmac.compare_digest(resultado[1], self.hash_password(clave)):
             print(f"✅ Bienvenido {nombre_usuario}. Rol: {resultado[0]}")
             return resultado[0]
         else:
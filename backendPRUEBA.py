@@ -1,7 +1,22 @@
-import pymysql
 import hashlib
+import hmac
+import random
+import threading
+import time
 from datetime import datetime, timedelta
 
+import analitica
+from cache import AvailabilityCache, UserReservationsCache
+from disponibilidad import AvailabilityBitmap
+from eventos import EventBus
+from instrumentacion import QueryProfiler
+from intervalos import IntervalIndex, a_hora, a_minutos
+from pool import ConnectionPool
+from replicas import ReplicaRouter
+from sesiones import SessionStore
+from storage import make_storage
+import torneos
+
 # Configuración de conexión
 db_config = {
     'host':     '127.0.0.1',
@@ -11,124 +26,1645 @@ db_config = {
     'database': 'padelclub'
 }
 
+# Motor de almacenamiento: 'mysql' usa db_config; 'sqlite' es la base
+# embebida (sqlite_path puede ser un archivo o ':memory:')
+storage_config = {
+    'engine':      'mysql',
+    'sqlite_path': 'padelclub.db',
+}
+
+# Parámetros del pool compartido
+pool_config = {
+    'max_size':     10,
+    'timeout':      10.0,
+    'idle_timeout': 300.0,
+    'max_lifetime': 3600.0,
+}
+
+# Réplicas de lectura. Cada entrada pisa claves de db_config, p. ej.
+# {'host': '10.0.0.12', 'connect_timeout': 2} (con SQLite: {'sqlite_path': ...}).
+# Sin réplicas todo se lee del primario. Después de escribir, el que
+# escribió lee del primario durante `read_your_writes` segundos.
+replica_config = {
+    'replicas':         [],
+    'check_interval':   5.0,
+    'max_lag':          5.0,
+    'read_your_writes': 10.0,
+}
+
+# Perfilado de consultas: apagado no cuesta nada; encendido mide cada
+# sentencia y deja en el log 'padelclub.sql' las que pasan el umbral
+profiling_config = {
+    'enabled':       False,
+    'slow_query_ms': 200,
+}
+query_profiler = QueryProfiler(enabled=profiling_config['enabled'],
+                               slow_threshold=profiling_config['slow_query_ms'] / 1000)
+
+_storage = None
+_pool = None
+_router = None
+_pool_lock = threading.Lock()
+
+def get_storage():
+    """Motor de almacenamiento del proceso, según storage_config."""
+    global _storage
+    if _storage is None:
+        with _pool_lock:
+            if _storage is None:
+                if storage_config['engine'] == 'sqlite':
+                    _storage = make_storage('sqlite', path=storage_config['sqlite_path'])
+                else:
+                    _storage = make_storage('mysql', **db_config)
+    return _storage
+
+def get_pool():
+    """Devuelve el pool de conexiones del proceso, creándolo la primera vez."""
+    global _pool
+    if _pool is None:
+        storage = get_storage()
+        with _pool_lock:
+            if _pool is None:
+                config = dict(pool_config)
+                if storage.max_connections:
+                    config['max_size'] = min(config['max_size'], storage.max_connections)
+                _pool = ConnectionPool(
+                    lambda: query_profiler.wrap_connection(storage.connect()), **config)
+    return _pool
+
+def get_router():
+    """Router de lecturas del proceso: réplicas de replica_config + primario."""
+    global _router
+    if _router is None:
+        storage, primario = get_storage(), get_pool()
+        with _pool_lock:
+            if _router is None:
+                replicas = []
+                for r in replica_config['replicas']:
+                    if storage.name == 'sqlite':
+                        st = make_storage('sqlite', path=r.get('sqlite_path', storage_config['sqlite_path']))
+                        nombre = st.path
+                    else:
+                        opciones = {**db_config, **r}
+                        st = make_storage('mysql', **opciones)
+                        nombre = f"{opciones['host']}:{opciones.get('port', 3306)}"
+                    pool = ConnectionPool(
+                        lambda st=st: query_profiler.wrap_connection(st.connect()), **pool_config)
+                    replicas.append((nombre, pool))
+                _router = ReplicaRouter(
+                    primario, replicas, storage=storage,
+                    check_interval=replica_config['check_interval'],
+                    max_lag=replica_config['max_lag'],
+                    read_your_writes=replica_config['read_your_writes'],
+                )
+    return _router
+
+def configure_storage(engine, **opciones):
+    """Cambia de motor en caliente (tests, benchmarks, kiosco embebido):
+    `configure_storage('sqlite', sqlite_path=':memory:')`. Cierra el pool
+    anterior y vacía los cachés compartidos."""
+    global _storage, _pool, _router, _window_days, _grid_config
+    with _pool_lock:
+        if _router is not None:
+            _router.close()
+        if _pool is not None:
+            _pool.close()
+        _storage, _pool, _router, _window_days, _grid_config = None, None, None, None, None
+        storage_config['engine'] = engine
+        storage_config.update(opciones)
+    availability_cache.invalidate()
+    availability_engine.drop_before('9999-12-31')
+    intervals_index.drop_before('9999-12-31')
+
+def calentar():
+    """Abre la primera conexión del pool y trae la configuración de la grilla
+    y de la ventana, para que el primer pedido real no pague ese costo. El
+    frontend la llama en un hilo apenas se muestra la ventana."""
+    rm = ReservationManager()
+    with rm.pool.connection():
+        pass
+    rm.get_grid_config()
+    rm.get_window_days()
+
+def pool_metrics():
+    """Métricas del pool compartido (préstamos, espera, conexiones creadas)."""
+    return get_pool().metrics()
+
+def replica_metrics():
+    """Estado de las réplicas (sana, atraso) y lecturas por destino."""
+    return get_router().metrics()
+
+def query_metrics(formato='dict'):
+    """Métricas del perfilado: 'dict', 'json' o 'prometheus'."""
+    if formato == 'json':
+        return query_profiler.to_json()
+    if formato == 'prometheus':
+        return query_profiler.to_prometheus()
+    return query_profiler.snapshot()
+
+# Caché de disponibilidad compartido por todos los ReservationManager
+AVAILABILITY_TTL = 5.0
+availability_cache = AvailabilityCache(ttl=AVAILABILITY_TTL)
+
+# Páginas de "Mis reservas" por jugador; se invalidan al reservar o cancelar
+user_reservations_cache = UserReservationsCache(max_users=256, ttl=30.0)
+
+# Mapa de bits de la ventana, compartido; se sincroniza por versión de día
+availability_engine = AvailabilityBitmap()
+
+# Reservas y bloqueos como intervalos por cancha, para duraciones variables
+intervals_index = IntervalIndex()
+
+# Avisos a los frontends del proceso (ver eventos.py)
+events = EventBus()
+
+# Sesiones emitidas al iniciar sesión (secret=None: una clave nueva por proceso)
+session_config = {
+    'ttl':          8 * 3600,
+    'max_sessions': 10000,
+    'secret':       None,
+}
+sessions = SessionStore(**session_config)
+
+def validar_sesion(token):
+    """`Session` vigente del token (usuario_id, rol) o None."""
+    return sessions.validate(token)
+
+def cerrar_sesion(token):
+    return sessions.revoke(token)
+
+def tiene_sesion(usuario_id):
+    """True si al usuario le queda alguna sesión vigente."""
+    return sessions.has_user(usuario_id)
+
+def revocar_sesiones(usuario_id):
+    """Cierra todas las sesiones del usuario (cambio de clave, baja)."""
+    return sessions.revoke_user(usuario_id)
+
 class UsuarioManager:
-    def __init__(self):
-        self.db = pymysql.connect(**db_config)
+    def __init__(self, pool=None, router=None):
+        self.pool = pool or get_pool()
+        self.reads = router or (get_router() if pool is None else ReplicaRouter(self.pool))
+        self.db = self.pool.acquire()
         self.cursor = self.db.cursor()
 
-    def hash_password(self, plain_text):
+    @staticmethod
+    def hash_password(plain_text):
         return hashlib.sha256(plain_text.encode('utf-8')).hexdigest()
 
+    @query_profiler.timed
     def crear_usuario(self, nombre_usuario, clave, rol):
         clave_segura = self.hash_password(clave)
         sql = "INSERT INTO usuarios (usuario, contraseña, tipo) VALUES (%s, %s, %s)"
         try:
             self.cursor.execute(sql, (nombre_usuario, clave_segura, rol))
             self.db.commit()
+            # Que el primer login no vaya a una réplica que todavía no lo tiene
+            self.reads.note_write(('login', nombre_usuario))
             return True
         except Exception:
             self.db.rollback()
             return False
 
+    @query_profiler.timed
     def iniciar_sesion(self, nombre_usuario, clave):
-        clave_segura = self.hash_password(clave)
-        consulta = "SELECT tipo, id FROM usuarios WHERE usuario = %s AND contraseña = %s"
-        self.cursor.execute(consulta, (nombre_usuario, clave_segura))
-        resultado = self.cursor.fetchone()
-        if resultado:
-            return resultado  # (rol, usuario_id)
+        # Una sola búsqueda por el índice único de `usuario`; el hash se
+        # compara acá, en tiempo constante
+        consulta = "SELECT tipo, id, contraseña FROM usuarios WHERE usuario = %s"
+        def leer(cur):
+            cur.execute(consulta, (nombre_usuario,))
+            return cur.fetchone()
+        resultado = self.reads.read(leer, ('login', nombre_usuario), prestada=self.db)
+        if resultado and hmac.compare_digest(resultado[2], self.hash_password(clave)):
+            return resultado[0], resultado[1]  # (rol, usuario_id)
         return None, None
 
+    def abrir_sesion(self, nombre_usuario, clave):
+        """Como `iniciar_sesion`, pero además emite un token de sesión.
+        Devuelve (rol, usuario_id, token) o (None, None, None)."""
+        rol, usuario_id = self.iniciar_sesion(nombre_usuario, clave)
+        if rol is None:
+            return None, None, None
+        return rol, usuario_id, sessions.issue(usuario_id, rol)
+
     def desconectar(self):
-        self.db.close()
+        """Devuelve la conexión al pool (no la cierra)."""
+        if self.db is not None:
+            self.cursor.close()
+            self.pool.release(self.db)
+            self.db = None
+
+class _Contended(Exception):
+    """La franja tiene canchas libres pero otra transacción las está tomando."""
+
+# Días reservables por delante; se lee de config_reservas una vez por proceso
+_window_days = None
+# (franjas, canchas) de la grilla; también se leen una vez por proceso
+_grid_config = None
 
 class ReservationManager:
     """Gestiona disponibilidad y reservas de canchas."""
-    MAX_DAYS    = 4
+    MAX_DAYS    = 4         # valor por defecto si no hay config_reservas
     DATE_FORMAT = "%Y-%m-%d"
 
-    def __init__(self):
-        self.gestor = UsuarioManager()
+    # Reintentos de reservar ante contención
+    MAX_RETRIES      = 5
+    RETRY_BACKOFF    = 0.01
 
-    def get_available_slots(self, fecha_str):
-        """Devuelve las franjas horarias con al menos una cancha libre."""
+    # Duraciones de turno permitidas, en minutos
+    DURACIONES = (60, 90, 120)
+
+    def __init__(self, pool=None, cache=None, engine=None, storage=None, intervals=None,
+                 router=None, user_cache=None):
+        self.pool      = pool or get_pool()
+        self.cache     = cache or availability_cache
+        self.user_cache = user_cache or user_reservations_cache
+        self.engine    = engine or availability_engine
+        self.storage   = storage or get_storage()
+        self.intervals = intervals or intervals_index
+        # Lecturas: réplicas si hay; escrituras siempre por self.pool
+        self.reads     = router or (get_router() if pool is None
+                                    else ReplicaRouter(self.pool, storage=self.storage))
+
+    def get_window_days(self):
+        """Cantidad de días reservables a partir de mañana."""
+        global _window_days
+        self.storage.maybe_roll(self.pool)
+        if _window_days is None:
+            with self.pool.connection() as db, db.cursor() as cur:
+                cur.execute("SELECT valor FROM config_reservas WHERE clave = 'dias_ventana'")
+                fila = cur.fetchone()
+            _window_days = fila[0] if fila else self.MAX_DAYS
+        return _window_days
+
+    def _in_window(self, fecha_str):
         hoy   = datetime.today().date()
         fecha = datetime.strptime(fecha_str, self.DATE_FORMAT).date()
         offset = (fecha - hoy).days
-        if offset < 1 or offset > self.MAX_DAYS:
+        return 1 <= offset <= self.get_window_days()
+
+    def _day_bounds(self, fecha_str):
+        """Rango [00:00 del día, 00:00 del siguiente) para recorrer `slots` por clave."""
+        desde = datetime.strptime(fecha_str, self.DATE_FORMAT)
+        hasta = desde + timedelta(days=1)
+        return desde.strftime("%Y-%m-%d %H:%M:%S"), hasta.strftime("%Y-%m-%d %H:%M:%S")
+
+    @query_profiler.timed
+    def get_available_slots(self, fecha_str):
+        """Devuelve las franjas horarias con al menos una cancha libre."""
+        if not self._in_window(fecha_str):
             return []
-        tabla = f"canchas_dia_{offset}"
-        cur = self.gestor.cursor
-        query = (
-            f"SELECT DISTINCT DATE_FORMAT(fecha_hora, '%H:%i:%s') AS hora "
-            f"FROM {tabla} WHERE disponible = 1 "
-            f"ORDER BY hora"
+
+        slots = self.cache.lookup(fecha_str)
+        if slots is not None:
+            return slots
+
+        def leer(cur):
+            # La versión se lee antes que las franjas: si alguien reserva en el
+            # medio, la próxima revalidación detecta el cambio y recarga.
+            version = self._day_version(cur, fecha_str)
+            slots = self.cache.revalidate(fecha_str, version)
+            if slots is None:
+                if self.engine.version(fecha_str) != version:
+                    self._load_engine_days(cur, [fecha_str], {fecha_str: version})
+                slots = self.engine.free_hours(fecha_str)
+                self.cache.store(fecha_str, version, slots)
+            return slots
+        return self.reads.read(leer, ('fecha', fecha_str))
+
+    @query_profiler.timed
+    def get_availability_grid(self):
+        """Canchas libres de toda la ventana en una sola consulta.
+
+        Devuelve `(fechas, horas, libres)` donde `libres[i][j]` es la
+        cantidad de canchas libres el día `fechas[i]` a la hora `horas[j]`
+        (0 si está lleno o la franja no existe ese día).
+        """
+        fechas = self._window_dates()
+        st = self.storage
+        def leer(cur):
+            cur.execute(
+                f"SELECT {st.fmt_date('fecha_hora')}, {st.fmt_time('fecha_hora')}, "
+                "SUM(disponible) "
+                "FROM slots WHERE fecha_hora >= %s AND fecha_hora < %s "
+                "GROUP BY fecha_hora ORDER BY fecha_hora",
+                (self._day_bounds(fechas[0])[0], self._day_bounds(fechas[-1])[1])
+            )
+            return cur.fetchall()
+        filas = self.reads.read(leer, *[('fecha', f) for f in fechas])
+        horas = sorted({hora for _, hora, _ in filas})
+        col = {hora: j for j, hora in enumerate(horas)}
+        fila_de = {fecha: i for i, fecha in enumerate(fechas)}
+        libres = [[0] * len(horas) for _ in fechas]
+        for fecha, hora, n in filas:
+            if fecha in fila_de:
+                libres[fila_de[fecha]][col[hora]] = int(n or 0)
+        return fechas, horas, libres
+
+    # ---------------------- motor de disponibilidad ----------------------
+    def _window_dates(self):
+        hoy = datetime.today().date()
+        return [(hoy + timedelta(days=i)).strftime(self.DATE_FORMAT)
+                for i in range(1, self.get_window_days() + 1)]
+
+    def _load_engine_days(self, cur, fechas, versiones):
+        """Carga en el motor las filas de `slots` de esos días (un solo rango)."""
+        desde = self._day_bounds(min(fechas))[0]
+        hasta = self._day_bounds(max(fechas))[1]
+        st = self.storage
+        cur.execute(
+            f"SELECT {st.fmt_date('fecha_hora')}, {st.fmt_time('fecha_hora')}, "
+            "cancha_numero, disponible "
+            "FROM slots WHERE fecha_hora >= %s AND fecha_hora < %s",
+            (desde, hasta)
+        )
+        por_dia = {f: [] for f in fechas}
+        for fecha, hora, cancha, disponible in cur.fetchall():
+            if fecha in por_dia:
+                por_dia[fecha].append((hora, cancha, disponible))
+        for fecha, filas in por_dia.items():
+            self.engine.load_day(fecha, filas, versiones.get(fecha, 0))
+
+    @query_profiler.timed
+    def sync_engine(self):
+        """Pone al día el motor: lee las versiones de la ventana y recarga solo
+        los días que cambiaron desde la última carga. Devuelve el motor."""
+        fechas = self._window_dates()
+        def leer(cur):
+            cur.execute(
+                f"SELECT {self.storage.fmt_date('fecha')}, version FROM canchas_version "
+                "WHERE fecha >= %s AND fecha <= %s",
+                (fechas[0], fechas[-1])
+            )
+            versiones = dict(cur.fetchall())
+            cambiados = [f for f in fechas if self.engine.version(f) != versiones.get(f, 0)]
+            self.engine.drop_before(fechas[0])
+            if cambiados:
+                self._load_engine_days(cur, cambiados, versiones)
+        self.reads.read(leer, *[('fecha', f) for f in fechas])
+        return self.engine
+
+    @query_profiler.timed
+    def first_free_court(self, fecha_str, hora_str):
+        """Número de la primera cancha libre en la franja, o None."""
+        if not self._in_window(fecha_str):
+            return None
+        return self.sync_engine().first_free_court(fecha_str, hora_str)
+
+    @query_profiler.timed
+    def next_free_slots(self, n=5, desde=None):
+        """Próximas `n` franjas con lugar en toda la ventana, como
+        (fecha, hora, cancha); pensado para un botón de reserva rápida."""
+        return self.sync_engine().next_free_slots(n, desde)
+
+    @staticmethod
+    def _day_version(cur, fecha_str):
+        cur.execute("SELECT version FROM canchas_version WHERE fecha = %s", (fecha_str,))
+        fila = cur.fetchone()
+        return fila[0] if fila else 0
+
+    def _bump_day_version(self, cur, fecha_str):
+        cur.execute(
+            self.storage.upsert_increment('canchas_version', 'fecha', 'version'),
+            (fecha_str,)
         )
-        cur.execute(query)
-        return [r[0] for r in cur.fetchall()]
 
+    @query_profiler.timed
     def reservar(self, usuario_id: int, fecha_str: str, hora_str: str):
-        """Reserva la primera cancha libre (1–4) en la franja indicada."""
-        hoy   = datetime.today().date()
-        fecha = datetime.strptime(fecha_str, self.DATE_FORMAT).date()
-        offset = (fecha - hoy).days
-        if offset < 1 or offset > self.MAX_DAYS:
+        """Reserva la primera cancha libre en la franja indicada.
+
+        La cancha se toma con `SELECT ... FOR UPDATE SKIP LOCKED` dentro de una
+        única transacción (en SQLite, con la base tomada por BEGIN IMMEDIATE),
+        así dos jugadores confirmando a la vez nunca se llevan la misma
+        cancha: el segundo salta a la siguiente libre. Ante deadlocks o canchas
+        bloqueadas por otra transacción se reintenta.
+        """
+        if not self._in_window(fecha_str):
             return False, "Fecha fuera de rango"
-        tabla = f"canchas_dia_{offset}"
         fecha_hora = f"{fecha_str} {hora_str}"
-        cur = self.gestor.cursor
+        try:
+            fin_dt = datetime.strptime(fecha_hora, "%Y-%m-%d %H:%M:%S") + timedelta(hours=1)
+        except ValueError:
+            return False, "Horario inválido"
+        db = self.pool.acquire()
+        cur = db.cursor()
 
         try:
-            # 1) Seleccionar la primera cancha libre
+            for intento in range(self.MAX_RETRIES):
+                try:
+                    # 1) Tomar y marcar la primera cancha libre
+                    self.storage.begin(cur)
+                    cancha = self._claim_court(cur, fecha_hora)
+                    if cancha is None:
+                        db.rollback()
+                        # Lo que mostraba la interfaz estaba desactualizado
+                        self.cache.invalidate(fecha_str)
+                        self.engine.mark_full(fecha_str, hora_str)
+                        return False, "No hay canchas disponibles en ese horario"
+
+                    # 2) Insertar la reserva
+                    fila = (usuario_id, cancha, fecha_hora, fin_dt.strftime("%Y-%m-%d %H:%M:%S"))
+                    cur.execute(
+                        "INSERT INTO reservas (usuario_id, cancha, fecha_inicio, fecha_fin) VALUES (%s, %s, %s, %s)",
+                        fila
+                    )
+                    analitica.registrar(cur, self.storage, [fila])
+
+                    # 3) Nueva versión del día (al final, para retener el lock lo mínimo)
+                    self._bump_day_version(cur, fecha_str)
+
+                    db.commit()
+                    self.cache.invalidate(fecha_str)
+                    self.engine.mark_taken(fecha_str, hora_str, cancha)
+                    self.intervals.add(fecha_str, cancha, hora_str, 60)
+                    self.reads.note_write(('fecha', fecha_str), ('usuario', usuario_id))
+                    self.user_cache.invalidate(usuario_id)
+                    events.publish('disponibilidad', {'fecha': fecha_str})
+                    return True, f"Reservada cancha {cancha} para {fecha_str} a las {hora_str}"
+
+                except Exception as e:
+                    db.rollback()
+                    if not (isinstance(e, _Contended) or self.storage.is_retryable(e)):
+                        raise
+                    time.sleep(self.RETRY_BACKOFF * (2 ** intento) * random.random())
+
+            return False, "Horario muy solicitado, intentá de nuevo"
+
+        except Exception as e:
+            db.rollback()
+            return False, str(e)
+
+        finally:
+            cur.close()
+            self.pool.release(db)
+
+    def reservar_sesion(self, token, fecha_str, hora_str, minutos=60):
+        """`reservar` para el dueño de la sesión; no consulta `usuarios`."""
+        sesion = sessions.validate(token)
+        if sesion is None:
+            return False, "La sesión venció, volvé a iniciar sesión"
+        if minutos != 60:
+            return self.reservar_intervalo(sesion.usuario_id, fecha_str, hora_str, minutos)
+        return self.reservar(sesion.usuario_id, fecha_str, hora_str)
+
+    # ---------------------- reservas en lote ----------------------
+    def expand_rule(self, regla):
+        """Franjas (fecha, hora) de una regla de repetición, dentro de la ventana.
+
+        `regla` es un dict con `horas` (lista de 'HH:MM:SS', p. ej. dos horas
+        seguidas) y opcionalmente `desde`/`hasta` ('AAAA-MM-DD') y
+        `dias_semana` (0=lunes … 6=domingo)."""
+        dias = regla.get('dias_semana')
+        franjas = []
+        for fecha in self._window_dates():
+            if regla.get('desde') and fecha < regla['desde']:
+                continue
+            if regla.get('hasta') and fecha > regla['hasta']:
+                continue
+            if dias is not None and datetime.strptime(fecha, self.DATE_FORMAT).weekday() not in dias:
+                continue
+            franjas.extend((fecha, hora) for hora in regla['horas'])
+        return franjas
+
+    @query_profiler.timed
+    def reservar_lote(self, usuario_id, franjas=None, regla=None, cancha=None, atomico=True):
+        """Reserva varias franjas en una sola transacción.
+
+        Las franjas vienen como lista de (fecha, hora) o se arman con
+        `regla` (ver `expand_rule`). Con `cancha` se pide esa cancha en todas
+        (el turno fijo de un profesor); si no, la primera libre de cada una.
+        Con `atomico=True` se reserva todo o nada; con `atomico=False` se
+        reserva lo que se pueda. Devuelve `(reservadas, resultados)` con un
+        `(fecha, hora, cancha, mensaje)` por franja; `cancha` es None en las
+        que no se reservaron.
+        """
+        if regla is not None:
+            franjas = list(franjas or []) + self.expand_rule(regla)
+        # Por JSON (servidor.py) los pares llegan como listas
+        franjas = sorted(dict.fromkeys(tuple(str(x) for x in f) for f in franjas or []))
+        invalidas = {}          # (fecha, hora) -> motivo; se informan por franja
+        for fecha, hora in franjas:
+            try:
+                datetime.strptime(f"{fecha} {hora}", "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                invalidas[(fecha, hora)] = "Fecha u horario inválido"
+                continue
+            if not self._in_window(fecha):
+                invalidas[(fecha, hora)] = "Fecha fuera de rango"
+        db = self.pool.acquire()
+        cur = db.cursor()
+
+        try:
+            for intento in range(self.MAX_RETRIES):
+                try:
+                    self.storage.begin(cur)
+                    tomadas, resultados, llenas = [], [], []
+                    for fecha, hora in franjas:
+                        if (fecha, hora) in invalidas:
+                            resultados.append((fecha, hora, None, invalidas[(fecha, hora)]))
+                            continue
+                        fecha_hora = f"{fecha} {hora}"
+                        if cancha is None:
+                            numero = self._claim_court(cur, fecha_hora)
+                        else:
+                            numero = self._claim_given_court(cur, fecha_hora, cancha)
+                        if numero is None:
+                            llenas.append((fecha, hora))
+                            resultados.append((fecha, hora, None, "No hay canchas disponibles"
+                                               if cancha is None else f"Cancha {cancha} ocupada"))
+                            continue
+                        tomadas.append((fecha, hora, numero))
+                        resultados.append((fecha, hora, numero, "Reservada"))
+
+                    if atomico and len(tomadas) < len(franjas):
+                        db.rollback()
+                        resultados = [(f, h, None, "No reservada: falló otra franja del lote")
+                                      if c is not None else (f, h, c, m)
+                                      for f, h, c, m in resultados]
+                        tomadas = []
+                    elif tomadas:
+                        filas = [(usuario_id, numero, f"{fecha} {hora}",
+                                  (datetime.strptime(f"{fecha} {hora}", "%Y-%m-%d %H:%M:%S")
+                                   + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S"))
+                                 for fecha, hora, numero in tomadas]
+                        cur.executemany(
+                            "INSERT INTO reservas (usuario_id, cancha, fecha_inicio, fecha_fin) VALUES (%s, %s, %s, %s)",
+                            filas
+                        )
+                        analitica.registrar(cur, self.storage, filas)
+                        cur.executemany(
+                            self.storage.upsert_increment('canchas_version', 'fecha', 'version'),
+                            [(fecha,) for fecha in sorted({f for f, _, _ in tomadas})]
+                        )
+                        db.commit()
+                    else:
+                        db.rollback()
+
+                    for fecha in {f for f, _ in llenas} | {f for f, _, _ in tomadas}:
+                        self.cache.invalidate(fecha)
+                    if cancha is None:
+                        for fecha, hora in llenas:
+                            self.engine.mark_full(fecha, hora)
+                    for fecha, hora, numero in tomadas:
+                        self.engine.mark_taken(fecha, hora, numero)
+                        self.intervals.add(fecha, numero, hora, 60)
+                    cambiadas = sorted({f for f, _, _ in tomadas})
+                    self.reads.note_write(('usuario', usuario_id), *[('fecha', f) for f in cambiadas])
+                    self.user_cache.invalidate(usuario_id)
+                    for fecha in cambiadas:
+                        events.publish('disponibilidad', {'fecha': fecha})
+                    return len(tomadas), resultados
+
+                except Exception as e:
+                    db.rollback()
+                    if not (isinstance(e, _Contended) or self.storage.is_retryable(e)):
+                        raise
+                    time.sleep(self.RETRY_BACKOFF * (2 ** intento) * random.random())
+
+            return 0, [(f, h, None, "Horario muy solicitado, intentá de nuevo") for f, h in franjas]
+
+        except Exception as e:
+            db.rollback()
+            return 0, [(f, h, None, str(e)) for f, h in franjas]
+
+        finally:
+            cur.close()
+            self.pool.release(db)
+
+    def _claim_given_court(self, cur, fecha_hora, cancha):
+        """Ocupa una cancha puntual; devuelve su número o None si no está libre."""
+        cur.execute(
+            "UPDATE slots SET disponible = 0 "
+            "WHERE fecha_hora = %s AND cancha_numero = %s AND disponible = 1",
+            (fecha_hora, cancha)
+        )
+        return cancha if cur.rowcount == 1 else None
+
+    def _claim_court(self, cur, fecha_hora):
+        """Bloquea y ocupa la primera cancha libre; devuelve su número o None si
+        la franja está llena. Lanza `_Contended` si las libres están bloqueadas
+        por otra transacción que todavía no terminó."""
+        cur.execute(
+            "SELECT cancha_numero FROM slots "
+            "WHERE fecha_hora = %s AND disponible = 1 "
+            "ORDER BY cancha_numero LIMIT 1"
+            + self.storage.skip_locked,
+            (fecha_hora,)
+        )
+        fila = cur.fetchone()
+        if not fila:
+            # Sin bloquear: ¿quedan libres tomadas por otros o está llena?
             cur.execute(
-                f"SELECT cancha_numero FROM {tabla} "
-                f"WHERE fecha_hora = %s AND disponible = 1 "
-                f"ORDER BY cancha_numero LIMIT 1",
+                "SELECT 1 FROM slots WHERE fecha_hora = %s AND disponible = 1 LIMIT 1",
                 (fecha_hora,)
             )
-            fila = cur.fetchone()
-            if not fila:
-                return False, "No hay canchas disponibles en ese horario"
-            cancha = fila[0]
+            if cur.fetchone():
+                raise _Contended()
+            return None
+        cancha = fila[0]
+
+        cur.execute(
+            "UPDATE slots SET disponible = 0 "
+            "WHERE fecha_hora = %s AND cancha_numero = %s AND disponible = 1",
+            (fecha_hora, cancha)
+        )
+        if cur.rowcount != 1:
+            raise _Contended()
+        return cancha
+
+    # ---------------------- turnos de duración variable ----------------------
+    def get_grid_config(self):
+        """(franjas, canchas) de la grilla: horas 'HH:MM:SS' y números de cancha."""
+        global _grid_config
+        if _grid_config is None:
+            with self.pool.connection() as db, db.cursor() as cur:
+                cur.execute(f"SELECT {self.storage.fmt_time('hora')} FROM franjas_horarias "
+                            "ORDER BY hora", ())
+                franjas = [r[0] for r in cur.fetchall()]
+                cur.execute("SELECT numero FROM canchas ORDER BY numero", ())
+                canchas = [r[0] for r in cur.fetchall()]
+            _grid_config = (franjas, canchas)
+        return _grid_config
+
+    @staticmethod
+    def _touched_hours(hora_str, minutos):
+        """Horas en punto que toca el intervalo [hora, hora + minutos)."""
+        a = a_minutos(hora_str)
+        return [a_hora(h * 60) for h in range(a // 60, (a + minutos + 59) // 60)]
+
+    def _interval_bounds(self, fecha_str, hora_str, minutos):
+        inicio = datetime.strptime(f"{fecha_str} {hora_str}", "%Y-%m-%d %H:%M:%S")
+        fin = inicio + timedelta(minutes=minutos)
+        return inicio.strftime("%Y-%m-%d %H:%M:%S"), fin.strftime("%Y-%m-%d %H:%M:%S")
+
+    def _check_turn(self, fecha_str, hora_str, minutos):
+        """Mensaje de error si el turno no es válido, o None."""
+        if minutos not in self.DURACIONES:
+            admitidas = ", ".join(str(d) for d in self.DURACIONES)
+            return f"Duración no soportada: {minutos} minutos (se admiten {admitidas})"
+        if a_minutos(hora_str) % 30:
+            return "Los turnos empiezan en punto o y media"
+        if not self._in_window(fecha_str):
+            return "Fecha fuera de rango"
+        franjas = set(self.get_grid_config()[0])
+        fuera = [h[:5] for h in self._touched_hours(hora_str, minutos) if h not in franjas]
+        if fuera:
+            return f"El turno cae fuera de los horarios del club ({', '.join(fuera)})"
+        return None
+
+    def _load_interval_days(self, cur, fechas, versiones):
+        """Carga en el índice las reservas y bloqueos que tocan esos días."""
+        desde = self._day_bounds(min(fechas))[0]
+        hasta = self._day_bounds(max(fechas))[1]
+        previo = (datetime.strptime(desde, "%Y-%m-%d %H:%M:%S")
+                  - timedelta(minutes=max(self.DURACIONES))).strftime("%Y-%m-%d %H:%M:%S")
+        st = self.storage
+        cur.execute(
+            f"SELECT cancha, {st.fmt_datetime('fecha_inicio')}, {st.fmt_datetime('fecha_fin')} "
+            "FROM reservas WHERE fecha_inicio >= %s AND fecha_inicio < %s AND fecha_fin > %s "
+            "UNION ALL "
+            f"SELECT cancha, {st.fmt_datetime('fecha_inicio')}, {st.fmt_datetime('fecha_fin')} "
+            "FROM bloqueos_cancha WHERE fecha_inicio < %s AND fecha_fin > %s",
+            (previo, hasta, desde, hasta, desde)
+        )
+        por_dia = {f: [] for f in fechas}
+        for cancha, inicio, fin in cur.fetchall():
+            # Se recorta a cada día que toca (un bloqueo puede abarcar varios)
+            for fecha in por_dia:
+                dia_desde, dia_hasta = self._day_bounds(fecha)
+                if inicio < dia_hasta and fin > dia_desde:
+                    por_dia[fecha].append((cancha, max(inicio, dia_desde)[11:],
+                                           min(fin, dia_hasta)[11:]))
+        for fecha, filas in por_dia.items():
+            self.intervals.load_day(fecha, filas, versiones.get(fecha, 0))
+
+    def sync_intervals(self, fechas):
+        """Recarga del índice de intervalos los días cuya versión cambió."""
+        def leer(cur):
+            versiones = {f: self._day_version(cur, f) for f in fechas}
+            cambiados = [f for f in fechas if self.intervals.version(f) != versiones[f]]
+            if cambiados:
+                self._load_interval_days(cur, cambiados, versiones)
+        self.reads.read(leer, *[('fecha', f) for f in fechas])
+        return self.intervals
+
+    @query_profiler.timed
+    def canchas_libres(self, fecha_str, hora_str, minutos=60):
+        """Canchas libres durante todo [hora, hora + minutos), p. ej. "¿hay
+        alguna libre 90 minutos desde las 17:30?". Bisección por cancha
+        sobre el índice en memoria; la base solo se toca si el día cambió."""
+        if self._check_turn(fecha_str, hora_str, minutos):
+            return []
+        canchas = self.get_grid_config()[1]
+        return self.sync_intervals([fecha_str]).free_courts(fecha_str, hora_str, minutos, canchas)
+
+    @query_profiler.timed
+    def reservar_intervalo(self, usuario_id, fecha_str, hora_str, minutos=60, cancha=None):
+        """Reserva un turno de `minutos` (60, 90 o 120) desde `hora_str`.
+
+        Las horas en punto de 60 minutos van por `reservar`. El resto bloquea
+        las filas de `slots` de cada hora que toca el turno; todo turno que se
+        superponga toca al menos una de esas horas, así que dos escrituras en
+        conflicto se serializan ahí. Con las filas tomadas se confirma contra
+        `reservas` y `bloqueos_cancha`, y las horas tocadas quedan ocupadas en
+        `slots` para la grilla y las reservas por hora.
+        """
+        error = self._check_turn(fecha_str, hora_str, minutos)
+        if error:
+            return False, error
+        if minutos == 60 and a_minutos(hora_str) % 60 == 0 and cancha is None:
+            return self.reservar(usuario_id, fecha_str, hora_str)
+
+        candidatas = [cancha] if cancha is not None else self.canchas_libres(
+            fecha_str, hora_str, minutos)
+        if not candidatas:
+            return False, "No hay canchas libres para ese turno"
+        inicio, fin = self._interval_bounds(fecha_str, hora_str, minutos)
+        horas = [f"{fecha_str} {h}" for h in self._touched_hours(hora_str, minutos)]
+        db = self.pool.acquire()
+        cur = db.cursor()
+
+        try:
+            for intento in range(self.MAX_RETRIES):
+                try:
+                    self.storage.begin(cur)
+                    elegida = None
+                    for numero in candidatas:
+                        if self._claim_interval(cur, numero, inicio, fin, horas):
+                            elegida = numero
+                            break
+                    if elegida is None:
+                        db.rollback()
+                        # El índice estaba atrasado: que el próximo uso recargue
+                        self.intervals.invalidate(fecha_str)
+                        return False, "No hay canchas libres para ese turno"
+
+                    cur.execute(
+                        "INSERT INTO reservas (usuario_id, cancha, fecha_inicio, fecha_fin) VALUES (%s, %s, %s, %s)",
+                        (usuario_id, elegida, inicio, fin)
+                    )
+                    analitica.registrar(cur, self.storage, [(usuario_id, elegida, inicio, fin)])
+                    self._bump_day_version(cur, fecha_str)
+                    db.commit()
+                    self._after_interval(fecha_str, hora_str, minutos, elegida, horas, usuario_id)
+                    return True, (f"Reservada cancha {elegida} para {fecha_str} "
+                                  f"de {hora_str[:5]} a {fin[11:16]}")
+
+                except Exception as e:
+                    db.rollback()
+                    if not self.storage.is_retryable(e):
+                        raise
+                    time.sleep(self.RETRY_BACKOFF * (2 ** intento) * random.random())
+
+            return False, "Horario muy solicitado, intentá de nuevo"
+
+        except Exception as e:
+            db.rollback()
+            return False, str(e)
 
-            # 2) Marcarla como ocupada
+        finally:
+            cur.close()
+            self.pool.release(db)
+
+    @query_profiler.timed
+    def bloquear_cancha(self, cancha, fecha_str, hora_str, minutos, motivo="Mantenimiento"):
+        """Bloqueo de mantenimiento de una cancha (no tiene que estar en la
+        ventana: al abrirse el día, sus franjas nacen ocupadas). Falla si
+        choca con reservas existentes."""
+        if minutos <= 0 or a_minutos(hora_str) + minutos > 24 * 60:
+            return False, "El bloqueo tiene que terminar en el mismo día"
+        inicio, fin = self._interval_bounds(fecha_str, hora_str, minutos)
+        franjas = set(self.get_grid_config()[0])
+        horas = [f"{fecha_str} {h}" for h in self._touched_hours(hora_str, minutos)
+                 if h in franjas]
+        db = self.pool.acquire()
+        cur = db.cursor()
+
+        try:
+            for intento in range(self.MAX_RETRIES):
+                try:
+                    self.storage.begin(cur)
+                    if not self._claim_interval(cur, cancha, inicio, fin, horas, bloqueos=False):
+                        db.rollback()
+                        return False, f"La cancha {cancha} tiene reservas en ese horario"
+                    cur.execute(
+                        "INSERT INTO bloqueos_cancha (cancha, fecha_inicio, fecha_fin, motivo) "
+                        "VALUES (%s, %s, %s, %s)",
+                        (cancha, inicio, fin, motivo)
+                    )
+                    self._bump_day_version(cur, fecha_str)
+                    db.commit()
+                    self._after_interval(fecha_str, hora_str, minutos, cancha, horas)
+                    return True, f"Cancha {cancha} bloqueada el {fecha_str} de {hora_str[:5]} a {fin[11:16]}"
+
+                except Exception as e:
+                    db.rollback()
+                    if not self.storage.is_retryable(e):
+                        raise
+                    time.sleep(self.RETRY_BACKOFF * (2 ** intento) * random.random())
+
+            return False, "Horario muy solicitado, intentá de nuevo"
+
+        except Exception as e:
+            db.rollback()
+            return False, str(e)
+
+        finally:
+            cur.close()
+            self.pool.release(db)
+
+    def _claim_interval(self, cur, cancha, inicio, fin, horas, bloqueos=True):
+        """Bloquea las filas de `slots` de las horas tocadas y, si el intervalo
+        no choca con nada, las marca ocupadas. Devuelve False si choca."""
+        marcas = ", ".join(["%s"] * len(horas))
+        if horas:
             cur.execute(
-                f"UPDATE {tabla} SET disponible = 0 "
-                f"WHERE fecha_hora = %s AND cancha_numero = %s",
-                (fecha_hora, cancha)
+                f"SELECT disponible FROM slots WHERE cancha_numero = %s AND fecha_hora IN ({marcas})"
+                + self.storage.for_update,
+                (cancha, *horas)
             )
+            cur.fetchall()
+        # Solo puede chocar una reserva que empiece a lo sumo un turno máximo antes
+        previo = (datetime.strptime(inicio, "%Y-%m-%d %H:%M:%S")
+                  - timedelta(minutes=max(self.DURACIONES))).strftime("%Y-%m-%d %H:%M:%S")
+        cur.execute(
+            "SELECT 1 FROM reservas WHERE cancha = %s AND fecha_inicio >= %s "
+            "AND fecha_inicio < %s AND fecha_fin > %s LIMIT 1" + self.storage.for_update,
+            (cancha, previo, fin, inicio)
+        )
+        if cur.fetchone():
+            return False
+        if bloqueos:
+            cur.execute(
+                "SELECT 1 FROM bloqueos_cancha WHERE cancha = %s "
+                "AND fecha_inicio < %s AND fecha_fin > %s LIMIT 1" + self.storage.for_update,
+                (cancha, fin, inicio)
+            )
+            if cur.fetchone():
+                return False
+        if horas:
+            cur.execute(
+                f"UPDATE slots SET disponible = 0 WHERE cancha_numero = %s AND fecha_hora IN ({marcas})",
+                (cancha, *horas)
+            )
+        return True
 
-            # 3) Insertar la reserva
-            fin_dt = datetime.strptime(fecha_hora, "%Y-%m-%d %H:%M:%S") + timedelta(hours=1)
+    def _after_interval(self, fecha_str, hora_str, minutos, cancha, horas, usuario_id=None):
+        """Pone al día cachés e índices después de confirmar un intervalo."""
+        self.reads.note_write(('fecha', fecha_str), ('usuario', usuario_id))
+        if usuario_id is not None:
+            self.user_cache.invalidate(usuario_id)
+        self.cache.invalidate(fecha_str)
+        self.intervals.add(fecha_str, cancha, hora_str, minutos)
+        for fecha_hora in horas:
+            self.engine.mark_taken(fecha_str, fecha_hora[11:], cancha)
+        events.publish('disponibilidad', {'fecha': fecha_str})
+
+    # ---------------------- cancelación y lista de espera ----------------------
+    def _free_hours(self, cur, cancha, horas):
+        """Libera las filas de `slots` de esas horas que ya no toca ninguna
+        reserva ni bloqueo. Devuelve las que quedaron libres."""
+        margen = timedelta(minutes=max(self.DURACIONES))
+        libres = []
+        for fecha_hora in horas:
+            desde = datetime.strptime(fecha_hora, "%Y-%m-%d %H:%M:%S")
+            hasta = (desde + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")
+            previo = (desde - margen).strftime("%Y-%m-%d %H:%M:%S")
             cur.execute(
-                "INSERT INTO reservas (usuario_id, cancha, fecha_inicio, fecha_fin) VALUES (%s, %s, %s, %s)",
-                (usuario_id, cancha, fecha_hora, fin_dt.strftime("%Y-%m-%d %H:%M:%S"))
+                "UPDATE slots SET disponible = 1 "
+                "WHERE cancha_numero = %s AND fecha_hora = %s AND disponible = 0 "
+                "AND NOT EXISTS (SELECT 1 FROM reservas WHERE cancha = %s "
+                "AND fecha_inicio >= %s AND fecha_inicio < %s AND fecha_fin > %s) "
+                "AND NOT EXISTS (SELECT 1 FROM bloqueos_cancha WHERE cancha = %s "
+                "AND fecha_inicio < %s AND fecha_fin > %s)",
+                (cancha, fecha_hora, cancha, previo, hasta, fecha_hora, cancha, hasta, fecha_hora)
             )
+            if cur.rowcount == 1:
+                libres.append(fecha_hora)
+        return libres
+
+    def _assign_waiter(self, cur, fecha_hora):
+        """Le da la franja al primero de la lista de espera, si hay alguno y
+        queda una cancha libre. Devuelve (usuario_id, cancha, reserva_id) o None."""
+        cur.execute(
+            "SELECT id, usuario_id FROM lista_espera WHERE fecha_hora = %s "
+            "AND estado = 'esperando' ORDER BY id LIMIT 1" + self.storage.skip_locked,
+            (fecha_hora,)
+        )
+        fila = cur.fetchone()
+        if not fila:
+            return None
+        espera_id, usuario_id = fila
+        cancha = self._claim_court(cur, fecha_hora)
+        if cancha is None:
+            return None
+        fin = datetime.strptime(fecha_hora, "%Y-%m-%d %H:%M:%S") + timedelta(hours=1)
+        fila = (usuario_id, cancha, fecha_hora, fin.strftime("%Y-%m-%d %H:%M:%S"))
+        cur.execute(
+            "INSERT INTO reservas (usuario_id, cancha, fecha_inicio, fecha_fin) VALUES (%s, %s, %s, %s)",
+            fila
+        )
+        reserva_id = cur.lastrowid
+        analitica.registrar(cur, self.storage, [fila])
+        cur.execute("UPDATE lista_espera SET estado = 'asignada', reserva_id = %s WHERE id = %s",
+                    (reserva_id, espera_id))
+        return usuario_id, cancha, reserva_id
+
+    @query_profiler.timed
+    def cancelar_reserva(self, reserva_id, usuario_id=None):
+        """Cancela una reserva futura (con `usuario_id`, solo si es suya).
+
+        En la misma transacción se borra la reserva, se liberan las franjas
+        que ocupaba y, si alguna tiene lista de espera, el primero de la cola
+        se queda con la cancha antes de que nadie más la vea libre. Después
+        se avisa por `events` al beneficiado y a los que miran la grilla.
+        """
+        st = self.storage
+        db = self.pool.acquire()
+        cur = db.cursor()
+
+        try:
+            for intento in range(self.MAX_RETRIES):
+                try:
+                    st.begin(cur)
+                    cur.execute(
+                        f"SELECT usuario_id, cancha, {st.fmt_datetime('fecha_inicio')}, "
+                        f"{st.fmt_datetime('fecha_fin')} FROM reservas WHERE id = %s" + st.for_update,
+                        (reserva_id,)
+                    )
+                    fila = cur.fetchone()
+                    if not fila or (usuario_id is not None and fila[0] != usuario_id):
+                        db.rollback()
+                        return False, "No existe la reserva"
+                    dueno, cancha, inicio, fin = fila
+                    if inicio <= datetime.now().strftime("%Y-%m-%d %H:%M:%S"):
+                        db.rollback()
+                        return False, "No se puede cancelar una reserva que ya empezó"
+                    fecha, hora = inicio[:10], inicio[11:]
+                    minutos = int((datetime.strptime(fin, "%Y-%m-%d %H:%M:%S")
+                                   - datetime.strptime(inicio, "%Y-%m-%d %H:%M:%S")).total_seconds() // 60)
+
+                    cur.execute("DELETE FROM reservas WHERE id = %s", (reserva_id,))
+                    analitica.registrar(cur, st, [(dueno, cancha, inicio, fin)], signo=-1)
+                    horas = [f"{fecha} {h}" for h in self._touched_hours(hora, minutos)]
+                    asignadas = []
+                    liberadas = self._free_hours(cur, cancha, horas)
+                    for fecha_hora in liberadas:
+                        asignada = self._assign_waiter(cur, fecha_hora)
+                        if asignada:
+                            asignadas.append((fecha_hora,) + asignada)
+                    self._bump_day_version(cur, fecha)
+                    db.commit()
+
+                    self.reads.note_write(('fecha', fecha), ('usuario', dueno),
+                                          *[('usuario', a[1]) for a in asignadas])
+                    self.user_cache.invalidate(dueno, *[a[1] for a in asignadas])
+                    self.cache.invalidate(fecha)
+                    self.intervals.remove(fecha, cancha, hora, minutos)
+                    for fecha_hora in liberadas:
+                        self.engine.mark_free(fecha, fecha_hora[11:], cancha)
+                    for fecha_hora, uid, numero, _ in asignadas:
+                        self.engine.mark_taken(fecha, fecha_hora[11:], numero)
+                        self.intervals.add(fecha, numero, fecha_hora[11:], 60)
+                    events.publish('disponibilidad', {'fecha': fecha})
+                    for fecha_hora, uid, numero, rid in asignadas:
+                        events.publish(f"usuario:{uid}", {
+                            'tipo': 'espera_asignada', 'fecha': fecha,
+                            'hora': fecha_hora[11:], 'cancha': numero, 'reserva_id': rid,
+                        })
+                    return True, "Reserva cancelada"
 
-            self.gestor.db.commit()
-            return True, f"Reservada cancha {cancha} para {fecha_str} a las {hora_str}"
+                except Exception as e:
+                    db.rollback()
+                    if not (isinstance(e, _Contended) or st.is_retryable(e)):
+                        raise
+                    time.sleep(self.RETRY_BACKOFF * (2 ** intento) * random.random())
+
+            return False, "Horario muy solicitado, intentá de nuevo"
 
         except Exception as e:
-            self.gestor.db.rollback()
+            db.rollback()
             return False, str(e)
 
         finally:
-            self.gestor.desconectar()
+            cur.close()
+            self.pool.release(db)
+
+    def cancelar_reserva_sesion(self, token, reserva_id):
+        """`cancelar_reserva` de una reserva del dueño de la sesión."""
+        sesion = sessions.validate(token)
+        if sesion is None:
+            return False, "La sesión venció, volvé a iniciar sesión"
+        return self.cancelar_reserva(reserva_id, sesion.usuario_id)
+
+    @query_profiler.timed
+    def anotar_espera(self, usuario_id, fecha_str, hora_str):
+        """Anota al jugador en la lista de espera de una franja llena."""
+        if not self._in_window(fecha_str):
+            return False, "Fecha fuera de rango"
+        if hora_str not in self.get_grid_config()[0]:
+            return False, "Horario inexistente"
+        fecha_hora = f"{fecha_str} {hora_str}"
+        with self.pool.connection() as db, db.cursor() as cur:
+            self.storage.begin(cur)
+            try:
+                cur.execute("SELECT 1 FROM slots WHERE fecha_hora = %s AND disponible = 1 LIMIT 1",
+                            (fecha_hora,))
+                if cur.fetchone():
+                    db.rollback()
+                    return False, "Hay canchas libres en ese horario, reservá directamente"
+                cur.execute(
+                    "SELECT 1 FROM lista_espera WHERE fecha_hora = %s AND usuario_id = %s "
+                    "AND estado = 'esperando'", (fecha_hora, usuario_id)
+                )
+                if cur.fetchone():
+                    db.rollback()
+                    return False, "Ya estás en la lista de espera de ese horario"
+                cur.execute("INSERT INTO lista_espera (usuario_id, fecha_hora) VALUES (%s, %s)",
+                            (usuario_id, fecha_hora))
+                cur.execute("SELECT COUNT(*) FROM lista_espera WHERE fecha_hora = %s "
+                            "AND estado = 'esperando'", (fecha_hora,))
+                puesto = cur.fetchone()[0]
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        self.reads.note_write(('usuario', usuario_id))
+        return True, f"Te anotamos en la lista de espera (puesto {puesto})"
+
+    def anotar_espera_sesion(self, token, fecha_str, hora_str):
+        sesion = sessions.validate(token)
+        if sesion is None:
+            return False, "La sesión venció, volvé a iniciar sesión"
+        return self.anotar_espera(sesion.usuario_id, fecha_str, hora_str)
 
+    def salir_espera(self, usuario_id, fecha_str, hora_str):
+        with self.pool.connection() as db, db.cursor() as cur:
+            cur.execute(
+                "UPDATE lista_espera SET estado = 'cancelada' WHERE usuario_id = %s "
+                "AND fecha_hora = %s AND estado = 'esperando'",
+                (usuario_id, f"{fecha_str} {hora_str}")
+            )
+            db.commit()
+            self.reads.note_write(('usuario', usuario_id))
+            return cur.rowcount > 0
+
+    def mis_esperas(self, usuario_id):
+        """Franjas futuras en las que el jugador espera: (fecha, hora, puesto)."""
+        st = self.storage
+        def leer(cur):
+            cur.execute(
+                f"SELECT {st.fmt_date('e.fecha_hora')}, {st.fmt_time('e.fecha_hora')}, "
+                "(SELECT COUNT(*) FROM lista_espera o WHERE o.fecha_hora = e.fecha_hora "
+                "AND o.estado = 'esperando' AND o.id <= e.id) "
+                "FROM lista_espera e WHERE e.usuario_id = %s AND e.estado = 'esperando' "
+                "AND e.fecha_hora >= %s ORDER BY e.fecha_hora",
+                (usuario_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            return cur.fetchall()
+        return self.reads.read(leer, ('usuario', usuario_id))
+
+    @query_profiler.timed
     def get_reservations(self):
         """Devuelve todas las reservas con día, hora, cancha y usuario."""
-        um = self.gestor
-        cur = um.cursor
         sql = (
-            "SELECT "
-              "DATE_FORMAT(r.fecha_inicio, '%Y-%m-%d') AS dia, "
-              "DATE_FORMAT(r.fecha_inicio, '%H:%i:%s') AS hora, "
+            f"SELECT "
+              f"{self.storage.fmt_date('r.fecha_inicio')} AS dia, "
+              f"{self.storage.fmt_time('r.fecha_inicio')} AS hora, "
               "r.cancha, u.usuario "
             "FROM reservas r "
             "JOIN usuarios u ON r.usuario_id = u.id "
             "ORDER BY r.fecha_inicio"
         )
-        cur.execute(sql)
-        rows = cur.fetchall()
-        um.desconectar()
-        return rows
+        def leer(cur):
+            cur.execute(sql, ())
+            return cur.fetchall()
+        return self.reads.read(leer)
+
+    def _reservations_filter(self, desde=None, hasta=None, cancha=None):
+        """Condiciones WHERE (sobre idx_reservas_fecha / idx_reservas_cancha)."""
+        where, params = [], []
+        if desde:
+            where.append("r.fecha_inicio >= %s")
+            params.append(f"{desde} 00:00:00")
+        if hasta:
+            where.append("r.fecha_inicio < %s")
+            params.append(self._day_bounds(hasta)[1])
+        if cancha is not None:
+            where.append("r.cancha = %s")
+            params.append(cancha)
+        return where, params
+
+    @query_profiler.timed
+    def get_reservations_page(self, after=None, limit=200, desde=None, hasta=None, cancha=None):
+        """Una página de reservas ordenadas por (fecha_inicio, id).
+
+        `after` es la clave devuelta por la página anterior; la consulta
+        continúa desde ahí por índice en vez de usar OFFSET. Devuelve
+        `(filas, siguiente)` con filas (día, hora, cancha, usuario) y
+        `siguiente` en None cuando no hay más.
+        """
+        where, params = self._reservations_filter(desde, hasta, cancha)
+        if after is not None:
+            where.append("(r.fecha_inicio > %s OR (r.fecha_inicio = %s AND r.id > %s))")
+            params += [after[0], after[0], after[1]]
+        st = self.storage
+        sql = (
+            f"SELECT "
+              f"{st.fmt_date('r.fecha_inicio')} AS dia, "
+              f"{st.fmt_time('r.fecha_inicio')} AS hora, "
+              "r.cancha, u.usuario, "
+              f"{st.fmt_datetime('r.fecha_inicio')}, r.id "
+            "FROM reservas r "
+            "JOIN usuarios u ON r.usuario_id = u.id "
+            + ("WHERE " + " AND ".join(where) + " " if where else "") +
+            "ORDER BY r.fecha_inicio, r.id "
+            "LIMIT %s"
+        )
+        def leer(cur):
+            cur.execute(sql, params + [limit])
+            return cur.fetchall()
+        filas = self.reads.read(leer)
+        siguiente = (filas[-1][4], filas[-1][5]) if len(filas) == limit else None
+        return [f[:4] for f in filas], siguiente
+
+    def iter_reservations(self, desde=None, hasta=None, cancha=None, batch=500):
+        """Recorre las reservas con un cursor del lado del servidor.
+
+        Las filas llegan de a `batch` sin cargar el resultado entero en
+        memoria. La conexión queda prestada hasta agotar (o cerrar) el
+        generador.
+        """
+        where, params = self._reservations_filter(desde, hasta, cancha)
+        st = self.storage
+        sql = (
+            f"SELECT "
+              f"{st.fmt_date('r.fecha_inicio')} AS dia, "
+              f"{st.fmt_time('r.fecha_inicio')} AS hora, "
+              "r.cancha, u.usuario "
+            "FROM reservas r "
+            "JOIN usuarios u ON r.usuario_id = u.id "
+            + ("WHERE " + " AND ".join(where) + " " if where else "") +
+            "ORDER BY r.fecha_inicio, r.id"
+        )
+        with self.reads.connection() as db:
+            cur = st.server_cursor(db)
+            try:
+                cur.execute(sql, params)
+                while True:
+                    filas = cur.fetchmany(batch)
+                    if not filas:
+                        break
+                    yield from filas
+            finally:
+                # Cerrar un SSCursor descarta lo que quede pendiente del resultado
+                cur.close()
+
+    @query_profiler.timed
+    def mis_reservas(self, usuario_id, cuando='proximas', after=None, limit=20):
+        """Una página de las reservas del jugador, por idx_reservas_usuario.
+
+        `cuando` es 'proximas' (las que no empezaron, de la más cercana en
+        adelante) o 'pasadas' (de la más reciente hacia atrás). Como en
+        `get_reservations_page`, `after` es la clave que devolvió la página
+        anterior. Devuelve `(filas, siguiente)` con filas (id, día, hora
+        inicio, hora fin, cancha). Las páginas quedan en `user_cache` hasta
+        que el jugador reserve o cancele.
+        """
+        if cuando not in ('proximas', 'pasadas'):
+            raise ValueError(f"cuando: 'proximas' o 'pasadas', no {cuando!r}")
+        clave = (cuando, tuple(after) if after else None, limit)
+        pagina = self.user_cache.lookup(usuario_id, clave)
+        if pagina is not None:
+            return pagina
+        ticket = self.user_cache.ticket()
+
+        st = self.storage
+        ahora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if cuando == 'proximas':
+            where, params, orden, mayor = ["r.fecha_inicio >= %s"], [ahora], "", ">"
+        else:
+            where, params, orden, mayor = ["r.fecha_inicio < %s"], [ahora], " DESC", "<"
+        if after is not None:
+            where.append(f"(r.fecha_inicio {mayor} %s OR (r.fecha_inicio = %s AND r.id {mayor} %s))")
+            params += [after[0], after[0], after[1]]
+        sql = (
+            f"SELECT r.id, "
+              f"{st.fmt_date('r.fecha_inicio')}, {st.fmt_time('r.fecha_inicio')}, "
+              f"{st.fmt_time('r.fecha_fin')}, r.cancha, {st.fmt_datetime('r.fecha_inicio')} "
+            "FROM reservas r "
+            "WHERE r.usuario_id = %s AND " + " AND ".join(where) + " "
+            f"ORDER BY r.fecha_inicio{orden}, r.id{orden} "
+            "LIMIT %s"
+        )
+        def leer(cur):
+            cur.execute(sql, [usuario_id] + params + [limit])
+            return cur.fetchall()
+        filas = self.reads.read(leer, ('usuario', usuario_id))
+        siguiente = (filas[-1][5], filas[-1][0]) if len(filas) == limit else None
+        pagina = ([tuple(f[:5]) for f in filas], siguiente)
+        self.user_cache.store(usuario_id, clave, pagina, ticket)
+        return pagina
+
+    def mis_reservas_sesion(self, token, cuando='proximas', after=None, limit=20):
+        sesion = sessions.validate(token)
+        if sesion is None:
+            raise PermissionError("La sesión venció, volvé a iniciar sesión")
+        return self.mis_reservas(sesion.usuario_id, cuando, after, limit)
+
+
+class TorneoManager:
+    """Torneos sobre `torneos`/`inscripciones_torneo`: inscripción masiva,
+    cuadros (eliminación o todos contra todos) y programación de partidos en
+    las franjas libres de `slots`. Cada partido programado ocupa su franja
+    con un bloqueo en `bloqueos_cancha`, así no se puede alquilar."""
+    DESCANSO = 60       # minutos mínimos entre dos partidos de un participante
+    DURACION = 60       # un partido ocupa una franja
+
+    def __init__(self, pool=None, storage=None, reservas=None):
+        self.pool     = pool or get_pool()
+        self.storage  = storage or get_storage()
+        self.reservas = reservas or ReservationManager(self.pool, storage=self.storage)
+
+    def crear_torneo(self, nombre, tipo, fecha, ubicacion=None):
+        """Devuelve el id del torneo nuevo."""
+        with self.pool.connection() as db, db.cursor() as cur:
+            cur.execute(
+                "INSERT INTO torneos (nombre, tipo, fecha, ubicacion) VALUES (%s, %s, %s, %s)",
+                (nombre, tipo, fecha, ubicacion)
+            )
+            db.commit()
+            return cur.lastrowid
+
+    def listar_torneos(self, desde=None):
+        """(id, nombre, tipo, fecha, ubicación, inscriptos) desde una fecha."""
+        with self.pool.connection() as db, db.cursor() as cur:
+            cur.execute(
+                f"SELECT t.id, t.nombre, t.tipo, {self.storage.fmt_date('t.fecha')}, t.ubicacion, "
+                "(SELECT COUNT(*) FROM inscripciones_torneo i WHERE i.torneo_id = t.id) "
+                "FROM torneos t WHERE t.fecha >= %s ORDER BY t.fecha, t.id",
+                (desde or datetime.today().strftime(ReservationManager.DATE_FORMAT),)
+            )
+            return cur.fetchall()
+
+    def _tipo(self, cur, torneo_id):
+        cur.execute("SELECT tipo FROM torneos WHERE id = %s", (torneo_id,))
+        fila = cur.fetchone()
+        return fila[0] if fila else None
+
+    @query_profiler.timed
+    def inscribir(self, torneo_id, inscriptos):
+        """Inscripción masiva en una transacción.
+
+        En singles `inscriptos` es una lista de ids de jugador; en dobles, de
+        parejas (id, id). Se saltean los que ya estaban anotados (o que
+        aparecen dos veces) y la pareja entera si uno de los dos ya lo está.
+        Devuelve `(agregados, repetidos)`.
+        """
+        with self.pool.connection() as db, db.cursor() as cur:
+            self.storage.begin(cur)
+            try:
+                tipo = self._tipo(cur, torneo_id)
+                if tipo is None:
+                    db.rollback()
+                    return [], list(inscriptos)
+                cur.execute("SELECT usuario_id FROM inscripciones_torneo WHERE torneo_id = %s",
+                            (torneo_id,))
+                anotados = {r[0] for r in cur.fetchall()}
+                agregados, repetidos, filas = [], [], []
+                for item in inscriptos:
+                    jugadores = tuple(item) if tipo == 'dobles' else (item,)
+                    if len(set(jugadores)) != len(jugadores) or anotados.intersection(jugadores):
+                        repetidos.append(item)
+                        continue
+                    anotados.update(jugadores)
+                    agregados.append(item)
+                    equipo = min(jugadores)
+                    filas.extend((torneo_id, j, equipo) for j in jugadores)
+                if filas:
+                    cur.executemany(
+                        "INSERT INTO inscripciones_torneo (torneo_id, usuario_id, equipo) "
+                        "VALUES (%s, %s, %s)", filas
+                    )
+                db.commit()
+                return agregados, repetidos
+            except Exception:
+                db.rollback()
+                raise
+
+    def inscribir_sesion(self, token, torneo_id, pareja=None):
+        """Anota al dueño de la sesión (con `pareja`, nombre de usuario, en dobles)."""
+        sesion = sessions.validate(token)
+        if sesion is None:
+            return False, "La sesión venció, volvé a iniciar sesión"
+        item = sesion.usuario_id
+        if pareja:
+            with self.pool.connection() as db, db.cursor() as cur:
+                cur.execute("SELECT id FROM usuarios WHERE usuario = %s", (pareja,))
+                fila = cur.fetchone()
+            if not fila:
+                return False, f"No existe el usuario {pareja}"
+            item = (sesion.usuario_id, fila[0])
+        agregados, _ = self.inscribir(torneo_id, [item])
+        if not agregados:
+            return False, "Ya estabas anotado (o tu pareja ya tiene equipo)"
+        return True, "Inscripción confirmada"
+
+    def participantes(self, torneo_id):
+        """Participantes (equipo) en orden de inscripción: ese es el orden de siembra."""
+        with self.pool.connection() as db, db.cursor() as cur:
+            cur.execute(
+                "SELECT equipo FROM inscripciones_torneo WHERE torneo_id = %s "
+                "GROUP BY equipo ORDER BY MIN(id)", (torneo_id,)
+            )
+            return [r[0] for r in cur.fetchall()]
+
+    @query_profiler.timed
+    def generar_cuadro(self, torneo_id, formato='eliminacion', grupos=1, siembra=None):
+        """Arma y guarda el cuadro: `formato` 'eliminacion' o 'todos_contra_todos'
+        (en `grupos`). `siembra` reemplaza el orden de inscripción. No se puede
+        rehacer un cuadro ya programado. Devuelve (ok, partidos o mensaje)."""
+        participantes = siembra or self.participantes(torneo_id)
+        if formato == 'eliminacion':
+            partidos = torneos.eliminacion(participantes)
+        elif formato == 'todos_contra_todos':
+            partidos = torneos.todos_contra_todos(participantes, grupos)
+        else:
+            return False, f"Formato desconocido: {formato}"
+
+        with self.pool.connection() as db, db.cursor() as cur:
+            self.storage.begin(cur)
+            try:
+                cur.execute("SELECT 1 FROM partidos_torneo WHERE torneo_id = %s "
+                            "AND fecha_hora IS NOT NULL LIMIT 1", (torneo_id,))
+                if cur.fetchone():
+                    db.rollback()
+                    return False, "El torneo ya tiene partidos programados"
+                cur.execute("DELETE FROM partidos_torneo WHERE torneo_id = %s", (torneo_id,))
+                cur.executemany(
+                    "INSERT INTO partidos_torneo (torneo_id, numero, ronda, grupo, "
+                    "equipo_a, equipo_b, origen_a, origen_b) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                    [(torneo_id, p.numero, p.ronda, p.grupo, p.a, p.b, p.origen_a, p.origen_b)
+                     for p in partidos]
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        return True, partidos
+
+    def _cargar_partidos(self, cur, torneo_id):
+        cur.execute(
+            "SELECT numero, ronda, grupo, equipo_a, equipo_b, origen_a, origen_b "
+            "FROM partidos_torneo WHERE torneo_id = %s ORDER BY ronda, numero", (torneo_id,)
+        )
+        return [torneos.Partido(numero, ronda, a, b, oa, ob, grupo)
+                for numero, ronda, grupo, a, b, oa, ob in cur.fetchall()]
+
+    @query_profiler.timed
+    def programar(self, torneo_id, desde=None, dias=1, descanso=None):
+        """Programa todos los partidos en las franjas libres desde `desde` (por
+        defecto, la fecha del torneo) durante `dias` días.
+
+        Las franjas se leen en una consulta, el armado es en memoria y se
+        ocupan en una sola transacción; si alguien reservó una de esas franjas
+        en el medio, se vuelve a calcular. Como `generar_cuadro`, no rehace un
+        torneo que ya tiene partidos programados. Devuelve `(True, (asignados,
+        sin_lugar))` o `(False, mensaje)`.
+        """
+        descanso = self.DESCANSO if descanso is None else descanso
+        st = self.storage
+        db = self.pool.acquire()
+        cur = db.cursor()
+        try:
+            for intento in range(ReservationManager.MAX_RETRIES):
+                try:
+                    st.begin(cur)
+                    cur.execute(f"SELECT {st.fmt_date('fecha')} FROM torneos WHERE id = %s",
+                                (torneo_id,))
+                    fila = cur.fetchone()
+                    if fila is None:
+                        db.rollback()
+                        return False, "El torneo no existe"
+                    cur.execute("SELECT 1 FROM partidos_torneo WHERE torneo_id = %s "
+                                "AND fecha_hora IS NOT NULL LIMIT 1", (torneo_id,))
+                    if cur.fetchone():
+                        db.rollback()
+                        return False, "El torneo ya tiene partidos programados"
+                    inicio = desde or fila[0]
+                    fin = (datetime.strptime(inicio, ReservationManager.DATE_FORMAT)
+                           + timedelta(days=dias)).strftime("%Y-%m-%d %H:%M:%S")
+                    partidos = self._cargar_partidos(cur, torneo_id)
+                    if not partidos:
+                        db.rollback()
+                        return False, "El torneo no tiene cuadro generado"
+                    cur.execute(
+                        f"SELECT {st.fmt_datetime('fecha_hora')}, cancha_numero FROM slots "
+                        "WHERE fecha_hora >= %s AND fecha_hora < %s AND disponible = 1",
+                        (f"{inicio} 00:00:00", fin)
+                    )
+                    asignados, sin_lugar = torneos.programar(
+                        partidos, cur.fetchall(), descanso, self.DURACION)
+
+                    ocupar = [(fecha_hora, cancha) for fecha_hora, cancha in asignados.values()]
+                    cur.executemany(
+                        "UPDATE slots SET disponible = 0 "
+                        "WHERE fecha_hora = %s AND cancha_numero = %s AND disponible = 1", ocupar
+                    )
+                    if cur.rowcount != len(ocupar) and ocupar:
+                        raise _Contended()
+                    motivo = f"Torneo {torneo_id}"
+                    cur.executemany(
+                        "INSERT INTO bloqueos_cancha (cancha, fecha_inicio, fecha_fin, motivo) "
+                        "VALUES (%s, %s, %s, %s)",
+                        [(cancha, fecha_hora, torneos.fin_de(fecha_hora, self.DURACION), motivo)
+                         for fecha_hora, cancha in ocupar]
+                    )
+                    cur.executemany(
+                        "UPDATE partidos_torneo SET cancha = %s, fecha_hora = %s "
+                        "WHERE torneo_id = %s AND numero = %s",
+                        [(cancha, fecha_hora, torneo_id, numero)
+                         for numero, (fecha_hora, cancha) in asignados.items()]
+                    )
+                    fechas = sorted({fecha_hora[:10] for fecha_hora, _ in ocupar})
+                    cur.executemany(st.upsert_increment('canchas_version', 'fecha', 'version'),
+                                    [(f,) for f in fechas])
+                    db.commit()
+
+                    rm = self.reservas
+                    for fecha_hora, cancha in ocupar:
+                        rm.engine.mark_taken(fecha_hora[:10], fecha_hora[11:], cancha)
+                        rm.intervals.add(fecha_hora[:10], cancha, fecha_hora[11:], self.DURACION)
+                    rm.reads.note_write(*[('fecha', f) for f in fechas])
+                    for f in fechas:
+                        rm.cache.invalidate(f)
+                        events.publish('disponibilidad', {'fecha': f})
+                    return True, (asignados, sin_lugar)
+
+                except Exception as e:
+                    db.rollback()
+                    if not (isinstance(e, _Contended) or st.is_retryable(e)):
+                        raise
+                    time.sleep(ReservationManager.RETRY_BACKOFF * (2 ** intento) * random.random())
+            return False, "Franjas muy solicitadas, intentá de nuevo"
+        finally:
+            cur.close()
+            self.pool.release(db)
+
+    def partidos(self, torneo_id):
+        """(número, ronda, grupo, lado A, lado B, cancha, fecha y hora) para
+        mostrar; los lados son nombres de usuario ('a / b' en dobles) o
+        'Ganador P<n>'."""
+        st = self.storage
+        with self.pool.connection() as db, db.cursor() as cur:
+            cur.execute(
+                "SELECT i.equipo, u.usuario FROM inscripciones_torneo i "
+                "JOIN usuarios u ON u.id = i.usuario_id WHERE i.torneo_id = %s ORDER BY i.id",
+                (torneo_id,)
+            )
+            nombres = {}
+            for equipo, usuario in cur.fetchall():
+                nombres[equipo] = f"{nombres[equipo]} / {usuario}" if equipo in nombres else usuario
+            cur.execute(
+                "SELECT numero, ronda, grupo, equipo_a, equipo_b, origen_a, origen_b, cancha, "
+                f"{st.fmt_datetime('fecha_hora')} FROM partidos_torneo WHERE torneo_id = %s "
+                "ORDER BY ronda, numero", (torneo_id,)
+            )
+            filas = cur.fetchall()
+        lado = lambda e, o: nombres.get(e, e) if e is not None else f"Ganador P{o}"
+        return [(numero, ronda, grupo, lado(a, oa), lado(b, ob), cancha, fecha_hora)
+                for numero, ronda, grupo, a, b, oa, ob, cancha, fecha_hora in filas]
+
+
+class OcupacionManager:
+    """Reportes de ocupación para el administrador. Leen solo los resúmenes
+    que mantiene `analitica.registrar` (unas pocas filas por día), nunca
+    `reservas`, así que responden igual con años de historial.
+
+    Los rangos son de fechas inclusivas 'AAAA-MM-DD' (por defecto, los
+    últimos 30 días). La utilización es minutos jugados sobre minutos
+    ofrecidos según las canchas y franjas actuales.
+    """
+    DIAS_SEMANA = ("Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo")
+
+    def __init__(self, pool=None, storage=None, router=None):
+        self.pool    = pool or get_pool()
+        self.storage = storage or get_storage()
+        self.reads   = router or (get_router() if pool is None
+                                  else ReplicaRouter(self.pool, storage=self.storage))
+
+    def _rango(self, desde, hasta):
+        hasta = hasta or datetime.today().strftime("%Y-%m-%d")
+        desde = desde or (datetime.strptime(hasta, "%Y-%m-%d") - timedelta(days=29)).strftime("%Y-%m-%d")
+        return desde, hasta
+
+    def _capacidad(self):
+        """(minutos ofrecidos por cancha y día, canchas). Se pide antes de
+        tomar la conexión de lectura: la primera vez `get_grid_config` usa
+        otra del pool, y con SQLite el pool es de una sola."""
+        franjas, canchas = ReservationManager(self.pool, storage=self.storage).get_grid_config()
+        return len(franjas) * 60, len(canchas)
+
+    @staticmethod
+    def _fechas(desde, hasta):
+        d = datetime.strptime(desde, "%Y-%m-%d").date()
+        fin = datetime.strptime(hasta, "%Y-%m-%d").date()
+        while d <= fin:
+            yield d
+            d += timedelta(days=1)
+
+    def _por_cancha(self, cur, desde, hasta, capacidad):
+        minutos_dia, _ = capacidad
+        dias = sum(1 for _ in self._fechas(desde, hasta))
+        cur.execute(
+            "SELECT cancha, SUM(reservas), SUM(minutos) FROM ocupacion_horaria "
+            "WHERE fecha >= %s AND fecha <= %s GROUP BY cancha ORDER BY cancha",
+            (desde, hasta)
+        )
+        return [(cancha, int(n), int(m), m / (dias * minutos_dia) if dias and minutos_dia else 0.0)
+                for cancha, n, m in cur.fetchall()]
+
+    def _por_hora(self, cur, desde, hasta, capacidad):
+        _, canchas = capacidad
+        dias = sum(1 for _ in self._fechas(desde, hasta))
+        cur.execute(
+            "SELECT hora, SUM(reservas), SUM(minutos) FROM ocupacion_horaria "
+            "WHERE fecha >= %s AND fecha <= %s GROUP BY hora ORDER BY hora",
+            (desde, hasta)
+        )
+        return [(f"{hora:02d}:00", int(n), int(m), m / (dias * canchas * 60) if dias and canchas else 0.0)
+                for hora, n, m in cur.fetchall()]
+
+    def _por_dia_semana(self, cur, desde, hasta, capacidad):
+        minutos_dia, canchas = capacidad
+        cur.execute(
+            f"SELECT {self.storage.fmt_date('fecha')}, SUM(reservas), SUM(minutos) "
+            "FROM ocupacion_horaria WHERE fecha >= %s AND fecha <= %s GROUP BY fecha",
+            (desde, hasta)
+        )
+        totales = [[0, 0] for _ in self.DIAS_SEMANA]
+        for fecha, n, m in cur.fetchall():
+            fila = totales[datetime.strptime(fecha, "%Y-%m-%d").weekday()]
+            fila[0] += int(n)
+            fila[1] += int(m)
+        ofrecidos = [0] * 7
+        for d in self._fechas(desde, hasta):
+            ofrecidos[d.weekday()] += minutos_dia * canchas
+        return [(nombre, n, m, m / ofrecidos[i] if ofrecidos[i] else 0.0)
+                for i, (nombre, (n, m)) in enumerate(zip(self.DIAS_SEMANA, totales))]
+
+    def _top_jugadores(self, cur, desde, hasta, n):
+        # `uso_jugador` es mensual: cuenta los meses que toca el rango
+        cur.execute(
+            "SELECT u.usuario, SUM(j.reservas), SUM(j.minutos) "
+            "FROM uso_jugador j JOIN usuarios u ON u.id = j.usuario_id "
+            "WHERE j.mes >= %s AND j.mes <= %s "
+            "GROUP BY j.usuario_id, u.usuario HAVING SUM(j.reservas) > 0 "
+            "ORDER BY SUM(j.minutos) DESC, SUM(j.reservas) DESC LIMIT %s",
+            (desde[:8] + "01", hasta[:8] + "01", n)
+        )
+        return [(usuario, int(r), int(m)) for usuario, r, m in cur.fetchall()]
+
+    @query_profiler.timed
+    def por_cancha(self, desde=None, hasta=None):
+        """[(cancha, reservas, minutos, utilización)]"""
+        desde, hasta = self._rango(desde, hasta)
+        capacidad = self._capacidad()
+        return self.reads.read(lambda cur: self._por_cancha(cur, desde, hasta, capacidad))
+
+    @query_profiler.timed
+    def por_hora(self, desde=None, hasta=None):
+        """[('HH:00', reservas, minutos, utilización)]"""
+        desde, hasta = self._rango(desde, hasta)
+        capacidad = self._capacidad()
+        return self.reads.read(lambda cur: self._por_hora(cur, desde, hasta, capacidad))
+
+    @query_profiler.timed
+    def por_dia_semana(self, desde=None, hasta=None):
+        """[(día, reservas, minutos, utilización)] de lunes a domingo."""
+        desde, hasta = self._rango(desde, hasta)
+        capacidad = self._capacidad()
+        return self.reads.read(lambda cur: self._por_dia_semana(cur, desde, hasta, capacidad))
+
+    @query_profiler.timed
+    def top_jugadores(self, desde=None, hasta=None, n=10):
+        """[(usuario, reservas, minutos)] de los que más jugaron."""
+        desde, hasta = self._rango(desde, hasta)
+        return self.reads.read(lambda cur: self._top_jugadores(cur, desde, hasta, n))
+
+    @query_profiler.timed
+    def resumen(self, desde=None, hasta=None, n=10):
+        """Los cuatro reportes con una sola conexión, para el tablero."""
+        desde, hasta = self._rango(desde, hasta)
+        capacidad = self._capacidad()
+        return self.reads.read(lambda cur: {
+            'desde': desde, 'hasta': hasta,
+            'canchas':     self._por_cancha(cur, desde, hasta, capacidad),
+            'horas':       self._por_hora(cur, desde, hasta, capacidad),
+            'dias_semana': self._por_dia_semana(cur, desde, hasta, capacidad),
+            'jugadores':   self._top_jugadores(cur, desde, hasta, n),
+        })
+
+    def reconstruir(self):
+        """Rehace los resúmenes desde `reservas` (ver analitica.py)."""
+        return analitica.reconstruir(self.pool, self.storage)
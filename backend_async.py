@@ -0,0 +1,280 @@
+"""Variante asyncio de UsuarioManager y ReservationManager.
+
+Mismas operaciones y mismos resultados que `backendPRUEBA`, pero sobre
+aiomysql y un pool asíncrono, para servir muchas peticiones concurrentes
+desde un único proceso (frontends web, bots). La API sincrónica no cambia.
+Solo MySQL: el motor SQLite embebido se usa desde la API sincrónica.
+
+    um = AsyncUsuarioManager()
+    rol, uid = await um.iniciar_sesion("ana", "secreto")
+    ok, msg = await AsyncReservationManager().reservar(uid, "2025-07-01", "18:00:00")
+"""
+import asyncio
+import hmac
+import random
+from datetime import datetime, timedelta
+
+import aiomysql
+import pymysql
+
+import analitica
+from backendPRUEBA import (db_config, pool_config, availability_cache, availability_engine,
+                           intervals_index, user_reservations_cache, events, sessions,
+                           get_router, ReservationManager, UsuarioManager)
+from storage import MySQLStorage
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+async def get_pool():
+    """Pool aiomysql del proceso, creado la primera vez que se usa.
+
+    Las conexiones trabajan en autocommit: aiomysql cierra en vez de reciclar
+    las que vuelven con una transacción abierta, así que solo `reservar`
+    abre una explícitamente.
+    """
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                config = dict(db_config)
+                config['db'] = config.pop('database')
+                _pool = await aiomysql.create_pool(
+                    minsize=1,
+                    maxsize=pool_config['max_size'],
+                    pool_recycle=int(pool_config['max_lifetime']),
+                    autocommit=True,
+                    **config
+                )
+    return _pool
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+        _pool = None
+
+class AsyncUsuarioManager:
+    def __init__(self, pool=None, router=None):
+        self.pool  = pool
+        self.reads = router or get_router()
+
+    async def _get_pool(self):
+        if self.pool is None:
+            self.pool = await get_pool()
+        return self.pool
+
+    hash_password = staticmethod(UsuarioManager.hash_password)
+
+    async def crear_usuario(self, nombre_usuario, clave, rol):
+        clave_segura = self.hash_password(clave)
+        sql = "INSERT INTO usuarios (usuario, contraseña, tipo) VALUES (%s, %s, %s)"
+        pool = await self._get_pool()
+        try:
+            async with pool.acquire() as db, db.cursor() as cur:
+                await cur.execute(sql, (nombre_usuario, clave_segura, rol))
+            self.reads.note_write(('login', nombre_usuario))
+            return True
+        except Exception:
+            return False
+
+    async def iniciar_sesion(self, nombre_usuario, clave):
+        # Como en la API sincrónica: búsqueda por el índice único de `usuario`
+        # y el hash comparado acá, en tiempo constante
+        consulta = "SELECT tipo, id, contraseña FROM usuarios WHERE usuario = %s"
+        pool = await self._get_pool()
+        async with pool.acquire() as db, db.cursor() as cur:
+            await cur.execute(consulta, (nombre_usuario,))
+            resultado = await cur.fetchone()
+        if resultado and hmac.compare_digest(resultado[2], self.hash_password(clave)):
+            return resultado[0], resultado[1]  # (rol, usuario_id)
+        return None, None
+
+    async def abrir_sesion(self, nombre_usuario, clave):
+        """Como `UsuarioManager.abrir_sesion`: (rol, usuario_id, token)."""
+        rol, usuario_id = await self.iniciar_sesion(nombre_usuario, clave)
+        if rol is None:
+            return None, None, None
+        return rol, usuario_id, sessions.issue(usuario_id, rol)
+
+class _Contended(Exception):
+    """La franja tiene canchas libres pero otra transacción las está tomando."""
+
+_window_days = None
+
+class AsyncReservationManager:
+    """Versión asyncio de ReservationManager; comparte con ella cachés,
+    índices, avisos (`events`) y parámetros de reintento, así una reserva
+    hecha por acá se ve igual que una hecha por la API sincrónica."""
+    MAX_DAYS         = ReservationManager.MAX_DAYS
+    DATE_FORMAT      = ReservationManager.DATE_FORMAT
+    MAX_RETRIES      = ReservationManager.MAX_RETRIES
+    RETRY_BACKOFF    = ReservationManager.RETRY_BACKOFF
+    RETRYABLE_ERRORS = MySQLStorage.RETRYABLE_ERRORS
+
+    def __init__(self, pool=None, cache=None, engine=None, intervals=None, user_cache=None,
+                 router=None):
+        self.pool       = pool
+        self.cache      = cache or availability_cache
+        self.engine     = engine or availability_engine
+        self.intervals  = intervals or intervals_index
+        self.user_cache = user_cache or user_reservations_cache
+        self.reads      = router or get_router()
+
+    async def _get_pool(self):
+        if self.pool is None:
+            self.pool = await get_pool()
+        return self.pool
+
+    async def get_window_days(self):
+        """Cantidad de días reservables a partir de mañana."""
+        global _window_days
+        if _window_days is None:
+            pool = await self._get_pool()
+            async with pool.acquire() as db, db.cursor() as cur:
+                await cur.execute("SELECT valor FROM config_reservas WHERE clave = 'dias_ventana'")
+                fila = await cur.fetchone()
+            _window_days = fila[0] if fila else self.MAX_DAYS
+        return _window_days
+
+    async def _in_window(self, fecha_str):
+        hoy   = datetime.today().date()
+        fecha = datetime.strptime(fecha_str, self.DATE_FORMAT).date()
+        offset = (fecha - hoy).days
+        return 1 <= offset <= await self.get_window_days()
+
+    def _day_bounds(self, fecha_str):
+        desde = datetime.strptime(fecha_str, self.DATE_FORMAT)
+        hasta = desde + timedelta(days=1)
+        return desde.strftime("%Y-%m-%d %H:%M:%S"), hasta.strftime("%Y-%m-%d %H:%M:%S")
+
+    async def get_available_slots(self, fecha_str):
+        """Devuelve las franjas horarias con al menos una cancha libre."""
+        if not await self._in_window(fecha_str):
+            return []
+
+        slots = self.cache.lookup(fecha_str)
+        if slots is not None:
+            return slots
+
+        query = (
+            "SELECT DISTINCT DATE_FORMAT(fecha_hora, '%%H:%%i:%%s') AS hora "
+            "FROM slots WHERE fecha_hora >= %s AND fecha_hora < %s "
+            "AND disponible = 1 "
+            "ORDER BY hora"
+        )
+        pool = await self._get_pool()
+        async with pool.acquire() as db, db.cursor() as cur:
+            # Versión antes que franjas, igual que en la API sincrónica
+            await cur.execute("SELECT version FROM canchas_version WHERE fecha = %s", (fecha_str,))
+            fila = await cur.fetchone()
+            version = fila[0] if fila else 0
+            slots = self.cache.revalidate(fecha_str, version)
+            if slots is None:
+                await cur.execute(query, self._day_bounds(fecha_str))
+                slots = [r[0] for r in await cur.fetchall()]
+                self.cache.store(fecha_str, version, slots)
+            return slots
+
+    async def reservar(self, usuario_id: int, fecha_str: str, hora_str: str):
+        """Reserva la primera cancha libre en la franja indicada."""
+        if not await self._in_window(fecha_str):
+            return False, "Fecha fuera de rango"
+        fecha_hora = f"{fecha_str} {hora_str}"
+        fin_dt = datetime.strptime(fecha_hora, "%Y-%m-%d %H:%M:%S") + timedelta(hours=1)
+        pool = await self._get_pool()
+
+        async with pool.acquire() as db, db.cursor() as cur:
+            try:
+                for intento in range(self.MAX_RETRIES):
+                    await db.begin()
+                    try:
+                        cancha = await self._claim_court(cur, fecha_hora)
+                        if cancha is None:
+                            await db.rollback()
+                            self.cache.invalidate(fecha_str)
+                            self.engine.mark_full(fecha_str, hora_str)
+                            return False, "No hay canchas disponibles en ese horario"
+
+                        fila = (usuario_id, cancha, fecha_hora, fin_dt.strftime("%Y-%m-%d %H:%M:%S"))
+                        await cur.execute(
+                            "INSERT INTO reservas (usuario_id, cancha, fecha_inicio, fecha_fin) VALUES (%s, %s, %s, %s)",
+                            fila
+                        )
+                        # Resúmenes de ocupación en la misma transacción (ver analitica.py)
+                        for sql, filas in analitica.sentencias(MySQLStorage, [fila]):
+                            await cur.executemany(sql, filas)
+                        await cur.execute(
+                            "INSERT INTO canchas_version (fecha, version) VALUES (%s, 1) "
+                            "ON DUPLICATE KEY UPDATE version = version + 1",
+                            (fecha_str,)
+                        )
+
+                        await db.commit()
+                        self.cache.invalidate(fecha_str)
+                        self.engine.mark_taken(fecha_str, hora_str, cancha)
+                        self.intervals.add(fecha_str, cancha, hora_str, 60)
+                        self.reads.note_write(('fecha', fecha_str), ('usuario', usuario_id))
+                        self.user_cache.invalidate(usuario_id)
+                        events.publish('disponibilidad', {'fecha': fecha_str})
+                        return True, f"Reservada cancha {cancha} para {fecha_str} a las {hora_str}"
+
+                    except (_Contended, pymysql.err.OperationalError) as e:
+                        await db.rollback()
+                        if (isinstance(e, pymysql.err.OperationalError)
+                                and e.args[0] not in self.RETRYABLE_ERRORS):
+                            raise
+                        await asyncio.sleep(self.RETRY_BACKOFF * (2 ** intento) * random.random())
+
+                return False, "Horario muy solicitado, intentá de nuevo"
+
+            except Exception as e:
+                await db.rollback()
+                return False, str(e)
+
+    @staticmethod
+    async def _claim_court(cur, fecha_hora):
+        """Igual que ReservationManager._claim_court."""
+        await cur.execute(
+            "SELECT cancha_numero FROM slots "
+            "WHERE fecha_hora = %s AND disponible = 1 "
+            "ORDER BY cancha_numero LIMIT 1 "
+            "FOR UPDATE SKIP LOCKED",
+            (fecha_hora,)
+        )
+        fila = await cur.fetchone()
+        if not fila:
+            await cur.execute(
+                "SELECT 1 FROM slots WHERE fecha_hora = %s AND disponible = 1 LIMIT 1",
+                (fecha_hora,)
+            )
+            if await cur.fetchone():
+                raise _Contended()
+            return None
+        cancha = fila[0]
+
+        await cur.execute(
+            "UPDATE slots SET disponible = 0 "
+            "WHERE fecha_hora = %s AND cancha_numero = %s AND disponible = 1",
+            (fecha_hora, cancha)
+        )
+        if cur.rowcount != 1:
+            raise _Contended()
+        return cancha
+
+    async def get_reservations(self):
+        """Devuelve todas las reservas con día, hora, cancha y usuario."""
+        sql = (
+            "SELECT "
+              "DATE_FORMAT(r.fecha_inicio, '%Y-%m-%d') AS dia, "
+              "DATE_FORMAT(r.fecha_inicio, '%H:%i:%s') AS hora, "
+              "r.cancha, u.usuario "
+            "FROM reservas r "
+            "JOIN usuarios u ON r.usuario_id = u.id "
+            "ORDER BY r.fecha_inicio"
+        )
+        pool = await self._get_pool()
+        async with pool.acquire() as db, db.cursor() as cur:
+            await cur.execute(sql)
+            return await cur.fetchall()
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""Benchmark de login, consulta de franjas y reservas.
+
+Prepara una base con el tamaño pedido (usuarios, días de ventana, canchas,
+reservas históricas), ejecuta cada operación con N clientes concurrentes y
+reporta latencias p50/p95/p99 y operaciones por segundo. Los resultados se
+guardan en JSON para comparar entre versiones (--compare).
+
+Por defecto corre sobre SQLite en memoria. Con --engine mysql usa el
+servidor de db_config y exige --database con una base de prueba distinta
+de la de db_config: la preparación reemplaza canchas, ventana y franjas y
+carga usuarios y reservas de prueba.
+
+    python benchmark.py --concurrency 16 --users 2000 --reservations 50000
+    python benchmark.py --engine mysql --database padelclub_bench --label v2 \\
+        --compare bench_results/v1.json
+
+Con --server las operaciones van por HTTP a servidor.py (una conexión
+keep-alive por cliente) en lugar de a la base: --server local levanta el
+servidor en este mismo proceso, o --server http://host:8080 usa uno ya
+corriendo. Los listados de reservas son de admin y no se miden así.
+
+    python benchmark.py --concurrency 32 --server local --label http
+
+Con --kioscos N cada cliente es un proceso aparte con su propio pool y sus
+cachés, como N kioscos que hablan directo con la base (la forma de
+desplegar previa a servidor.py). Con SQLite hace falta un archivo
+compartido. Para comparar, la misma base y la misma cantidad de clientes:
+
+    python benchmark.py --sqlite-path bench.db --kioscos 8 --label kioscos
+    python benchmark.py --sqlite-path bench.db --concurrency 8 --server local --label http
+
+Con --replica (repetible) las lecturas van a esas instancias MySQL, p. ej.
+réplicas locales en otros puertos: --replica 127.0.0.1:3307 --replica 127.0.0.1:3308
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import backendPRUEBA
+from backendPRUEBA import UsuarioManager, ReservationManager
+from cliente import Conexion, ServidorError
+
+OPERACIONES = ('login', 'register', 'slots', 'reservar', 'reservas', 'reservas_page')
+OPERACIONES_HTTP = ('login', 'register', 'slots', 'reservar')
+PREFIJO_USUARIO = "bench_"
+
+
+# ---------------------- preparación de datos ----------------------
+def preparar(args):
+    """Crea usuarios, grilla de canchas y reservas históricas. Devuelve ids."""
+    storage = backendPRUEBA.get_storage()
+    pool = backendPRUEBA.get_pool()
+    clave = UsuarioManager.hash_password("bench")
+
+    with pool.connection() as db, db.cursor() as cur:
+        storage.begin(cur)
+        cur.execute("UPDATE config_reservas SET valor = %s WHERE clave = 'dias_ventana'",
+                    (args.days,))
+        cur.execute("DELETE FROM canchas", ())
+        cur.executemany("INSERT INTO canchas (numero) VALUES (%s)",
+                        [(c,) for c in range(1, args.courts + 1)])
+        cur.execute("DELETE FROM slots", ())
+        cur.execute("DELETE FROM canchas_version", ())
+
+        cur.execute(f"SELECT COUNT(*) FROM usuarios WHERE usuario LIKE '{PREFIJO_USUARIO}%%'", ())
+        existentes = cur.fetchone()[0]
+        cur.executemany(
+            "INSERT INTO usuarios (usuario, contraseña, tipo) VALUES (%s, %s, 'jugador')",
+            [(f"{PREFIJO_USUARIO}{i}", clave) for i in range(existentes, args.users)]
+        )
+        cur.execute(f"SELECT id FROM usuarios WHERE usuario LIKE '{PREFIJO_USUARIO}%%' "
+                    "ORDER BY id", ())
+        ids = [r[0] for r in cur.fetchall()][:args.users]
+
+        # Historial en el pasado: pesa en los listados sin tocar la ventana
+        cur.execute(f"SELECT COUNT(*) FROM reservas WHERE usuario_id IN "
+                    f"(SELECT id FROM usuarios WHERE usuario LIKE '{PREFIJO_USUARIO}%%')", ())
+        faltan = args.reservations - cur.fetchone()[0]
+        inicio = datetime.combine(date.today(), datetime.min.time())
+        lote = []
+        for n in range(max(0, faltan)):
+            fecha = inicio - timedelta(days=1 + n // (args.courts * 5), hours=n % 5 + 12)
+            lote.append((random.choice(ids), n % args.courts + 1,
+                         fecha.strftime("%Y-%m-%d %H:%M:%S"),
+                         (fecha + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")))
+            if len(lote) == 5000:
+                cur.executemany("INSERT INTO reservas (usuario_id, cancha, fecha_inicio, fecha_fin) "
+                                "VALUES (%s, %s, %s, %s)", lote)
+                lote = []
+        if lote:
+            cur.executemany("INSERT INTO reservas (usuario_id, cancha, fecha_inicio, fecha_fin) "
+                            "VALUES (%s, %s, %s, %s)", lote)
+        db.commit()
+
+    with pool.connection() as db:
+        storage.roll_window(db)
+    return ids
+
+
+# ---------------------- operaciones ----------------------
+def operacion_http(remoto, nombre, ids, fechas, horas, contador):
+    """Lo mismo que `hacer_operacion`, contra servidor.py por `remoto`."""
+    if nombre == 'login':
+        try:
+            remoto.pedir('POST', '/login', {'usuario': f"{PREFIJO_USUARIO}{random.randrange(len(ids))}",
+                                            'clave': "bench"})
+            return True
+        except ServidorError:
+            return False
+    if nombre == 'register':
+        usuario = f"{PREFIJO_USUARIO}nuevo_{time.time_ns()}_{next(contador)}"
+        return remoto.pedir('POST', '/usuarios',
+                            {'usuario': usuario, 'clave': "bench", 'rol': 'jugador'})['ok']
+    if nombre == 'slots':
+        remoto.pedir('GET', '/disponibilidad', params={'fecha': random.choice(fechas)})
+        return True
+    if nombre == 'reservar':
+        if remoto.token is None:
+            remoto.token = remoto.pedir('POST', '/login', {
+                'usuario': f"{PREFIJO_USUARIO}{random.randrange(len(ids))}", 'clave': "bench"})['token']
+        return remoto.pedir('POST', '/reservas', {'fecha': random.choice(fechas),
+                                                  'hora': random.choice(horas)})['ok']
+    raise ValueError(nombre)
+
+
+def hacer_operacion(nombre, ids, fechas, horas, contador):
+    """Una operación del benchmark; devuelve True si tuvo éxito."""
+    if nombre == 'login':
+        i = random.randrange(len(ids))
+        um = UsuarioManager()
+        try:
+            return um.iniciar_sesion(f"{PREFIJO_USUARIO}{i}", "bench")[0] is not None
+        finally:
+            um.desconectar()
+    if nombre == 'register':
+        um = UsuarioManager()
+        try:
+            usuario = f"{PREFIJO_USUARIO}nuevo_{os.getpid()}_{time.time_ns()}_{next(contador)}"
+            return um.crear_usuario(usuario, "bench", 'jugador')
+        finally:
+            um.desconectar()
+    rm = ReservationManager()
+    if nombre == 'slots':
+        rm.get_available_slots(random.choice(fechas))
+        return True
+    if nombre == 'reservar':
+        return rm.reservar(random.choice(ids), random.choice(fechas), random.choice(horas))[0]
+    if nombre == 'reservas':
+        rm.get_reservations()
+        return True
+    if nombre == 'reservas_page':
+        rm.get_reservations_page(limit=200)
+        return True
+    raise ValueError(nombre)
+
+
+def percentil(orden, p):
+    if not orden:
+        return 0.0
+    return orden[min(len(orden) - 1, int(round(p / 100 * (len(orden) - 1))))]
+
+
+def resumir(latencias, duracion, fallos, errores):
+    orden = sorted(latencias)
+    return {
+        'ops':        len(orden),
+        'duration_s': duracion,
+        'ops_per_s':  len(orden) / duracion if duracion else 0.0,
+        'p50_ms':     percentil(orden, 50) * 1000,
+        'p95_ms':     percentil(orden, 95) * 1000,
+        'p99_ms':     percentil(orden, 99) * 1000,
+        'mean_ms':    sum(orden) / len(orden) * 1000 if orden else 0.0,
+        'max_ms':     orden[-1] * 1000 if orden else 0.0,
+        'failed':     fallos,
+        'errors':     errores,
+    }
+
+
+def medir(nombre, args, ids, fechas, horas):
+    contador = itertools.count()
+    lock = threading.Lock()
+    latencias, fallos, errores = [], [0], [0]
+    inicio = threading.Barrier(args.concurrency + 1)
+
+    def cliente():
+        propias, mal, err = [], 0, 0
+        remoto = Conexion(args.server) if args.server else None
+        inicio.wait()
+        for _ in range(args.ops):
+            t0 = time.perf_counter()
+            try:
+                if remoto is not None:
+                    ok = operacion_http(remoto, nombre, ids, fechas, horas, contador)
+                else:
+                    ok = hacer_operacion(nombre, ids, fechas, horas, contador)
+                if not ok:
+                    mal += 1
+            except Exception:
+                err += 1
+            propias.append(time.perf_counter() - t0)
+        with lock:
+            latencias.extend(propias)
+            fallos[0] += mal
+            errores[0] += err
+
+    hilos = [threading.Thread(target=cliente) for _ in range(args.concurrency)]
+    for h in hilos:
+        h.start()
+    inicio.wait()
+    t0 = time.perf_counter()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - t0
+    return resumir(latencias, duracion, fallos[0], errores[0])
+
+
+def kiosco(nombre, args, ids, fechas, horas, arranque, inicio, salida):
+    """Un kiosco con acceso directo a la base, en su propio proceso."""
+    try:
+        # Como el kiosco al arrancar, fuera de la medición. De a uno: con
+        # SQLite, varios preparando el esquema a la vez chocan en el lock.
+        with arranque:
+            configurar(args)
+            backendPRUEBA.calentar()
+    except Exception:
+        inicio.abort()
+        raise
+    contador = itertools.count()
+    propias, mal, err = [], 0, 0
+    inicio.wait()
+    for _ in range(args.ops):
+        t0 = time.perf_counter()
+        try:
+            if not hacer_operacion(nombre, ids, fechas, horas, contador):
+                mal += 1
+        except Exception:
+            err += 1
+        propias.append(time.perf_counter() - t0)
+    backendPRUEBA.get_pool().close()
+    salida.put((propias, mal, err))
+
+
+def medir_kioscos(nombre, args, ids, fechas, horas):
+    """Como `medir`, con cada cliente en un proceso aparte (--kioscos)."""
+    ctx = multiprocessing.get_context('spawn')
+    arranque = ctx.Lock()
+    inicio = ctx.Barrier(args.kioscos + 1)
+    salida = ctx.Queue()
+    procesos = [ctx.Process(target=kiosco,
+                            args=(nombre, args, ids, fechas, horas, arranque, inicio, salida))
+                for _ in range(args.kioscos)]
+    for p in procesos:
+        p.start()
+    try:
+        inicio.wait()
+    except threading.BrokenBarrierError:
+        for p in procesos:
+            p.terminate()
+        raise SystemExit(f"{nombre}: un kiosco no pudo arrancar (ver el error arriba)")
+    t0 = time.perf_counter()
+    latencias, fallos, errores = [], 0, 0
+    for _ in procesos:
+        propias, mal, err = salida.get()
+        latencias.extend(propias)
+        fallos += mal
+        errores += err
+    duracion = time.perf_counter() - t0
+    for p in procesos:
+        p.join()
+    return resumir(latencias, duracion, fallos, errores)
+
+
+# ---------------------- reporte ----------------------
+def imprimir(resultados, anterior=None):
+    print(f"{'operación':<14}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'fallos':>8}{'errores':>9}")
+    for nombre, r in resultados.items():
+        linea = (f"{nombre:<14}{r['ops_per_s']:>10.1f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+                 f"{r['p99_ms']:>10.2f}{r['failed']:>8}{r['errors']:>9}")
+        previo = (anterior or {}).get(nombre)
+        if previo and previo['ops_per_s'] and previo['p95_ms']:
+            d_ops = (r['ops_per_s'] / previo['ops_per_s'] - 1) * 100
+            d_p95 = (r['p95_ms'] / previo['p95_ms'] - 1) * 100
+            linea += f"   ops/s {d_ops:+.0f}%  p95 {d_p95:+.0f}%"
+        print(linea)
+
+
+def configurar(args):
+    """Motor, réplicas, pool y caché según la línea de comandos."""
+    if args.engine == 'mysql':
+        backendPRUEBA.db_config['database'] = args.database
+        for r in args.replica:
+            host, _, puerto = r.partition(':')
+            backendPRUEBA.replica_config['replicas'].append(
+                {'host': host, 'port': int(puerto or 3306), 'connect_timeout': 2})
+        backendPRUEBA.configure_storage('mysql')
+    else:
+        backendPRUEBA.configure_storage('sqlite', sqlite_path=args.sqlite_path)
+    backendPRUEBA.pool_config['max_size'] = max(backendPRUEBA.pool_config['max_size'],
+                                                args.concurrency)
+    if args.cache_ttl is not None:
+        backendPRUEBA.availability_cache.ttl = args.cache_ttl
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--engine', choices=('sqlite', 'mysql'), default='sqlite')
+    ap.add_argument('--sqlite-path', default=':memory:')
+    ap.add_argument('--database',
+                    help="base MySQL de prueba (obligatoria con mysql; no puede ser la de db_config)")
+    ap.add_argument('--concurrency', type=int, default=8)
+    ap.add_argument('--ops', type=int, default=200, help="operaciones por cliente")
+    ap.add_argument('--users', type=int, default=500)
+    ap.add_argument('--days', type=int, default=4)
+    ap.add_argument('--courts', type=int, default=4)
+    ap.add_argument('--reservations', type=int, default=10000,
+                    help="reservas históricas precargadas")
+    ap.add_argument('--only', nargs='+', choices=OPERACIONES, default=list(OPERACIONES))
+    ap.add_argument('--cache-ttl', type=float, default=None,
+                    help="TTL del caché de franjas (0 lo desactiva)")
+    ap.add_argument('--profile', action='store_true',
+                    help="perfilar consultas y guardar las métricas en el JSON")
+    ap.add_argument('--server', default=None, metavar='URL',
+                    help="medir por HTTP contra servidor.py ('local' lo levanta acá)")
+    ap.add_argument('--kioscos', type=int, default=None, metavar='N',
+                    help="N procesos con acceso directo a la base en lugar de hilos")
+    ap.add_argument('--replica', action='append', default=[], metavar='HOST:PUERTO',
+                    help="réplica de lectura (solo mysql; se puede repetir)")
+    ap.add_argument('--label', default='local')
+    ap.add_argument('--output', default=None, help="JSON de salida")
+    ap.add_argument('--compare', default=None, help="JSON previo para comparar")
+    args = ap.parse_args()
+    if args.engine == 'mysql':
+        if not args.database:
+            ap.error("con --engine mysql hace falta --database con una base de prueba")
+        if args.database == backendPRUEBA.db_config['database']:
+            ap.error(f"--database {args.database} es la base de db_config; "
+                     "el benchmark borra canchas y franjas, usá una base de prueba")
+    if args.kioscos and args.server:
+        ap.error("--kioscos mide acceso directo a la base; no se combina con --server")
+    if args.kioscos and args.engine == 'sqlite' and args.sqlite_path == ':memory:':
+        ap.error("--kioscos con SQLite necesita un archivo compartido (--sqlite-path)")
+
+    configurar(args)
+
+    t0 = time.perf_counter()
+    ids = preparar(args)
+    if args.profile:
+        # Solo las operaciones medidas, no la carga de datos
+        backendPRUEBA.query_profiler.reset()
+        backendPRUEBA.query_profiler.enable()
+    print(f"Datos listos en {time.perf_counter() - t0:.1f}s "
+          f"({len(ids)} usuarios, {args.reservations} reservas, "
+          f"{args.days} días x {args.courts} canchas)")
+
+    rm = ReservationManager()
+    fechas = [(date.today() + timedelta(days=i)).strftime(rm.DATE_FORMAT)
+              for i in range(1, rm.get_window_days() + 1)]
+    with backendPRUEBA.get_pool().connection() as db, db.cursor() as cur:
+        cur.execute(f"SELECT {rm.storage.fmt_time('fecha_hora')} FROM slots "
+                    "GROUP BY fecha_hora ORDER BY fecha_hora", ())
+        horas = sorted({r[0] for r in cur.fetchall()})
+
+    servidor = None
+    if args.server == 'local':
+        import servidor as modulo_servidor
+        servidor = modulo_servidor.crear_servidor('127.0.0.1', 0)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        args.server = f"http://127.0.0.1:{servidor.server_address[1]}"
+    if args.server:
+        omitidas = [n for n in args.only if n not in OPERACIONES_HTTP]
+        if omitidas:
+            print(f"Por HTTP no se miden: {', '.join(omitidas)}")
+        args.only = [n for n in args.only if n in OPERACIONES_HTTP]
+
+    resultados = {}
+    for nombre in args.only:
+        if args.kioscos:
+            resultados[nombre] = medir_kioscos(nombre, args, ids, fechas, horas)
+        else:
+            resultados[nombre] = medir(nombre, args, ids, fechas, horas)
+
+    anterior = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            anterior = json.load(f)['results']
+    imprimir(resultados, anterior)
+    if servidor is not None:
+        servidor.shutdown()
+        servidor.servicio.cerrar()
+
+    salida = args.output or os.path.join(
+        'bench_results', f"{args.label}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(salida) or '.', exist_ok=True)
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump({
+            'meta': {
+                'label':     args.label,
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'engine':    args.engine,
+                'python':    platform.python_version(),
+                'machine':   platform.machine(),
+                'params':    {k: v for k, v in vars(args).items()
+                              if k not in ('output', 'compare')},
+            },
+            'results': resultados,
+            'pool':    backendPRUEBA.pool_metrics(),
+            'cache':   backendPRUEBA.availability_cache.metrics(),
+            'queries': backendPRUEBA.query_metrics() if args.profile else None,
+            'replicas': backendPRUEBA.replica_metrics() if args.replica else None,
+        }, f, indent=2)
+    print(f"Resultados en {salida}")
+
+
+if __name__ == '__main__':
+    main()
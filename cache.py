@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class AvailabilityCache:
+    """Caché en memoria de franjas libres por día.
+
+    Cada entrada guarda las franjas, la versión del día (tabla
+    `canchas_version`) con la que se leyeron y cuándo se validó por última
+    vez. Dentro de `ttl` segundos se responde sin ir a la base; pasado ese
+    tiempo alcanza con comparar la versión (una lectura por clave primaria)
+    para saber si otro proceso reservó ese día.
+    """
+
+    def __init__(self, ttl=5.0):
+        self.ttl      = ttl
+        self._lock    = threading.Lock()
+        self._entries = {}      # fecha -> [franjas, versión, validada_en]
+
+        # Métricas
+        self.hits        = 0
+        self.revalidated = 0
+        self.misses      = 0
+
+    def lookup(self, fecha):
+        """Franjas cacheadas si siguen dentro del TTL, si no None."""
+        with self._lock:
+            entrada = self._entries.get(fecha)
+            if entrada and time.monotonic() - entrada[2] < self.ttl:
+                self.hits += 1
+                return list(entrada[0])
+        return None
+
+    def revalidate(self, fecha, version):
+        """Renueva el TTL si la versión no cambió; devuelve las franjas o None."""
+        with self._lock:
+            entrada = self._entries.get(fecha)
+            if entrada and entrada[1] == version:
+                entrada[2] = time.monotonic()
+                self.revalidated += 1
+                return list(entrada[0])
+            self.misses += 1
+        return None
+
+    def store(self, fecha, version, franjas):
+        with self._lock:
+            self._entries[fecha] = [tuple(franjas), version, time.monotonic()]
+
+    def invalidate(self, fecha=None):
+        """Descarta un día (o todo el caché si `fecha` es None)."""
+        with self._lock:
+            if fecha is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(fecha, None)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'hits':        self.hits,
+                'revalidated': self.revalidated,
+                'misses':      self.misses,
+                'entries':     len(self._entries),
+            }
+
+
+class UserReservationsCache:
+    """Caché LRU de las páginas de "Mis reservas", agrupadas por jugador.
+
+    Guarda hasta `max_users` jugadores; al pasarse se descarta el que hace
+    más tiempo que no consulta. Cada jugador tiene sus páginas (próximas o
+    pasadas, desde qué clave, cuántas) y `invalidate(usuario_id)` las tira
+    todas juntas cuando reserva o cancela. El `ttl` cubre lo que este
+    proceso no ve: reservas hechas por otro proceso y el paso del tiempo,
+    que mueve turnos de próximas a pasadas.
+
+    Para no guardar una página leída antes de una invalidación que llegó
+    mientras tanto, el llamador pide `ticket()` antes de consultar la base y
+    se lo pasa a `store`, que descarta la página si hubo invalidaciones.
+    """
+
+    def __init__(self, max_users=256, ttl=30.0):
+        self.max_users = max_users
+        self.ttl       = ttl
+        self._lock     = threading.Lock()
+        self._users    = OrderedDict()  # usuario_id -> {clave: (página, guardada_en)}
+        self._epoch    = 0              # se incrementa con cada invalidación
+
+        # Métricas
+        self.hits        = 0
+        self.misses      = 0
+        self.invalidated = 0
+        self.evicted     = 0
+
+    def lookup(self, usuario_id, clave):
+        with self._lock:
+            paginas = self._users.get(usuario_id)
+            entrada = paginas.get(clave) if paginas else None
+            if entrada and time.monotonic() - entrada[1] < self.ttl:
+                self._users.move_to_end(usuario_id)
+                self.hits += 1
+                return entrada[0]
+            self.misses += 1
+        return None
+
+    def ticket(self):
+        return self._epoch
+
+    def store(self, usuario_id, clave, pagina, ticket=None):
+        with self._lock:
+            if ticket is not None and ticket != self._epoch:
+                return
+            self._users.setdefault(usuario_id, {})[clave] = (pagina, time.monotonic())
+            self._users.move_to_end(usuario_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self.evicted += 1
+
+    def invalidate(self, *usuarios):
+        """Descarta las páginas de esos jugadores (de todos si no se pasa ninguno)."""
+        with self._lock:
+            self._epoch += 1
+            if not usuarios:
+                self._users.clear()
+            for usuario_id in usuarios:
+                if self._users.pop(usuario_id, None) is not None:
+                    self.invalidated += 1
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'hits':        self.hits,
+                'misses':      self.misses,
+                'invalidated': self.invalidated,
+                'evicted':     self.evicted,
+                'users':       len(self._users),
+            }
@@ -1,5 +1,5 @@
 -- ------------------------------------------------------------------
--- script.sql: Creación de tablas de canchas y evento de actualización
+-- canchas.sql: Tabla única de franjas y evento de avance de la ventana
 -- ------------------------------------------------------------------
 
 -- 1) Activar el scheduler de eventos
@@ -7,109 +7,119 @@ SET GLOBAL event_scheduler = ON;
 
 USE padelclub;
 
--- 2) Eliminar tablas y evento previos
+-- 2) Eliminar evento, procedimiento y tablas por día previos
 DROP EVENT IF EXISTS actualizar_canchas;
+DROP PROCEDURE IF EXISTS rodar_ventana;
 DROP TABLE IF EXISTS canchas_dia_1;
 DROP TABLE IF EXISTS canchas_dia_2;
 DROP TABLE IF EXISTS canchas_dia_3;
 DROP TABLE IF EXISTS canchas_dia_4;
 
--- 3) Crear tablas para días 1–4, con DEFAULT 0 en personas_jugando
-CREATE TABLE canchas_dia_1 (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    cancha_numero TINYINT NOT NULL,
+-- 3) Configuración de la grilla: ventana de días, canchas y horarios.
+--    Los cambios en canchas/horarios rigen para los días que se agreguen;
+--    agrandar dias_ventana abre días nuevos en la próxima ejecución.
+CREATE TABLE IF NOT EXISTS config_reservas (
+    clave VARCHAR(50) PRIMARY KEY,
+    valor INT NOT NULL
+);
+INSERT IGNORE INTO config_reservas (clave, valor) VALUES ('dias_ventana', 4);
+
+CREATE TABLE IF NOT EXISTS canchas (
+    numero TINYINT PRIMARY KEY
+);
+INSERT IGNORE INTO canchas (numero) VALUES (1), (2), (3), (4);
+
+CREATE TABLE IF NOT EXISTS franjas_horarias (
+    hora TIME PRIMARY KEY
+);
+INSERT IGNORE INTO franjas_horarias (hora) VALUES
+    ('12:00:00'), ('16:00:00'), ('17:00:00'), ('18:00:00'), ('19:00:00');
+
+-- 4) Una fila por (franja, cancha). La clave primaria agrupa por fecha, así
+--    que buscar un día, bloquear una franja o borrar días vencidos son
+--    recorridos de rango sobre el índice.
+CREATE TABLE IF NOT EXISTS slots (
     fecha_hora DATETIME NOT NULL,
+    cancha_numero TINYINT NOT NULL,
     disponible BOOLEAN NOT NULL DEFAULT TRUE,
     personas_jugando TINYINT NOT NULL DEFAULT 0
-        CHECK (personas_jugando IN (0,1,2,4))
+        CHECK (personas_jugando IN (0,1,2,4)),
+    PRIMARY KEY (fecha_hora, cancha_numero)
+);
+
+-- 4b) Bloqueos de mantenimiento: intervalos en los que la cancha no se
+--     alquila. Pueden cargarse antes de que el día entre en la ventana.
+CREATE TABLE IF NOT EXISTS bloqueos_cancha (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    cancha TINYINT NOT NULL,
+    fecha_inicio DATETIME NOT NULL,
+    fecha_fin DATETIME NOT NULL,
+    motivo VARCHAR(100),
+    INDEX idx_bloqueos_cancha (cancha, fecha_inicio)
 );
-CREATE TABLE canchas_dia_2 LIKE canchas_dia_1;
-CREATE TABLE canchas_dia_3 LIKE canchas_dia_1;
-CREATE TABLE canchas_dia_4 LIKE canchas_dia_1;
-
--- 4) Población inicial de las 5 franjas horarias para cada cancha
-
--- Día 1
-TRUNCATE TABLE canchas_dia_1;
-INSERT INTO canchas_dia_1 (cancha_numero, fecha_hora)
-SELECT c.c,
-       CONCAT(DATE_ADD(CURDATE(), INTERVAL 1 DAY), ' ', h.h)
-FROM (SELECT 1 AS c UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4) AS c,
-     (SELECT '12:00:00' AS h UNION ALL SELECT '16:00:00'
-      UNION ALL SELECT '17:00:00' UNION ALL SELECT '18:00:00'
-      UNION ALL SELECT '19:00:00') AS h;
-
--- Día 2
-TRUNCATE TABLE canchas_dia_2;
-INSERT INTO canchas_dia_2 (cancha_numero, fecha_hora)
-SELECT c.c,
-       CONCAT(DATE_ADD(CURDATE(), INTERVAL 2 DAY), ' ', h.h)
-FROM (SELECT 1 AS c UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4) AS c,
-     (SELECT '12:00:00' AS h UNION ALL SELECT '16:00:00'
-      UNION ALL SELECT '17:00:00' UNION ALL SELECT '18:00:00'
-      UNION ALL SELECT '19:00:00') AS h;
-
--- Día 3
-TRUNCATE TABLE canchas_dia_3;
-INSERT INTO canchas_dia_3 (cancha_numero, fecha_hora)
-SELECT c.c,
-       CONCAT(DATE_ADD(CURDATE(), INTERVAL 3 DAY), ' ', h.h)
-FROM (SELECT 1 AS c UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4) AS c,
-     (SELECT '12:00:00' AS h UNION ALL SELECT '16:00:00'
-      UNION ALL SELECT '17:00:00' UNION ALL SELECT '18:00:00'
-      UNION ALL SELECT '19:00:00') AS h;
-
--- Día 4
-TRUNCATE TABLE canchas_dia_4;
-INSERT INTO canchas_dia_4 (cancha_numero, fecha_hora)
-SELECT c.c,
-       CONCAT(DATE_ADD(CURDATE(), INTERVAL 4 DAY), ' ', h.h)
-FROM (SELECT 1 AS c UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4) AS c,
-     (SELECT '12:00:00' AS h UNION ALL SELECT '16:00:00'
-      UNION ALL SELECT '17:00:00' UNION ALL SELECT '18:00:00'
-      UNION ALL SELECT '19:00:00') AS h;
-
--- 5) Crear evento que repuebla las tablas a diario a las 00:00
+
+-- 5) Versión por día: se incrementa con cada reserva y al abrir días nuevos,
+--    para que los cachés de disponibilidad detecten cambios sin escanear
+CREATE TABLE IF NOT EXISTS canchas_version (
+    fecha DATE PRIMARY KEY,
+    version INT UNSIGNED NOT NULL DEFAULT 0
+);
+
+-- 6) Avance incremental: borra los días vencidos y agrega solo los que
+--    faltan después del último cargado (normalmente uno por noche)
 DELIMITER $$
+CREATE PROCEDURE rodar_ventana()
+BEGIN
+    DECLARE dias INT DEFAULT 4;
+    DECLARE ultimo DATE;
+
+    SELECT valor INTO dias FROM config_reservas WHERE clave = 'dias_ventana';
+
+    DELETE FROM slots WHERE fecha_hora < CURDATE() + INTERVAL 1 DAY;
+    DELETE FROM canchas_version WHERE fecha <= CURDATE();
+
+    SELECT COALESCE(DATE(MAX(fecha_hora)), CURDATE()) INTO ultimo FROM slots;
+
+    IF ultimo < CURDATE() + INTERVAL dias DAY THEN
+        INSERT INTO slots (fecha_hora, cancha_numero)
+        WITH RECURSIVE nuevos (fecha) AS (
+            SELECT ultimo + INTERVAL 1 DAY
+            UNION ALL
+            SELECT fecha + INTERVAL 1 DAY FROM nuevos
+            WHERE fecha < CURDATE() + INTERVAL dias DAY
+        )
+        SELECT TIMESTAMP(n.fecha, f.hora), c.numero
+        FROM nuevos n CROSS JOIN franjas_horarias f CROSS JOIN canchas c;
+
+        INSERT INTO canchas_version (fecha, version)
+        SELECT DISTINCT DATE(fecha_hora), 1 FROM slots
+        WHERE fecha_hora >= ultimo + INTERVAL 1 DAY
+        ON DUPLICATE KEY UPDATE version = version + 1;
+
+        -- Los días nuevos nacen con sus bloqueos de mantenimiento ocupados
+        UPDATE slots s
+        JOIN bloqueos_cancha b ON b.cancha = s.cancha_numero
+            AND b.fecha_inicio < s.fecha_hora + INTERVAL 1 HOUR
+            AND b.fecha_fin > s.fecha_hora
+        SET s.disponible = 0
+        WHERE s.fecha_hora >= ultimo + INTERVAL 1 DAY;
+    END IF;
+END$$
+DELIMITER ;
+
+-- 7) Población inicial y marcado de las reservas ya existentes
+CALL rodar_ventana();
+
+-- (un turno de 90 o 120 minutos ocupa todas las franjas que toca)
+UPDATE slots s
+JOIN reservas r ON r.cancha = s.cancha_numero
+    AND r.fecha_inicio < s.fecha_hora + INTERVAL 1 HOUR
+    AND r.fecha_fin > s.fecha_hora
+SET s.disponible = 0;
+
+-- 8) Evento que avanza la ventana a diario a las 00:00
 CREATE EVENT actualizar_canchas
   ON SCHEDULE EVERY 1 DAY
   STARTS CONCAT(DATE_ADD(CURDATE(), INTERVAL 1 DAY), ' 00:00:00')
 DO
-BEGIN
-    -- Día 1
-    TRUNCATE TABLE canchas_dia_1;
-    INSERT INTO canchas_dia_1 (cancha_numero, fecha_hora)
-    SELECT c.c, CONCAT(DATE_ADD(CURDATE(), INTERVAL 1 DAY), ' ', h.h)
-    FROM (SELECT 1 AS c UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4) AS c,
-         (SELECT '12:00:00' AS h UNION ALL SELECT '16:00:00'
-          UNION ALL SELECT '17:00:00' UNION ALL SELECT '18:00:00'
-          UNION ALL SELECT '19:00:00') AS h;
-
-    -- Día 2
-    TRUNCATE TABLE canchas_dia_2;
-    INSERT INTO canchas_dia_2 (cancha_numero, fecha_hora)
-    SELECT c.c, CONCAT(DATE_ADD(CURDATE(), INTERVAL 2 DAY), ' ', h.h)
-    FROM (SELECT 1 AS c UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4) AS c,
-         (SELECT '12:00:00' AS h UNION ALL SELECT '16:00:00'
-          UNION ALL SELECT '17:00:00' UNION ALL SELECT '18:00:00'
-          UNION ALL SELECT '19:00:00') AS h;
-
-    -- Día 3
-    TRUNCATE TABLE canchas_dia_3;
-    INSERT INTO canchas_dia_3 (cancha_numero, fecha_hora)
-    SELECT c.c, CONCAT(DATE_ADD(CURDATE(), INTERVAL 3 DAY), ' ', h.h)
-    FROM (SELECT 1 AS c UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4) AS c,
-         (SELECT '12:00:00' AS h UNION ALL SELECT '16:00:00'
-          UNION ALL SELECT '17:00:00' UNION ALL SELECT '18:00:00'
-          UNION ALL SELECT '19:00:00') AS h;
-
-    -- Día 4
-    TRUNCATE TABLE canchas_dia_4;
-    INSERT INTO canchas_dia_4 (cancha_numero, fecha_hora)
-    SELECT c.c, CONCAT(DATE_ADD(CURDATE(), INTERVAL 4 DAY), ' ', h.h)
-    FROM (SELECT 1 AS c UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4) AS c,
-         (SELECT '12:00:00' AS h UNION ALL SELECT '16:00:00'
-          UNION ALL SELECT '17:00:00' UNION ALL SELECT '18:00:00'
-          UNION ALL SELECT '19:00:00') AS h;
-END$$
-DELIMITER ;
+  CALL rodar_ventana();
@@ -0,0 +1,241 @@
+"""Cliente liviano de servidor.py con la interfaz que usa frontend.py.
+
+Con `PADEL_SERVIDOR=http://host:8080` el frontend importa de acá en lugar
+de backendPRUEBA: mismas clases y métodos, pero cada llamada es un pedido
+HTTP por una conexión keep-alive (una por hilo) y el kiosco no necesita
+credenciales de la base.
+
+La sesión es una por proceso (un kiosco, un jugador a la vez): el token que
+devuelve `abrir_sesion` se manda en cada pedido. Mientras hay sesión, un
+hilo hace long-poll de /eventos y republica los avisos en `events`, así la
+grilla y la lista de espera se comportan igual que con la base directa.
+"""
+import http.client
+import json
+import logging
+import os
+import socket
+import threading
+from urllib.parse import urlencode, urlsplit
+
+from eventos import EventBus
+
+log = logging.getLogger('padelclub.cliente')
+
+events = EventBus()
+
+
+class ServidorError(Exception):
+    """El servidor respondió con error (o no respondió)."""
+
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+class Conexion:
+    """Conexiones HTTP/1.1 persistentes al servidor, una por hilo."""
+    TIMEOUT = 10.0
+
+    def __init__(self, url):
+        partes = urlsplit(url)
+        self.host  = partes.hostname
+        self.port  = partes.port or (443 if partes.scheme == 'https' else 80)
+        self._clase = (http.client.HTTPSConnection if partes.scheme == 'https'
+                       else http.client.HTTPConnection)
+        self._local = threading.local()
+        self.token = None
+
+    def _abrir(self, timeout):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or conn.timeout != timeout:
+            if conn is not None:
+                conn.close()
+            conn = self._local.conn = self._clase(self.host, self.port, timeout=timeout)
+        return conn
+
+    def pedir(self, metodo, ruta, cuerpo=None, params=None, timeout=None):
+        """Hace el pedido y devuelve el JSON de la respuesta. Si la conexión
+        guardada se cortó (el servidor la cerró por inactividad) se reintenta
+        una vez con una nueva."""
+        if params:
+            ruta += '?' + urlencode({k: v for k, v in params.items() if v is not None})
+        datos = None if cuerpo is None else json.dumps(cuerpo).encode('utf-8')
+        cabeceras = {'Content-Type': 'application/json'}
+        if self.token:
+            cabeceras['Authorization'] = f"Bearer {self.token}"
+        for intento in range(2):
+            conn = self._abrir(timeout or self.TIMEOUT)
+            try:
+                conn.request(metodo, ruta, body=datos, headers=cabeceras)
+                resp = conn.getresponse()
+                respuesta = json.loads(resp.read() or b'{}')
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                self._local.conn = None
+                if intento:
+                    raise
+        if resp.status >= 400:
+            raise ServidorError(resp.status, respuesta.get('error', resp.reason))
+        return respuesta
+
+    def lote(self, pedidos):
+        """Varios pedidos en un solo viaje: [(metodo, ruta, cuerpo)] ->
+        [(estado, respuesta)]."""
+        respuesta = self.pedir('POST', '/batch', {'pedidos': [
+            {'metodo': m, 'ruta': r, 'cuerpo': c} for m, r, c in pedidos]})
+        return [(r['estado'], r['cuerpo']) for r in respuesta['respuestas']]
+
+
+_servidor = None
+_escucha = None
+
+
+def configurar(url):
+    global _servidor
+    _servidor = Conexion(url)
+    return _servidor
+
+
+def servidor():
+    if _servidor is None:
+        configurar(os.environ.get('PADEL_SERVIDOR', 'http://127.0.0.1:8080'))
+    return _servidor
+
+
+def calentar():
+    """Resuelve el nombre del servidor antes del primer pedido. Las
+    conexiones son por hilo, así que abrir una acá no le serviría a nadie."""
+    conexion = servidor()
+    socket.getaddrinfo(conexion.host, conexion.port, type=socket.SOCK_STREAM)
+
+
+class _Escucha(threading.Thread):
+    """Long-poll de /eventos que republica en `events` hasta `detener()`."""
+
+    def __init__(self, conexion):
+        super().__init__(name='eventos', daemon=True)
+        self.conexion = conexion
+        self._fin = threading.Event()
+
+    def run(self):
+        desde = None
+        while not self._fin.is_set():
+            try:
+                r = self.conexion.pedir('GET', '/eventos', params={'desde': desde, 'espera': 25},
+                                        timeout=35)
+            except Exception as e:
+                log.warning("Sin avisos del servidor: %s", e)
+                self._fin.wait(5)
+                continue
+            if self._fin.is_set():
+                break
+            for aviso in r['eventos']:
+                events.publish(aviso['canal'], aviso['evento'])
+            desde = r['ultimo']
+
+    def detener(self):
+        self._fin.set()
+
+
+class UsuarioManager:
+    def abrir_sesion(self, nombre_usuario, clave):
+        global _escucha
+        try:
+            r = servidor().pedir('POST', '/login', {'usuario': nombre_usuario, 'clave': clave})
+        except ServidorError as e:
+            if e.estado == 401:
+                return None, None, None
+            raise
+        servidor().token = r['token']
+        if _escucha is None:
+            _escucha = _Escucha(servidor())
+            _escucha.start()
+        return r['rol'], r['usuario_id'], r['token']
+
+    def crear_usuario(self, nombre_usuario, clave, rol, clave_admin=None):
+        """Alta de usuario; para `rol='admin'` el servidor exige la clave maestra."""
+        return servidor().pedir('POST', '/usuarios',
+                                {'usuario': nombre_usuario, 'clave': clave, 'rol': rol,
+                                 'clave_admin': clave_admin})['ok']
+
+    def desconectar(self):
+        """Nada que devolver: la conexión es del hilo y se reusa."""
+
+
+def cerrar_sesion(token):
+    global _escucha
+    conexion = servidor()
+    try:
+        return conexion.pedir('POST', '/logout')['ok']
+    finally:
+        if conexion.token == token:
+            conexion.token = None
+        if _escucha is not None:
+            _escucha.detener()
+            _escucha = None
+
+
+class ReservationManager:
+    DURACIONES = (60, 90, 120)
+
+    def get_availability_grid(self):
+        r = servidor().pedir('GET', '/grilla')
+        return r['fechas'], r['horas'], r['libres']
+
+    def get_available_slots(self, fecha_str):
+        return servidor().pedir('GET', '/disponibilidad', params={'fecha': fecha_str})['horas']
+
+    def reservar_sesion(self, token, fecha_str, hora_str, minutos=60):
+        r = servidor().pedir('POST', '/reservas',
+                             {'fecha': fecha_str, 'hora': hora_str, 'minutos': minutos})
+        return r['ok'], r['mensaje']
+
+    def mis_reservas_sesion(self, token, cuando='proximas', after=None, limit=20):
+        params = {'cuando': cuando, 'limit': limit}
+        if after is not None:
+            params['after_fecha'], params['after_id'] = after
+        try:
+            r = servidor().pedir('GET', '/mis-reservas', params=params)
+        except ServidorError as e:
+            if e.estado == 401:
+                raise PermissionError(str(e)) from e
+            raise
+        siguiente = tuple(r['siguiente']) if r['siguiente'] else None
+        return [tuple(f) for f in r['filas']], siguiente
+
+    def cancelar_reserva_sesion(self, token, reserva_id):
+        r = servidor().pedir('POST', f"/reservas/{int(reserva_id)}/cancelar")
+        return r['ok'], r['mensaje']
+
+    def anotar_espera_sesion(self, token, fecha_str, hora_str):
+        r = servidor().pedir('POST', '/espera', {'fecha': fecha_str, 'hora': hora_str})
+        return r['ok'], r['mensaje']
+
+    def get_reservations_page(self, after=None, limit=200, desde=None, hasta=None, cancha=None):
+        params = {'limit': limit, 'desde': desde, 'hasta': hasta, 'cancha': cancha}
+        if after is not None:
+            params['after_fecha'], params['after_id'] = after
+        r = servidor().pedir('GET', '/reservas', params=params)
+        siguiente = tuple(r['siguiente']) if r['siguiente'] else None
+        return [tuple(f) for f in r['filas']], siguiente
+
+
+class TorneoManager:
+    def listar_torneos(self, desde=None):
+        return [tuple(f) for f in
+                servidor().pedir('GET', '/torneos', params={'desde': desde})['torneos']]
+
+    def inscribir_sesion(self, token, torneo_id, pareja=None):
+        r = servidor().pedir('POST', f"/torneos/{int(torneo_id)}/inscripcion", {'pareja': pareja})
+        return r['ok'], r['mensaje']
+
+    def partidos(self, torneo_id):
+        return [tuple(f) for f in
+                servidor().pedir('GET', f"/torneos/{int(torneo_id)}/partidos")['partidos']]
+
+
+class OcupacionManager:
+    def resumen(self, desde=None, hasta=None, n=10):
+        return servidor().pedir('GET', '/ocupacion', params={'desde': desde, 'hasta': hasta, 'n': n})
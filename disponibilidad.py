@@ -0,0 +1,100 @@
+import threading
+
+
+class AvailabilityBitmap:
+    """Disponibilidad de la ventana en memoria, una máscara de bits por franja.
+
+    Para cada día y hora se guarda un entero donde el bit `n` encendido
+    significa "la cancha n está libre". Así la primera cancha libre es el
+    bit más bajo (O(1)), las horas con lugar de un día salen de recorrer sus
+    máscaras (O(horas)) y marcar una reserva es apagar un bit.
+
+    Cada día recuerda la versión de `canchas_version` con la que se cargó,
+    para que el dueño sepa cuáles recargar cuando otro proceso reserva.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._days = {}         # 'AAAA-MM-DD' -> {'HH:MM:SS': máscara}, horas en orden
+        self._versions = {}     # 'AAAA-MM-DD' -> versión cargada
+
+    # ---------------------- carga ----------------------
+    def load_day(self, fecha, filas, version=None):
+        """Reemplaza un día con filas (hora, cancha, disponible)."""
+        horas = {}
+        for hora, cancha, disponible in filas:
+            horas[hora] = horas.get(hora, 0) | ((1 << cancha) if disponible else 0)
+        with self._lock:
+            self._days[fecha] = dict(sorted(horas.items()))
+            self._versions[fecha] = version
+            if list(self._days) != sorted(self._days):
+                self._days = dict(sorted(self._days.items()))
+
+    def drop_before(self, fecha):
+        """Olvida los días anteriores a `fecha` (ya no reservables)."""
+        with self._lock:
+            for f in [f for f in self._days if f < fecha]:
+                del self._days[f]
+                self._versions.pop(f, None)
+
+    def version(self, fecha):
+        """Versión con la que se cargó el día, o None si no está cargado."""
+        with self._lock:
+            return self._versions.get(fecha)
+
+    # ---------------------- consultas ----------------------
+    def first_free_court(self, fecha, hora):
+        with self._lock:
+            mascara = self._days.get(fecha, {}).get(hora, 0)
+        if not mascara:
+            return None
+        return (mascara & -mascara).bit_length() - 1
+
+    def free_courts(self, fecha, hora):
+        with self._lock:
+            mascara = self._days.get(fecha, {}).get(hora, 0)
+        return [n for n in range(mascara.bit_length()) if mascara >> n & 1]
+
+    def free_hours(self, fecha):
+        """Horas del día con al menos una cancha libre, en orden."""
+        with self._lock:
+            return [h for h, m in self._days.get(fecha, {}).items() if m]
+
+    def next_free_slots(self, n, desde=None):
+        """Las próximas `n` franjas con lugar como (fecha, hora, cancha).
+
+        `desde` es un par (fecha, hora) opcional; se incluye si tiene lugar.
+        """
+        resultado = []
+        with self._lock:
+            for fecha, horas in self._days.items():
+                if desde and fecha < desde[0]:
+                    continue
+                for hora, mascara in horas.items():
+                    if not mascara or (desde and fecha == desde[0] and hora < desde[1]):
+                        continue
+                    resultado.append((fecha, hora, (mascara & -mascara).bit_length() - 1))
+                    if len(resultado) == n:
+                        return resultado
+        return resultado
+
+    # ---------------------- actualizaciones ----------------------
+    def mark_taken(self, fecha, hora, cancha):
+        """Apaga el bit de una reserva propia; la versión del día queda vieja
+        a propósito para que la próxima sincronización lo confirme."""
+        with self._lock:
+            horas = self._days.get(fecha)
+            if horas is not None and hora in horas:
+                horas[hora] &= ~(1 << cancha)
+
+    def mark_free(self, fecha, hora, cancha):
+        with self._lock:
+            horas = self._days.get(fecha)
+            if horas is not None and hora in horas:
+                horas[hora] |= 1 << cancha
+
+    def mark_full(self, fecha, hora):
+        with self._lock:
+            horas = self._days.get(fecha)
+            if horas is not None and hora in horas:
+                horas[hora] = 0
@@ -0,0 +1,48 @@
+"""Pub/sub en memoria del proceso para avisar cambios a los frontends.
+
+El backend publica después de confirmar cada escritura; quien escucha (la
+app Tk, un servidor) recibe el aviso en el hilo que publicó, así que el
+callback tiene que ser corto: encolar y volver. Un callback que falla se
+registra en el log y no afecta al resto ni a quien publicó.
+
+Canales que usa backendPRUEBA:
+    'disponibilidad'     {'fecha': 'AAAA-MM-DD'}: cambió la ocupación del día
+    'usuario:<id>'       avisos para un jugador (p. ej. lista de espera)
+"""
+import logging
+import threading
+
+log = logging.getLogger('padelclub.eventos')
+
+
+class EventBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs = {}         # canal -> tupla de callbacks (se reemplaza, no se muta)
+
+    def subscribe(self, canal, callback):
+        """Suscribe `callback(canal, evento)`; devuelve la función para desuscribir."""
+        with self._lock:
+            self._subs[canal] = self._subs.get(canal, ()) + (callback,)
+
+        def cancelar():
+            with self._lock:
+                quedan = tuple(c for c in self._subs.get(canal, ()) if c is not callback)
+                if quedan:
+                    self._subs[canal] = quedan
+                else:
+                    self._subs.pop(canal, None)
+        return cancelar
+
+    def publish(self, canal, evento):
+        """Entrega `evento` a los suscriptos del canal; devuelve cuántos eran."""
+        callbacks = self._subs.get(canal, ())
+        for callback in callbacks:
+            try:
+                callback(canal, evento)
+            except Exception:
+                log.exception("Error en un suscriptor de %s", canal)
+        return len(callbacks)
+
+    def subscribers(self, canal):
+        return len(self._subs.get(canal, ()))
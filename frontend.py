@@ -1,61 +1,324 @@
 #!/usr/bin/env python3
-import os
-os.system('cls')
+"""Interfaz Tk del club para los kioscos.
+
+    python frontend.py             # contra la base (backendPRUEBA)
+    PADEL_SERVIDOR=http://host:8080 python frontend.py   # contra servidor.py
+    python frontend.py --tiempos   # mide el arranque, lo imprime y sale
+
+El arranque muestra la ventana lo antes posible: el backend no se importa
+al cargar el módulo sino en un hilo después de la primera pintada (ver
+`Backend`), y cada página se arma la primera vez que se muestra.
+"""
+import time
+T0 = time.perf_counter()    # antes de los demás imports: el arranque se mide desde acá
 
+import argparse
+import itertools
+import os
+import queue
+import sys
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
-from backendPRUEBA import UsuarioManager, ReservationManager
+class Backend:
+    """Importa el backend la primera vez que se lo usa: `cliente` si está
+    PADEL_SERVIDOR (todo pasa por servidor.py, sin credenciales de la base)
+    y si no `backendPRUEBA`. `backend.ReservationManager()` etc. funcionan
+    igual que con el import directo; si el hilo de arranque todavía está
+    importando, quien llega espera a que termine en lugar de importar de nuevo.
+    """
+
+    def __init__(self):
+        self._lock   = threading.Lock()
+        self._module = None
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    if os.environ.get('PADEL_SERVIDOR'):
+                        import cliente as module
+                    else:
+                        import backendPRUEBA as module
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+backend = Backend()
 
 # Constantes
 ADMIN_SECRET = "padel"
-MAX_DAYS     = 4
 DATE_FORMAT  = "%Y-%m-%d"
 
 class AuthService:
     @staticmethod
     def login(username, password):
-        um = UsuarioManager()
-        role, uid = um.iniciar_sesion(username, password)
-        um.desconectar()
-        return (True, role, uid) if role else (False, None, None)
+        um = backend.UsuarioManager()
+        try:
+            role, uid, token = um.abrir_sesion(username, password)
+        finally:
+            um.desconectar()
+        return (True, role, uid, token) if role else (False, None, None, None)
 
     @staticmethod
-    def register(username, password, role):
-        um = UsuarioManager()
-        ok = um.crear_usuario(username, password, role)
-        um.desconectar()
-        return ok
+    def logout(token):
+        if token:
+            backend.cerrar_sesion(token)
+
+    @staticmethod
+    def register(username, password, role, admin_key=None):
+        um = backend.UsuarioManager()
+        try:
+            if role == 'admin' and os.environ.get('PADEL_SERVIDOR'):
+                # Contra servidor.py la clave maestra la valida el servidor
+                return um.crear_usuario(username, password, role, clave_admin=admin_key)
+            return um.crear_usuario(username, password, role)
+        finally:
+            um.desconectar()
+
+class BackgroundTasks:
+    """Ejecuta llamadas al backend en hilos y entrega los resultados en el mainloop.
+
+    Los hilos nunca tocan Tk: dejan el futuro terminado en una cola que se
+    vacía con `after()`. Los pedidos de un mismo `channel` se pisan: al
+    enviar uno nuevo se cancela el anterior si no arrancó y, si ya estaba
+    corriendo, su resultado se descarta. Un pedido idéntico (mismo canal y
+    argumentos) a uno en curso no se vuelve a enviar, se le suma. Con
+    `channel=None` el pedido no se cancela ni se coalesce (escrituras).
+
+    `post()` es para los avisos de `events`, que llegan en el hilo que
+    publicó: encola la llamada y el mainloop la ejecuta en el próximo poll.
+    """
+    POLL_MS = 30
+
+    def __init__(self, root, workers=4, on_busy=None):
+        self.root     = root
+        self.on_busy  = on_busy
+        self._pool    = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backend')
+        self._done    = queue.Queue()
+        self._posted  = queue.Queue()
+        self._tickets = itertools.count(1)
+        self._latest  = {}      # canal -> ticket vigente
+        self._inflight = {}     # ticket -> [canal, args, futuro, on_done, on_error]
+        self.root.after(self.POLL_MS, self._poll)
+
+    def submit(self, channel, fn, *args, on_done=None, on_error=None):
+        if channel is not None:
+            for ticket, pedido in self._inflight.items():
+                if pedido[0] == channel and pedido[1] == args and not pedido[2].cancelled():
+                    # Coalescer: mismo pedido en curso, se queda con los callbacks nuevos
+                    pedido[3], pedido[4] = on_done, on_error
+                    self._latest[channel] = ticket
+                    return ticket
+            self.cancel(channel)
+
+        ticket = next(self._tickets)
+        futuro = self._pool.submit(fn, *args)
+        self._inflight[ticket] = [channel, args, futuro, on_done, on_error]
+        if channel is not None:
+            self._latest[channel] = ticket
+        futuro.add_done_callback(lambda f, t=ticket: self._done.put(t))
+        self._notify_busy()
+        return ticket
+
+    def cancel(self, channel):
+        """Descarta el pedido vigente del canal (y lo cancela si no arrancó)."""
+        ticket = self._latest.pop(channel, None)
+        pedido = self._inflight.get(ticket)
+        if pedido:
+            pedido[2].cancel()
+
+    def post(self, fn, *args):
+        """Ejecuta `fn(*args)` en el mainloop; se puede llamar desde cualquier hilo."""
+        self._posted.put((fn, args))
+
+    def pending(self):
+        return len(self._inflight)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _poll(self):
+        try:
+            while True:
+                self._deliver(self._done.get_nowait())
+        except queue.Empty:
+            pass
+        try:
+            while True:
+                fn, args = self._posted.get_nowait()
+                fn(*args)
+        except queue.Empty:
+            pass
+        finally:
+            self.root.after(self.POLL_MS, self._poll)
+
+    def _deliver(self, ticket):
+        channel, _, futuro, on_done, on_error = self._inflight.pop(ticket)
+        self._notify_busy()
+        if futuro.cancelled():
+            return
+        if channel is not None:
+            if self._latest.get(channel) != ticket:
+                return          # lo pisó un pedido más nuevo
+            del self._latest[channel]
+        exc = futuro.exception()
+        if exc is not None:
+            if on_error:
+                on_error(exc)
+            else:
+                messagebox.showerror("Error", f"Error de conexión: {exc}")
+        elif on_done:
+            on_done(futuro.result())
+
+    def _notify_busy(self):
+        if self.on_busy:
+            self.on_busy(bool(self._inflight))
 
 class App(tk.Tk):
-    def __init__(self):
+    PAGES = {}      # nombre -> clase; se completa al final del módulo
+
+    def __init__(self, on_warm=None):
         super().__init__()
+        self.on_warm = on_warm      # callback(app) al terminar el calentamiento
         self.title("Padel Club")
-        self.geometry("480x480")
+        self.geometry("520x580")
         self.resizable(False, False)
 
         self.current_user_id = None
         self.current_role    = None
+        self.current_token   = None
+        self.current_page    = None
+        self._unwatch_user   = None
+
+        # Indicador de carga mientras haya pedidos al backend en curso
+        status = ttk.Frame(self)
+        status.pack(side='bottom', fill='x', padx=20, pady=(0, 10))
+        self.busy_label = ttk.Label(status, text="")
+        self.busy_label.pack(side='left')
+        self.busy_bar = ttk.Progressbar(status, mode='indeterminate', length=120)
+
+        self.tasks = BackgroundTasks(self, on_busy=self._set_busy)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
 
         container = ttk.Frame(self)
         container.pack(fill='both', expand=True, padx=20, pady=20)
         container.grid_rowconfigure(0, weight=1)
         container.grid_columnconfigure(0, weight=1)
 
-        # Instanciar páginas
+        # Las páginas se arman la primera vez que se muestran
+        self.container = container
         self.pages = {}
-        for PageClass in (LoginPage, RegisterPage, PlayerMenuPage, AdminMenuPage, ReservationPage):
-            page = PageClass(container, self)
-            self.pages[PageClass.__name__] = page
+        self.show_page('LoginPage')
+
+        # Tiempos de arranque (ver `startup_report`)
+        self.startup = {}
+        self.bind('<Map>', self._on_first_map)
+
+    def show_page(self, name):
+        page = self.pages.get(name)
+        if page is None:
+            page = self.pages[name] = self.PAGES[name](self.container, self)
             page.grid(row=0, column=0, sticky='nsew')
+        elif name == 'ReservationPage':
+            # Recién armada ya pidió la grilla
+            page.refresh_grid()
+        self.current_page = name
+        page.tkraise()
+
+    def _on_first_map(self, event):
+        if event.widget is not self or 'ventana' in self.startup:
+            return
+        self.unbind('<Map>')
+        self.startup['ventana'] = time.perf_counter() - T0
+        threading.Thread(target=self._warm_up, name='arranque', daemon=True).start()
 
+    def _warm_up(self):
+        """Importa el backend y abre la conexión mientras el usuario escribe."""
+        t = time.perf_counter()
+        try:
+            backend.load()
+            self.startup['backend'] = time.perf_counter() - T0
+            backend.calentar()
+            self.startup['conexion'] = time.perf_counter() - T0
+        except Exception as e:
+            # El primer pedido real lo vuelve a intentar y muestra el error
+            self.startup['error'] = str(e)
+        self.startup['calentamiento'] = time.perf_counter() - t
+        self.tasks.post(self._on_warm)
+
+    def _on_warm(self):
+        if self.on_warm:
+            self.on_warm(self)
+
+    def startup_report(self):
+        """Segundos desde que arrancó el módulo hasta cada hito del arranque."""
+        lineas = [f"{'ventana visible':<20}{self.startup['ventana'] * 1000:8.0f} ms"]
+        for clave, titulo in (('backend', "backend importado"), ('conexion', "base conectada"),
+                              ('calentamiento', "calentamiento")):
+            if clave in self.startup:
+                lineas.append(f"{titulo:<20}{self.startup[clave] * 1000:8.0f} ms")
+        if 'error' in self.startup:
+            lineas.append(f"error al calentar: {self.startup['error']}")
+        return "\n".join(lineas)
+
+    def watch_user(self, uid):
+        """Escucha los avisos del jugador (p. ej. lista de espera asignada)."""
+        self._stop_watching()
+        self._unwatch_user = backend.events.subscribe(
+            f"usuario:{uid}", lambda canal, ev: self.tasks.post(self._on_user_event, ev))
+
+    def _stop_watching(self):
+        if self._unwatch_user:
+            self._unwatch_user()
+            self._unwatch_user = None
+
+    def _on_user_event(self, ev):
+        if ev.get('tipo') == 'espera_asignada':
+            messagebox.showinfo(
+                "Lista de espera",
+                f"Se liberó un lugar: tenés reservada la cancha {ev['cancha']} "
+                f"el {ev['fecha']} a las {ev['hora'][:5]}.")
+
+    def _set_busy(self, busy):
+        if busy:
+            self.busy_label.config(text="Cargando…")
+            self.busy_bar.pack(side='right')
+            self.busy_bar.start(10)
+            self.config(cursor='watch')
+        else:
+            self.busy_label.config(text="")
+            self.busy_bar.stop()
+            self.busy_bar.pack_forget()
+            self.config(cursor='')
+
+    LOGOUT_AL_CERRAR = 1.0      # segundos que se espera el logout al cerrar la ventana
+
+    def logout(self):
+        self._stop_watching()
+        # En modo cliente es un pedido HTTP: que no frene la interfaz
+        self.tasks.submit(None, AuthService.logout, self.current_token,
+                          on_error=lambda exc: None)
+        self.current_user_id = self.current_role = self.current_token = None
         self.show_page('LoginPage')
 
-    def show_page(self, name):
-        if name == 'ReservationPage':
-            self.pages[name].refresh_slots()
-        self.pages[name].tkraise()
+    def _on_close(self):
+        self._stop_watching()
+        token, self.current_token = self.current_token, None
+        self.tasks.shutdown()
+        self.destroy()
+        if token:
+            # La ventana ya no está: se espera un poco a que salga el logout,
+            # sin colgar el cierre si el servidor no contesta
+            hilo = threading.Thread(target=AuthService.logout, args=(token,),
+                                    name='logout', daemon=True)
+            hilo.start()
+            hilo.join(self.LOGOUT_AL_CERRAR)
 
 # ---------------------- LoginPage ----------------------
 class LoginPage(tk.Frame):
@@ -71,22 +334,37 @@ class LoginPage(tk.Frame):
         ttk.Entry(self, textvariable=self.pass_var, show='*').pack(fill='x', pady=5)
 
         frm = ttk.Frame(self); frm.pack(pady=15)
-        ttk.Button(frm, text="Ingresar", width=12, command=self._login).pack(side='left', padx=5)
+        self.btn_login = ttk.Button(frm, text="Ingresar", width=12, command=self._login)
+        self.btn_login.pack(side='left', padx=5)
         ttk.Button(frm, text="Registrarse", width=12,
                    command=lambda: controller.show_page('RegisterPage')).pack(side='left', padx=5)
 
     def _login(self):
         u = self.user_var.get().strip()
         p = self.pass_var.get().strip()
-        ok, role, uid = AuthService.login(u, p)
+        self.btn_login.state(['disabled'])
+        self.controller.tasks.submit(None, AuthService.login, u, p,
+                                     on_done=self._on_login, on_error=self._on_error)
+
+    def _on_error(self, exc):
+        self.btn_login.state(['!disabled'])
+        messagebox.showerror("Error", f"Error de conexión: {exc}")
+
+    def _on_login(self, result):
+        self.btn_login.state(['!disabled'])
+        ok, role, uid, token = result
         if not ok:
             return messagebox.showerror("Error","Credenciales inválidas")
         if role == 'admin':
             code = simpledialog.askstring("Admin","Clave maestra:",show='*')
             if code != ADMIN_SECRET:
+                self.controller.tasks.submit(None, AuthService.logout, token,
+                                             on_error=lambda exc: None)
                 return messagebox.showerror("Error","Clave admin incorrecta")
         self.controller.current_role    = role
         self.controller.current_user_id = uid
+        self.controller.current_token   = token
+        self.controller.watch_user(uid)
         next_page = 'AdminMenuPage' if role=='admin' else 'PlayerMenuPage'
         self.controller.show_page(next_page)
 
@@ -111,7 +389,8 @@ class RegisterPage(tk.Frame):
         ttk.Entry(self, textvariable=self.key_var, show='*').pack(fill='x', pady=5)
 
         frm = ttk.Frame(self); frm.pack(pady=15)
-        ttk.Button(frm, text="Crear", width=12, command=self._register).pack(side='left', padx=5)
+        self.btn_create = ttk.Button(frm, text="Crear", width=12, command=self._register)
+        self.btn_create.pack(side='left', padx=5)
         ttk.Button(frm, text="Cancelar", width=12,
                    command=lambda: controller.show_page('LoginPage')).pack(side='left', padx=5)
 
@@ -122,7 +401,17 @@ class RegisterPage(tk.Frame):
             return messagebox.showerror("Error","Completa campos obligatorios")
         if r=='admin' and k!=ADMIN_SECRET:
             return messagebox.showerror("Error","Clave admin inválida")
-        if AuthService.register(u,p,r):
+        self.btn_create.state(['disabled'])
+        self.controller.tasks.submit(None, AuthService.register, u, p, r, k or None,
+                                     on_done=self._on_register, on_error=self._on_error)
+
+    def _on_error(self, exc):
+        self.btn_create.state(['!disabled'])
+        messagebox.showerror("Error", f"Error de conexión: {exc}")
+
+    def _on_register(self, ok):
+        self.btn_create.state(['!disabled'])
+        if ok:
             messagebox.showinfo("Éxito","Usuario registrado")
             self.controller.show_page('LoginPage')
         else:
@@ -137,11 +426,11 @@ class PlayerMenuPage(tk.Frame):
         ttk.Button(self, text="Reservar cancha", width=20,
                    command=lambda: controller.show_page('ReservationPage')).pack(pady=5)
         ttk.Button(self, text="Ver mis reservas", width=20,
-                   command=lambda: messagebox.showinfo("Info","Pendiente")).pack(pady=5)
+                   command=lambda: MisReservasWindow(self, controller)).pack(pady=5)
         ttk.Button(self, text="Torneos", width=20,
-                   command=lambda: messagebox.showinfo("Info","Pendiente")).pack(pady=5)
+                   command=lambda: TorneosWindow(self, controller)).pack(pady=5)
         ttk.Button(self, text="Cerrar sesión", width=20,
-                   command=lambda: controller.show_page('LoginPage')).pack(pady=15)
+                   command=controller.logout).pack(pady=15)
 
 # ---------------------- AdminMenuPage ----------------------
 class AdminMenuPage(tk.Frame):
@@ -151,27 +440,367 @@ class AdminMenuPage(tk.Frame):
         ttk.Label(self, text="Menú Administrador", font=(None,18)).pack(pady=10)
         ttk.Button(self, text="Ver Reservas", width=20,
                    command=self._show_reservas).pack(pady=5)
+        ttk.Button(self, text="Estadísticas", width=20,
+                   command=lambda: EstadisticasWindow(self, self.controller)).pack(pady=5)
         ttk.Button(self, text="Administrar canchas", width=20,
                    command=lambda: messagebox.showinfo("Info","Pendiente")).pack(pady=5)
         ttk.Button(self, text="Ver usuarios", width=20,
                    command=lambda: messagebox.showinfo("Info","Pendiente")).pack(pady=5)
         ttk.Button(self, text="Cerrar sesión", width=20,
-                   command=lambda: controller.show_page('LoginPage')).pack(pady=15)
+                   command=controller.logout).pack(pady=15)
 
     def _show_reservas(self):
-        rows = ReservationManager().get_reservations()
-        win = tk.Toplevel(self)
-        win.title("Reservas Actuales")
+        ReservasWindow(self, self.controller)
+
+# ---------------------- ReservasWindow ----------------------
+class ReservasWindow(tk.Toplevel):
+    """Listado de reservas que pide páginas al backend a medida que se scrollea."""
+    PAGE_SIZE = 200
+
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.controller = controller
+        self.title("Reservas Actuales")
+        self.channel = f"reservas-{id(self)}"
+
+        # Filtros
+        frm = ttk.Frame(self); frm.pack(fill='x', padx=5, pady=5)
+        self.desde_var, self.hasta_var, self.cancha_var = tk.StringVar(), tk.StringVar(), tk.StringVar()
+        for label, var, width in (("Desde:", self.desde_var, 11),
+                                  ("Hasta:", self.hasta_var, 11),
+                                  ("Cancha:", self.cancha_var, 4)):
+            ttk.Label(frm, text=label).pack(side='left')
+            ttk.Entry(frm, textvariable=var, width=width).pack(side='left', padx=(2, 8))
+        ttk.Button(frm, text="Filtrar", command=self._reload).pack(side='left')
+        self.count = ttk.Label(frm, text="")
+        self.count.pack(side='right')
+
         cols = ("Día","Hora","Cancha","Usuario")
-        tree = ttk.Treeview(win, columns=cols, show='headings')
+        self.tree = ttk.Treeview(self, columns=cols, show='headings')
         for c in cols:
-            tree.heading(c, text=c)
-        tree.pack(fill='both', expand=True)
+            self.tree.heading(c, text=c)
+        self.sb = ttk.Scrollbar(self, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.sb.pack(side='right', fill='y')
+        self.tree.pack(fill='both', expand=True)
+
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._reload()
+
+    def _reload(self):
+        try:
+            for fecha in (self.desde_var.get().strip(), self.hasta_var.get().strip()):
+                if fecha:
+                    datetime.strptime(fecha, DATE_FORMAT)
+            cancha = self.cancha_var.get().strip()
+            cancha = int(cancha) if cancha else None
+        except ValueError:
+            return messagebox.showerror("Error", "Fechas AAAA-MM-DD y cancha numérica.", parent=self)
+        self.filters = {'desde': self.desde_var.get().strip() or None,
+                        'hasta': self.hasta_var.get().strip() or None,
+                        'cancha': cancha}
+        self.tree.delete(*self.tree.get_children())
+        self.next_key = None
+        self.exhausted = False
+        self.loading = False
+        self._load_more()
+
+    def _load_more(self):
+        if self.loading or self.exhausted:
+            return
+        self.loading = True
+        self.controller.tasks.submit(
+            self.channel, backend.ReservationManager().get_reservations_page,
+            self.next_key, self.PAGE_SIZE,
+            self.filters['desde'], self.filters['hasta'], self.filters['cancha'],
+            on_done=self._append, on_error=self._on_error)
+
+    def _append(self, result):
+        if not self.winfo_exists():
+            return
+        rows, self.next_key = result
+        self.loading = False
+        self.exhausted = self.next_key is None
         for dia,hora,cancha,usr in rows:
-            tree.insert('', 'end', values=(dia,hora,cancha,usr))
-        sb = ttk.Scrollbar(win, orient='vertical', command=tree.yview)
-        tree.configure(yscroll=sb.set)
-        sb.pack(side='right', fill='y')
+            self.tree.insert('', 'end', values=(dia,hora,cancha,usr))
+        total = len(self.tree.get_children())
+        self.count.config(text=f"{total} reservas" + ("" if self.exhausted else "+"))
+
+    def _on_error(self, exc):
+        self.loading = False
+        messagebox.showerror("Error", f"Error de conexión: {exc}", parent=self)
+
+    def _on_scroll(self, first, last):
+        self.sb.set(first, last)
+        # Pedir la página siguiente antes de llegar al final
+        if float(last) > 0.9:
+            self._load_more()
+
+    def _on_close(self):
+        self.controller.tasks.cancel(self.channel)
+        self.destroy()
+
+# ---------------------- EstadisticasWindow ----------------------
+class EstadisticasWindow(tk.Toplevel):
+    """Tablero de ocupación: por cancha, por hora, por día de la semana y
+    los jugadores que más jugaron, en un rango de fechas."""
+    BARRA = 20      # caracteres de la barra de utilización al 100 %
+
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.controller = controller
+        self.title("Estadísticas de ocupación")
+        self.channel = f"estadisticas-{id(self)}"
+
+        frm = ttk.Frame(self); frm.pack(fill='x', padx=5, pady=5)
+        hoy = datetime.today()
+        self.desde_var = tk.StringVar(value=(hoy - timedelta(days=29)).strftime(DATE_FORMAT))
+        self.hasta_var = tk.StringVar(value=hoy.strftime(DATE_FORMAT))
+        for label, var in (("Desde:", self.desde_var), ("Hasta:", self.hasta_var)):
+            ttk.Label(frm, text=label).pack(side='left')
+            ttk.Entry(frm, textvariable=var, width=11).pack(side='left', padx=(2, 8))
+        ttk.Button(frm, text="Actualizar", command=self._reload).pack(side='left')
+
+        tabs = ttk.Notebook(self); tabs.pack(fill='both', expand=True, padx=5, pady=5)
+        self.tablas = {}
+        for clave, titulo, primera in (('canchas', "Por cancha", "Cancha"),
+                                       ('horas', "Por hora", "Hora"),
+                                       ('dias_semana', "Por día", "Día")):
+            tree = ttk.Treeview(tabs, columns=(primera, "Reservas", "Horas", "Uso"),
+                                show='headings', height=10)
+            for col, ancho in ((primera, 90), ("Reservas", 70), ("Horas", 60), ("Uso", 200)):
+                tree.heading(col, text=col)
+                tree.column(col, width=ancho, anchor='w' if col == "Uso" else 'center')
+            tabs.add(tree, text=titulo)
+            self.tablas[clave] = tree
+        self.jugadores = ttk.Treeview(tabs, columns=("Jugador", "Reservas", "Horas"),
+                                      show='headings', height=10)
+        for col in ("Jugador", "Reservas", "Horas"):
+            self.jugadores.heading(col, text=col)
+        tabs.add(self.jugadores, text="Jugadores")
+
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._reload()
+
+    def _reload(self):
+        desde, hasta = self.desde_var.get().strip(), self.hasta_var.get().strip()
+        try:
+            for fecha in (desde, hasta):
+                datetime.strptime(fecha, DATE_FORMAT)
+        except ValueError:
+            return messagebox.showerror("Error", "Fechas AAAA-MM-DD.", parent=self)
+        self.controller.tasks.submit(self.channel, backend.OcupacionManager().resumen, desde, hasta,
+                                     on_done=self._show)
+
+    def _show(self, datos):
+        if not self.winfo_exists():
+            return
+        for clave, tree in self.tablas.items():
+            tree.delete(*tree.get_children())
+            for nombre, reservas, minutos, uso in datos[clave]:
+                barra = "█" * round(uso * self.BARRA)
+                tree.insert('', 'end', values=(nombre, reservas, f"{minutos / 60:.1f}",
+                                               f"{barra} {uso:.0%}"))
+        self.jugadores.delete(*self.jugadores.get_children())
+        for usuario, reservas, minutos in datos['jugadores']:
+            self.jugadores.insert('', 'end', values=(usuario, reservas, f"{minutos / 60:.1f}"))
+
+    def _on_close(self):
+        self.controller.tasks.cancel(self.channel)
+        self.destroy()
+
+# ---------------------- MisReservasWindow ----------------------
+class MisReservasWindow(tk.Toplevel):
+    """Reservas del jugador: próximas (con cancelación) y pasadas, de a páginas."""
+    PAGE_SIZE = 20
+
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.controller = controller
+        self.title("Mis reservas")
+        self.channel = f"mis-reservas-{id(self)}"
+
+        tabs = ttk.Notebook(self); tabs.pack(fill='both', expand=True, padx=5, pady=5)
+        self.trees, self.more, self.next_key = {}, {}, {}
+        for cuando, titulo in (('proximas', "Próximas"), ('pasadas', "Pasadas")):
+            frm = ttk.Frame(tabs)
+            cols = ("Día","Desde","Hasta","Cancha")
+            tree = ttk.Treeview(frm, columns=cols, show='headings', height=10, selectmode='browse')
+            for c in cols:
+                tree.heading(c, text=c)
+                tree.column(c, width=90, anchor='center')
+            tree.pack(fill='both', expand=True)
+            botones = ttk.Frame(frm); botones.pack(pady=5)
+            self.more[cuando] = ttk.Button(botones, text="Ver más", width=12,
+                                           command=lambda c=cuando: self._load(c))
+            self.more[cuando].pack(side='left', padx=5)
+            if cuando == 'proximas':
+                self.btn_cancel = ttk.Button(botones, text="Cancelar reserva", width=16,
+                                             command=self._cancel)
+                self.btn_cancel.pack(side='left', padx=5)
+            tabs.add(frm, text=titulo)
+            self.trees[cuando] = tree
+
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        for cuando in self.trees:
+            self._reload(cuando)
+
+    def _reload(self, cuando):
+        self.trees[cuando].delete(*self.trees[cuando].get_children())
+        self.next_key[cuando] = None
+        self._load(cuando)
+
+    def _load(self, cuando):
+        self.more[cuando].state(['disabled'])
+        self.controller.tasks.submit(
+            f"{self.channel}-{cuando}", backend.ReservationManager().mis_reservas_sesion,
+            self.controller.current_token, cuando, self.next_key[cuando], self.PAGE_SIZE,
+            on_done=lambda r, c=cuando: self._append(c, r), on_error=self._on_error)
+
+    def _append(self, cuando, result):
+        if not self.winfo_exists():
+            return
+        rows, self.next_key[cuando] = result
+        for rid, dia, desde, hasta, cancha in rows:
+            self.trees[cuando].insert('', 'end', iid=str(rid),
+                                      values=(dia, desde[:5], hasta[:5], cancha))
+        if self.next_key[cuando] is not None:
+            self.more[cuando].state(['!disabled'])
+
+    def _cancel(self):
+        sel = self.trees['proximas'].selection()
+        if not sel:
+            return messagebox.showerror("Error", "Elegí una reserva.", parent=self)
+        dia, desde, _, cancha = self.trees['proximas'].item(sel[0], 'values')
+        if not messagebox.askyesno("Cancelar",
+                                   f"¿Cancelar la cancha {cancha} del {dia} a las {desde}?",
+                                   parent=self):
+            return
+        self.btn_cancel.state(['disabled'])
+        self.controller.tasks.submit(None, backend.ReservationManager().cancelar_reserva_sesion,
+                                     self.controller.current_token, int(sel[0]),
+                                     on_done=self._on_cancelled, on_error=self._on_error)
+
+    def _on_cancelled(self, result):
+        if not self.winfo_exists():
+            return
+        self.btn_cancel.state(['!disabled'])
+        ok, msg = result
+        (messagebox.showinfo if ok else messagebox.showerror)("Mis reservas", msg, parent=self)
+        if ok:
+            self._reload('proximas')
+
+    def _on_error(self, exc):
+        if self.winfo_exists():
+            self.btn_cancel.state(['!disabled'])
+        messagebox.showerror("Error", f"Error de conexión: {exc}")
+
+    def _on_close(self):
+        for cuando in self.trees:
+            self.controller.tasks.cancel(f"{self.channel}-{cuando}")
+        self.destroy()
+
+# ---------------------- TorneosWindow ----------------------
+class TorneosWindow(tk.Toplevel):
+    """Próximos torneos: inscripción (con pareja en dobles) y partidos programados."""
+
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.controller = controller
+        self.title("Torneos")
+        self.channel = f"torneos-{id(self)}"
+        self.torneos = {}
+
+        cols = ("Fecha","Nombre","Tipo","Inscriptos")
+        self.tree = ttk.Treeview(self, columns=cols, show='headings', height=6, selectmode='browse')
+        for c in cols:
+            self.tree.heading(c, text=c)
+            self.tree.column(c, width=90 if c != "Nombre" else 180)
+        self.tree.pack(fill='x', padx=5, pady=5)
+
+        frm = ttk.Frame(self); frm.pack(pady=5)
+        self.btn_join = ttk.Button(frm, text="Inscribirme", width=14, command=self._join)
+        self.btn_join.pack(side='left', padx=5)
+        ttk.Button(frm, text="Ver partidos", width=14,
+                   command=self._show_matches).pack(side='left', padx=5)
+
+        cols = ("P","Ronda","Hora","Cancha","Lado A","Lado B")
+        self.matches = ttk.Treeview(self, columns=cols, show='headings', height=10)
+        for c in cols:
+            self.matches.heading(c, text=c)
+            self.matches.column(c, width=50 if c in ("P","Ronda","Cancha") else 130)
+        self.matches.pack(fill='both', expand=True, padx=5, pady=5)
+
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._reload()
+
+    def _reload(self):
+        self.controller.tasks.submit(self.channel, backend.TorneoManager().listar_torneos,
+                                     on_done=self._show_torneos)
+
+    def _show_torneos(self, filas):
+        if not self.winfo_exists():
+            return
+        self.tree.delete(*self.tree.get_children())
+        self.torneos = {}
+        for tid, nombre, tipo, fecha, _ubicacion, inscriptos in filas:
+            self.torneos[str(tid)] = tipo
+            self.tree.insert('', 'end', iid=str(tid), values=(fecha, nombre, tipo, inscriptos))
+
+    def _selected(self):
+        sel = self.tree.selection()
+        if not sel:
+            messagebox.showerror("Error", "Elegí un torneo.", parent=self)
+            return None
+        return sel[0]
+
+    def _join(self):
+        tid = self._selected()
+        if tid is None:
+            return
+        pareja = None
+        if self.torneos[tid] == 'dobles':
+            pareja = simpledialog.askstring("Dobles", "Usuario de tu pareja:", parent=self)
+            if not pareja:
+                return
+        self.btn_join.state(['disabled'])
+        self.controller.tasks.submit(None, backend.TorneoManager().inscribir_sesion,
+                                     self.controller.current_token, int(tid), pareja,
+                                     on_done=self._on_joined, on_error=self._on_error)
+
+    def _on_joined(self, result):
+        if not self.winfo_exists():
+            return
+        self.btn_join.state(['!disabled'])
+        ok, msg = result
+        (messagebox.showinfo if ok else messagebox.showerror)("Torneos", msg, parent=self)
+        if ok:
+            self._reload()
+
+    def _show_matches(self):
+        tid = self._selected()
+        if tid is not None:
+            self.controller.tasks.submit(f"{self.channel}-partidos",
+                                         backend.TorneoManager().partidos,
+                                         int(tid), on_done=self._fill_matches)
+
+    def _fill_matches(self, filas):
+        if not self.winfo_exists():
+            return
+        self.matches.delete(*self.matches.get_children())
+        for numero, ronda, _grupo, a, b, cancha, fecha_hora in filas:
+            self.matches.insert('', 'end', values=(numero, ronda, fecha_hora or "A programar",
+                                                   cancha or "", a, b))
+
+    def _on_error(self, exc):
+        if self.winfo_exists():
+            self.btn_join.state(['!disabled'])
+        messagebox.showerror("Error", f"Error de conexión: {exc}")
+
+    def _on_close(self):
+        self.controller.tasks.cancel(self.channel)
+        self.controller.tasks.cancel(f"{self.channel}-partidos")
+        self.destroy()
 
 # ---------------------- ReservationPage ----------------------
 class ReservationPage(tk.Frame):
@@ -184,9 +813,7 @@ class ReservationPage(tk.Frame):
         frm = ttk.Frame(self); frm.pack(pady=5)
         ttk.Label(frm, text="Día:").pack(side='left')
         self.day_var = tk.StringVar()
-        days = [(datetime.today()+timedelta(days=i)).strftime(DATE_FORMAT)
-                for i in range(1,MAX_DAYS+1)]
-        self.cb_day = ttk.Combobox(frm, values=days, textvariable=self.day_var,
+        self.cb_day = ttk.Combobox(frm, values=[], textvariable=self.day_var,
                                    state='readonly', width=15)
         self.cb_day.pack(side='left', padx=5)
         self.cb_day.bind('<<ComboboxSelected>>', lambda e: self.refresh_slots())
@@ -198,36 +825,150 @@ class ReservationPage(tk.Frame):
         self.cb_time = ttk.Combobox(frm2, values=[], textvariable=self.time_var,
                                     state='readonly', width=15)
         self.cb_time.pack(side='left', padx=5)
+        ttk.Label(frm2, text="Minutos:").pack(side='left')
+        self.dur_var = tk.StringVar(value='60')
+        ttk.Combobox(frm2, values=[str(m) for m in backend.ReservationManager.DURACIONES],
+                     textvariable=self.dur_var, state='readonly', width=5).pack(side='left', padx=5)
 
         self.msg = ttk.Label(self, text="", foreground='red')
         self.msg.pack(pady=5)
 
+        # Semana: canchas libres por día y hora; un clic elige la franja
+        self.grid_data = None
+        self.week = ttk.Treeview(self, show='headings', height=5, selectmode='none')
+        self.week.pack(fill='x', pady=5)
+        self.week.bind('<Button-1>', self._on_grid_click)
+
         # Botones
         fbtn = ttk.Frame(self); fbtn.pack(pady=15)
-        ttk.Button(fbtn, text="Confirmar", width=12, command=self._confirm).pack(side='left', padx=5)
+        self.btn_confirm = ttk.Button(fbtn, text="Confirmar", width=12, command=self._confirm)
+        self.btn_confirm.pack(side='left', padx=5)
         ttk.Button(fbtn, text="Volver", width=12,
                    command=lambda: self.controller.show_page(
                        'AdminMenuPage' if self.controller.current_role=='admin'
                        else 'PlayerMenuPage'
                    )).pack(side='left', padx=5)
 
+        # La grilla trae también los días: se pide apenas se arma la página
+        self.refresh_grid()
+        # Y se vuelve a pedir cuando otro cambia la ocupación, si está a la vista
+        backend.events.subscribe('disponibilidad',
+                         lambda canal, ev: controller.tasks.post(self._on_availability))
+
+    def _on_availability(self):
+        if self.controller.current_page == 'ReservationPage':
+            self.refresh_grid()
+
+    def refresh_grid(self):
+        self.controller.tasks.submit('grilla', backend.ReservationManager().get_availability_grid,
+                                     on_done=self._show_grid)
+
+    def _show_grid(self, data):
+        self.grid_data = data
+        fechas, horas, libres = data
+        self.cb_day['values'] = fechas
+        if self.day_var.get() not in fechas:
+            self.day_var.set('')
+        cols = ['hora'] + fechas
+        self.week.configure(columns=cols)
+        self.week.heading('hora', text="Hora")
+        self.week.column('hora', width=70, anchor='center', stretch=False)
+        for fecha in fechas:
+            dia = datetime.strptime(fecha, DATE_FORMAT)
+            self.week.heading(fecha, text=dia.strftime("%a %d/%m"))
+            self.week.column(fecha, width=80, anchor='center')
+        self.week.delete(*self.week.get_children())
+        for j, hora in enumerate(horas):
+            self.week.insert('', 'end', iid=hora, values=[hora[:5]] + [
+                libres[i][j] or "—" for i in range(len(fechas))])
+        self.refresh_slots()
+
+    def _on_grid_click(self, event):
+        hora  = self.week.identify_row(event.y)
+        col   = self.week.identify_column(event.x)      # '#1' es la hora
+        if not self.grid_data or not hora or col in ('', '#1'):
+            return
+        fechas, horas, libres = self.grid_data
+        i = int(col[1:]) - 2
+        if not libres[i][horas.index(hora)]:
+            return self._offer_waitlist(fechas[i], hora)
+        self.day_var.set(fechas[i])
+        self.refresh_slots()
+        self.time_var.set(hora)
+
     def refresh_slots(self):
         fecha = self.day_var.get()
-        slots = ReservationManager().get_available_slots(fecha) if fecha else []
-        self.cb_time['values'] = slots
+        self.cb_time['values'] = []
         self.time_var.set('')
+        if not fecha:
+            self.controller.tasks.cancel('slots')
+            return self._show_slots([])
+        if self.grid_data and fecha in self.grid_data[0]:
+            # Ya está en la grilla: sin ida y vuelta al backend
+            fechas, horas, libres = self.grid_data
+            fila = libres[fechas.index(fecha)]
+            return self._show_slots([h for h, n in zip(horas, fila) if n])
+        self.msg.config(text="Buscando horarios…")
+        self.controller.tasks.submit('slots', backend.ReservationManager().get_available_slots,
+                                     fecha, on_done=self._show_slots)
+
+    def _show_slots(self, slots):
+        self.cb_time['values'] = slots
         self.msg.config(text="No hay canchas disponibles." if not slots else "")
 
     def _confirm(self):
         fecha = self.day_var.get()
         hora  = self.time_var.get()
-        uid   = self.controller.current_user_id
+        token = self.controller.current_token
         if not fecha or not hora:
             return messagebox.showerror("Error","Selecciona día y hora.")
-        ok,msg = ReservationManager().reservar(uid, fecha, hora)
-        (messagebox.showinfo if ok else messagebox.showerror)("Reserva", msg)
-        if ok:
-            self.refresh_slots()
+        self.btn_confirm.state(['disabled'])
+        self.controller.tasks.submit(None, backend.ReservationManager().reservar_sesion,
+                                     token, fecha, hora,
+                                     int(self.dur_var.get()),
+                                     on_done=self._on_reserved, on_error=self._on_error)
+
+    def _on_error(self, exc):
+        self.btn_confirm.state(['!disabled'])
+        messagebox.showerror("Error", f"Error de conexión: {exc}")
+
+    def _on_reserved(self, result):
+        self.btn_confirm.state(['!disabled'])
+        ok,msg = result
+        if not ok and msg.startswith("No hay canchas") and self.dur_var.get() == '60':
+            self._offer_waitlist(self.day_var.get(), self.time_var.get())
+        else:
+            (messagebox.showinfo if ok else messagebox.showerror)("Reserva", msg)
+        # Con o sin éxito la grilla quedó vieja (la franja pudo llenarse)
+        self.refresh_grid()
+
+    def _offer_waitlist(self, fecha, hora):
+        if not messagebox.askyesno(
+                "Lista de espera",
+                f"No quedan canchas el {fecha} a las {hora[:5]}.\n"
+                "¿Querés anotarte en la lista de espera? Si alguien cancela, "
+                "la reserva queda a tu nombre y te avisamos."):
+            return
+        self.controller.tasks.submit(
+            None, backend.ReservationManager().anotar_espera_sesion,
+            self.controller.current_token, fecha, hora,
+            on_done=lambda r: (messagebox.showinfo if r[0] else messagebox.showerror)(
+                "Lista de espera", r[1]))
+
+App.PAGES.update((cls.__name__, cls) for cls in
+                 (LoginPage, RegisterPage, PlayerMenuPage, AdminMenuPage, ReservationPage))
+
+def main():
+    ap = argparse.ArgumentParser(description="Kiosco del club de pádel")
+    ap.add_argument('--tiempos', action='store_true',
+                    help="imprime los tiempos de arranque y sale al terminar de calentar")
+    args = ap.parse_args()
+
+    def report(app):
+        print(app.startup_report(), file=sys.stderr)
+        app._on_close()
+
+    App(on_warm=report if args.tiempos else None).mainloop()
 
 if __name__ == '__main__':
-    App().mainloop()
+    main()
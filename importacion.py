@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""Importación y exportación masiva de usuarios y reservas (CSV o JSONL).
+
+    python importacion.py importar usuarios socios.csv --reporte rechazados.csv
+    python importacion.py exportar usuarios socios.jsonl
+    python importacion.py importar reservas historial.csv
+    python importacion.py exportar reservas reservas.csv --desde 2025-01-01
+
+El formato sale de la extensión (.csv o .jsonl) o de --formato. Los
+archivos se leen y escriben de a un lote, así que la memoria no crece con
+el tamaño del archivo.
+
+Usuarios: columnas `usuario`, `clave` (o `hash`, ya hasheada, como la
+exporta este mismo comando) y `tipo` (jugador si falta). Las claves se
+hashean en un pool de procesos mientras se inserta el lote anterior; cada
+lote es una transacción con un `executemany`. Los nombres que ya existen
+(índice único de `usuario`) o se repiten en el archivo se saltean y, con
+--reporte, quedan anotados con el número de línea y el motivo.
+
+Reservas: columnas `usuario` (nombre) o `usuario_id`, `cancha`,
+`fecha_inicio` y `fecha_fin` ('AAAA-MM-DD HH:MM:SS'). Las que empiezan
+antes de mañana son historial y van en lote, salvo las que se superponen
+con otra reserva o un bloqueo de la misma cancha (en la base o antes en el
+archivo); las de la ventana pasan por `reservar_intervalo`, que además
+exige un turno de 60, 90 o 120 minutos dentro de los horarios del club.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import analitica
+import backendPRUEBA
+from backendPRUEBA import UsuarioManager, ReservationManager
+
+TIPOS = ('jugador', 'admin')
+CAMPOS_USUARIOS = ('usuario', 'tipo', 'hash')
+CAMPOS_RESERVAS = ('usuario', 'cancha', 'fecha_inicio', 'fecha_fin')
+
+
+# ---------------------- lectura y escritura ----------------------
+def formato_de(ruta, formato=None):
+    if formato:
+        return formato
+    return 'jsonl' if ruta.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def leer_filas(archivo, formato):
+    """(número de línea, dict) por cada registro, sin cargar el archivo."""
+    if formato == 'jsonl':
+        for n, linea in enumerate(archivo, start=1):
+            if linea.strip():
+                yield n, json.loads(linea)
+    else:
+        lector = csv.DictReader(archivo)
+        for fila in lector:
+            yield lector.line_num, fila
+
+
+class Escritor:
+    """Escribe dicts como CSV (con encabezado) o JSONL, de a uno."""
+
+    def __init__(self, archivo, formato, campos):
+        self.archivo = archivo
+        self.formato = formato
+        if formato == 'csv':
+            self._csv = csv.DictWriter(archivo, fieldnames=campos)
+            self._csv.writeheader()
+
+    def escribir(self, fila):
+        if self.formato == 'csv':
+            self._csv.writerow(fila)
+        else:
+            self.archivo.write(json.dumps(fila, ensure_ascii=False, default=str) + "\n")
+
+
+def en_lotes(iterable, tamano):
+    it = iter(iterable)
+    while True:
+        lote = list(itertools.islice(it, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def _abrir(ruta, modo):
+    if ruta == '-':
+        return sys.stdin if 'r' in modo else sys.stdout
+    # utf-8-sig al leer: las planillas exportadas desde Excel traen BOM
+    return open(ruta, modo, encoding='utf-8-sig' if 'r' in modo else 'utf-8', newline='')
+
+
+# ---------------------- usuarios ----------------------
+def _validar_usuario(fila):
+    """(usuario, clave, hash, tipo) o un mensaje de error."""
+    usuario = (fila.get('usuario') or '').strip()
+    tipo = (fila.get('tipo') or 'jugador').strip()
+    clave, hash_ = fila.get('clave'), fila.get('hash')
+    if not usuario or len(usuario) > 50:
+        return "usuario vacío o de más de 50 caracteres"
+    if tipo not in TIPOS:
+        return f"tipo inválido: {tipo}"
+    if not clave and not hash_:
+        return "falta la clave"
+    return usuario, clave, hash_, tipo
+
+
+def _hashear(claves, ejecutor, procesos):
+    """Hashes de `claves`; con `ejecutor` (un ProcessPoolExecutor de
+    `procesos` procesos) en paralelo. Devuelve algo que se recorre después,
+    para solapar el hasheo con la inserción."""
+    if ejecutor is None:
+        return [UsuarioManager.hash_password(c) for c in claves]
+    return ejecutor.map(UsuarioManager.hash_password, claves,
+                        chunksize=max(1, len(claves) // (procesos * 4)))
+
+
+def importar_usuarios(filas, lote=1000, procesos=0, reporte=None):
+    """Inserta usuarios desde `filas` ((línea, dict)). `procesos` es la
+    cantidad de procesos para hashear (0: en este proceso). `reporte` recibe
+    (línea, usuario, motivo) por cada fila rechazada. Devuelve contadores."""
+    pool, storage = backendPRUEBA.get_pool(), backendPRUEBA.get_storage()
+    cuentas = {'leidas': 0, 'insertadas': 0, 'duplicadas': 0, 'invalidas': 0}
+    rechazar = reporte or (lambda linea, usuario, motivo: None)
+    insertar = (f"{storage.insert_ignore} usuarios (usuario, contraseña, tipo) "
+                "VALUES (%s, %s, %s)")
+    ejecutor = ProcessPoolExecutor(procesos) if procesos else None
+
+    def preparar(bloque):
+        """Valida el lote y manda a hashear sus claves (sin esperar)."""
+        validas, vistos = [], set()
+        for linea, fila in bloque:
+            cuentas['leidas'] += 1
+            datos = _validar_usuario(fila)
+            if isinstance(datos, str):
+                cuentas['invalidas'] += 1
+                rechazar(linea, fila.get('usuario'), datos)
+            elif datos[0] in vistos:
+                cuentas['duplicadas'] += 1
+                rechazar(linea, datos[0], "repetido en el archivo")
+            else:
+                vistos.add(datos[0])
+                validas.append((linea,) + datos)
+        claves = [v[2] for v in validas if not v[3]]
+        return validas, _hashear(claves, ejecutor, procesos)
+
+    try:
+        with pool.connection() as db, db.cursor() as cur:
+            lotes = en_lotes(filas, lote)
+            siguiente = next(lotes, None)
+            pendiente = preparar(siguiente) if siguiente else None
+            while pendiente is not None:
+                validas, hashes = pendiente
+                # El lote que sigue se hashea mientras este se inserta
+                siguiente = next(lotes, None)
+                pendiente = preparar(siguiente) if siguiente else None
+
+                hashes = iter(hashes)
+                filas_ok = [(usuario, hash_ or next(hashes), tipo)
+                            for _, usuario, _, hash_, tipo in validas]
+                if not filas_ok:
+                    continue
+                storage.begin(cur)
+                try:
+                    marcas = ", ".join(["%s"] * len(filas_ok))
+                    cur.execute(f"SELECT usuario FROM usuarios WHERE usuario IN ({marcas})",
+                                [f[0] for f in filas_ok])
+                    existentes = {r[0] for r in cur.fetchall()}
+                    nuevos = [f for f in filas_ok if f[0] not in existentes]
+                    if nuevos:
+                        cur.executemany(insertar, nuevos)
+                        # Con IGNORE, lo que no entró lo registró otro en el medio
+                        insertadas = cur.rowcount if cur.rowcount >= 0 else len(nuevos)
+                    else:
+                        insertadas = 0
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    raise
+                for linea, usuario, *_ in validas:
+                    if usuario in existentes:
+                        rechazar(linea, usuario, "ya existe")
+                cuentas['insertadas'] += insertadas
+                cuentas['duplicadas'] += len(filas_ok) - insertadas
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown()
+    return cuentas
+
+
+def exportar_usuarios(escritor, lote=1000):
+    pool, storage = backendPRUEBA.get_pool(), backendPRUEBA.get_storage()
+    n = 0
+    with pool.connection() as db:
+        cur = storage.server_cursor(db)
+        try:
+            cur.execute("SELECT usuario, tipo, contraseña FROM usuarios ORDER BY id", ())
+            while True:
+                filas = cur.fetchmany(lote)
+                if not filas:
+                    break
+                for usuario, tipo, hash_ in filas:
+                    escritor.escribir({'usuario': usuario, 'tipo': tipo, 'hash': hash_})
+                n += len(filas)
+        finally:
+            cur.close()
+    return n
+
+
+# ---------------------- reservas ----------------------
+def _validar_reserva(fila):
+    """(usuario, usuario_id, cancha, inicio, fin) con fechas normalizadas, o
+    un error. Con columna `usuario_id` se usa el id; si no, el nombre."""
+    usuario = str(fila.get('usuario') or '').strip()
+    if not usuario and not fila.get('usuario_id'):
+        return "falta el usuario"
+    try:
+        usuario_id = int(fila['usuario_id']) if fila.get('usuario_id') else None
+        cancha = int(fila.get('cancha'))
+        inicio = datetime.strptime(str(fila.get('fecha_inicio')).strip(), "%Y-%m-%d %H:%M:%S")
+        fin = datetime.strptime(str(fila.get('fecha_fin')).strip(), "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError) as e:
+        return f"dato inválido: {e}"
+    if fin <= inicio:
+        return "fecha_fin no es posterior a fecha_inicio"
+    return usuario or str(usuario_id), usuario_id, cancha, inicio, fin
+
+
+def _choques_historial(cur, filas, margen):
+    """Separa las filas de historial (linea, usuario, uid, cancha, inicio,
+    fin) en las que se pueden insertar y las que chocan, con el motivo.
+
+    Contra la base: una consulta por fila sobre idx_reservas_cancha, acotada
+    como en `_claim_interval` a reservas que empiezan a lo sumo `margen`
+    antes. Dentro del lote: ordenadas por cancha e inicio, una fila choca
+    con alguna anterior si empieza antes del fin más tardío visto."""
+    libres, chocan = [], []
+    fin_visto = {}
+    for fila in sorted(filas, key=lambda f: (f[3], f[4], f[0])):
+        linea, usuario, uid, cancha, inicio, fin = fila
+        desde, hasta = inicio.strftime("%Y-%m-%d %H:%M:%S"), fin.strftime("%Y-%m-%d %H:%M:%S")
+        if inicio < fin_visto.get(cancha, inicio):
+            chocan.append((fila, f"se superpone con otra reserva del archivo en la cancha {cancha}"))
+            continue
+        cur.execute(
+            "SELECT 1 FROM reservas WHERE cancha = %s AND fecha_inicio >= %s "
+            "AND fecha_inicio < %s AND fecha_fin > %s LIMIT 1",
+            (cancha, (inicio - margen).strftime("%Y-%m-%d %H:%M:%S"), hasta, desde)
+        )
+        if cur.fetchone():
+            chocan.append((fila, f"se superpone con una reserva existente en la cancha {cancha}"))
+            continue
+        cur.execute(
+            "SELECT 1 FROM bloqueos_cancha WHERE cancha = %s "
+            "AND fecha_inicio < %s AND fecha_fin > %s LIMIT 1",
+            (cancha, hasta, desde)
+        )
+        if cur.fetchone():
+            chocan.append((fila, f"la cancha {cancha} está bloqueada en ese horario"))
+            continue
+        fin_visto[cancha] = max(fin, fin_visto.get(cancha, fin))
+        libres.append((uid, cancha, desde, hasta))
+    return libres, chocan
+
+
+def importar_reservas(filas, lote=1000, reporte=None):
+    pool, storage = backendPRUEBA.get_pool(), backendPRUEBA.get_storage()
+    rm = ReservationManager()
+    cuentas = {'leidas': 0, 'insertadas': 0, 'invalidas': 0, 'rechazadas': 0}
+    rechazar = reporte or (lambda linea, usuario, motivo: None)
+    manana = datetime.combine(datetime.today().date() + timedelta(days=1), datetime.min.time())
+    insertar = ("INSERT INTO reservas (usuario_id, cancha, fecha_inicio, fecha_fin) "
+                "VALUES (%s, %s, %s, %s)")
+    # Una reserva dura a lo sumo el turno más largo, salvo el historial
+    # importado: el margen crece con la más larga que se vio en el archivo
+    margen = timedelta(minutes=max(rm.DURACIONES))
+
+    for bloque in en_lotes(filas, lote):
+        validas = []
+        for linea, fila in bloque:
+            cuentas['leidas'] += 1
+            datos = _validar_reserva(fila)
+            if isinstance(datos, str):
+                cuentas['invalidas'] += 1
+                rechazar(linea, fila.get('usuario') or fila.get('usuario_id'), datos)
+            else:
+                validas.append((linea,) + datos)
+
+        # Nombres -> ids en una consulta por lote
+        nombres = sorted({v[1] for v in validas if v[2] is None})
+        ids = {}
+        if nombres:
+            with pool.connection() as db, db.cursor() as cur:
+                marcas = ", ".join(["%s"] * len(nombres))
+                cur.execute(f"SELECT usuario, id FROM usuarios WHERE usuario IN ({marcas})", nombres)
+                ids = dict(cur.fetchall())
+
+        historial, futuras = [], []
+        for linea, usuario, usuario_id, cancha, inicio, fin in validas:
+            uid = usuario_id if usuario_id is not None else ids.get(usuario)
+            if uid is None:
+                cuentas['invalidas'] += 1
+                rechazar(linea, usuario, "usuario inexistente")
+            elif inicio < manana:
+                historial.append((linea, usuario, uid, cancha, inicio, fin))
+                margen = max(margen, fin - inicio)
+            else:
+                futuras.append((linea, usuario, uid, cancha, inicio, fin))
+
+        if historial:
+            with pool.connection() as db, db.cursor() as cur:
+                storage.begin(cur)
+                try:
+                    libres, chocan = _choques_historial(cur, historial, margen)
+                    if libres:
+                        cur.executemany(insertar, libres)
+                        analitica.registrar(cur, storage, libres)
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    raise
+            cuentas['insertadas'] += len(libres)
+            cuentas['rechazadas'] += len(chocan)
+            for (linea, usuario, *_), motivo in sorted(chocan, key=lambda c: c[0][0]):
+                rechazar(linea, usuario, motivo)
+
+        for linea, usuario, uid, cancha, inicio, fin in futuras:
+            minutos = int((fin - inicio).total_seconds() // 60)
+            ok, msg = rm.reservar_intervalo(uid, inicio.strftime("%Y-%m-%d"),
+                                            inicio.strftime("%H:%M:%S"), minutos, cancha)
+            if ok:
+                cuentas['insertadas'] += 1
+            else:
+                cuentas['rechazadas'] += 1
+                rechazar(linea, usuario, msg)
+    return cuentas
+
+
+def exportar_reservas(escritor, desde=None, hasta=None, cancha=None, lote=1000):
+    pool, storage = backendPRUEBA.get_pool(), backendPRUEBA.get_storage()
+    where, params = ReservationManager(pool)._reservations_filter(desde, hasta, cancha)
+    sql = (
+        f"SELECT u.usuario, r.cancha, {storage.fmt_datetime('r.fecha_inicio')}, "
+        f"{storage.fmt_datetime('r.fecha_fin')} "
+        "FROM reservas r JOIN usuarios u ON r.usuario_id = u.id "
+        + ("WHERE " + " AND ".join(where) + " " if where else "") +
+        "ORDER BY r.fecha_inicio, r.id"
+    )
+    n = 0
+    with pool.connection() as db:
+        cur = storage.server_cursor(db)
+        try:
+            cur.execute(sql, params)
+            while True:
+                filas = cur.fetchmany(lote)
+                if not filas:
+                    break
+                for fila in filas:
+                    escritor.escribir(dict(zip(CAMPOS_RESERVAS, fila)))
+                n += len(filas)
+        finally:
+            cur.close()
+    return n
+
+
+# ---------------------- línea de comandos ----------------------
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('accion', choices=('importar', 'exportar'))
+    ap.add_argument('tabla', choices=('usuarios', 'reservas'))
+    ap.add_argument('archivo', help="ruta del archivo ('-' para stdin/stdout)")
+    ap.add_argument('--formato', choices=('csv', 'jsonl'))
+    ap.add_argument('--lote', type=int, default=1000, help="filas por transacción")
+    ap.add_argument('--procesos', type=int, default=os.cpu_count() or 1,
+                    help="procesos para hashear claves (0: sin pool)")
+    ap.add_argument('--reporte', help="CSV con las filas salteadas y el motivo")
+    ap.add_argument('--desde'), ap.add_argument('--hasta')
+    ap.add_argument('--cancha', type=int)
+    ap.add_argument('--engine', choices=('mysql', 'sqlite'), default='mysql')
+    ap.add_argument('--sqlite-path', default='padelclub.db')
+    args = ap.parse_args()
+
+    if args.engine == 'sqlite':
+        backendPRUEBA.configure_storage('sqlite', sqlite_path=args.sqlite_path)
+    formato = formato_de(args.archivo, args.formato)
+    t0 = time.perf_counter()
+
+    if args.accion == 'exportar':
+        campos = CAMPOS_USUARIOS if args.tabla == 'usuarios' else CAMPOS_RESERVAS
+        archivo = _abrir(args.archivo, 'w')
+        try:
+            escritor = Escritor(archivo, formato, campos)
+            if args.tabla == 'usuarios':
+                n = exportar_usuarios(escritor, args.lote)
+            else:
+                n = exportar_reservas(escritor, args.desde, args.hasta, args.cancha, args.lote)
+        finally:
+            if archivo is not sys.stdout:
+                archivo.close()
+        print(f"{n} filas exportadas en {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+        return
+
+    archivo_reporte = reporte = None
+    if args.reporte:
+        archivo_reporte = _abrir(args.reporte, 'w')
+        escritor_reporte = csv.writer(archivo_reporte)
+        escritor_reporte.writerow(('linea', 'usuario', 'motivo'))
+        reporte = lambda linea, usuario, motivo: escritor_reporte.writerow((linea, usuario, motivo))
+    archivo = _abrir(args.archivo, 'r')
+    try:
+        filas = leer_filas(archivo, formato)
+        if args.tabla == 'usuarios':
+            cuentas = importar_usuarios(filas, args.lote, args.procesos, reporte)
+        else:
+            cuentas = importar_reservas(filas, args.lote, reporte)
+    finally:
+        if archivo is not sys.stdin:
+            archivo.close()
+        if archivo_reporte is not None:
+            archivo_reporte.close()
+    duracion = time.perf_counter() - t0
+    print(", ".join(f"{k}: {v}" for k, v in cuentas.items())
+          + f" ({duracion:.1f}s, {cuentas['leidas'] / duracion if duracion else 0:.0f} filas/s)",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
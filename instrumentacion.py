@@ -0,0 +1,274 @@
+"""Perfilado de consultas para UsuarioManager y ReservationManager.
+
+`QueryProfiler` envuelve las conexiones que crea el pool: con el perfilado
+activo, cada `cursor.execute` registra su latencia en un histograma por
+sentencia, cuenta filas devueltas y deja en el log las consultas que
+superan `slow_threshold`. Los métodos decorados con `timed` suman un
+histograma por método, y también se cuentan aperturas y cierres de
+conexión. Apagado, `cursor()` devuelve el cursor original y los métodos
+solo pagan un `if`.
+
+    query_profiler.enable()
+    ...
+    print(query_profiler.to_prometheus())
+"""
+import functools
+import json
+import logging
+import threading
+import time
+
+log = logging.getLogger('padelclub.sql')
+
+# Límites superiores de los buckets, en segundos (estilo Prometheus)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'count', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)     # el último es +Inf
+        self.total  = 0.0
+        self.count  = 0
+        self.max    = 0.0
+
+    def observe(self, segundos):
+        i = 0
+        while i < len(BUCKETS) and segundos > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += segundos
+        self.count += 1
+        if segundos > self.max:
+            self.max = segundos
+
+    def to_dict(self):
+        acumulado, buckets = 0, {}
+        for limite, n in zip(BUCKETS + (float('inf'),), self.counts):
+            acumulado += n
+            buckets['+Inf' if limite == float('inf') else repr(limite)] = acumulado
+        return {
+            'count':   self.count,
+            'sum_s':   self.total,
+            'avg_ms':  self.total / self.count * 1000 if self.count else 0.0,
+            'max_ms':  self.max * 1000,
+            'buckets': buckets,
+        }
+
+
+class QueryProfiler:
+    def __init__(self, enabled=False, slow_threshold=0.2):
+        self.enabled        = enabled
+        self.slow_threshold = slow_threshold
+        self._lock = threading.Lock()
+        self.reset()
+
+    def enable(self, slow_threshold=None):
+        if slow_threshold is not None:
+            self.slow_threshold = slow_threshold
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._statements = {}   # sql normalizado -> [Histogram, filas, errores]
+            self._methods    = {}   # 'Clase.metodo' -> [Histogram, errores]
+            self._opened     = 0
+            self._closed     = 0
+            self._slow       = 0
+
+    # ---------------------- puntos de enganche ----------------------
+    def wrap_connection(self, conn):
+        """Para la fábrica del pool: devuelve la conexión envuelta."""
+        if self.enabled:
+            with self._lock:
+                self._opened += 1
+        return _ProfiledConnection(conn, self)
+
+    def timed(self, fn):
+        """Decorador de métodos de los managers: histograma por método."""
+        nombre = fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            error = False
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                self._record_method(nombre, time.perf_counter() - t0, error)
+        return wrapper
+
+    # ---------------------- registro ----------------------
+    def _record_query(self, sql, segundos, filas=0, error=False):
+        clave = " ".join(sql.split())
+        with self._lock:
+            entrada = self._statements.get(clave)
+            if entrada is None:
+                entrada = self._statements[clave] = [Histogram(), 0, 0]
+            entrada[0].observe(segundos)
+            entrada[1] += filas
+            entrada[2] += error
+            lenta = segundos >= self.slow_threshold
+            if lenta:
+                self._slow += 1
+        if lenta:
+            # Sin parámetros: pueden llevar hashes de contraseñas
+            log.warning("Consulta lenta (%.1f ms): %s", segundos * 1000, clave)
+
+    def _record_rows(self, sql, filas):
+        clave = " ".join(sql.split())
+        with self._lock:
+            entrada = self._statements.get(clave)
+            if entrada is not None:
+                entrada[1] += filas
+
+    def _record_method(self, nombre, segundos, error):
+        with self._lock:
+            entrada = self._methods.get(nombre)
+            if entrada is None:
+                entrada = self._methods[nombre] = [Histogram(), 0]
+            entrada[0].observe(segundos)
+            entrada[1] += error
+
+    def _record_close(self):
+        with self._lock:
+            self._closed += 1
+
+    # ---------------------- lectura ----------------------
+    def snapshot(self):
+        with self._lock:
+            return {
+                'enabled':            self.enabled,
+                'slow_threshold_ms':  self.slow_threshold * 1000,
+                'slow_queries':       self._slow,
+                'connections_opened': self._opened,
+                'connections_closed': self._closed,
+                'statements': {sql: dict(h.to_dict(), rows=filas, errors=err)
+                               for sql, (h, filas, err) in self._statements.items()},
+                'methods': {m: dict(h.to_dict(), errors=err)
+                            for m, (h, err) in self._methods.items()},
+            }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self):
+        """Exposición en formato de texto de Prometheus."""
+        datos = self.snapshot()
+        lineas = []
+
+        def histograma(metrica, etiqueta, valor, h):
+            lbl = f'{etiqueta}="{_escape(valor)}"'
+            for le, n in h['buckets'].items():
+                lineas.append(f'{metrica}_bucket{{{lbl},le="{le}"}} {n}')
+            lineas.append(f'{metrica}_sum{{{lbl}}} {h["sum_s"]}')
+            lineas.append(f'{metrica}_count{{{lbl}}} {h["count"]}')
+
+        lineas.append("# HELP padelclub_query_seconds Latencia por sentencia SQL.")
+        lineas.append("# TYPE padelclub_query_seconds histogram")
+        for sql, h in datos['statements'].items():
+            histograma('padelclub_query_seconds', 'statement', sql, h)
+        lineas.append("# HELP padelclub_query_rows_total Filas devueltas por sentencia.")
+        lineas.append("# TYPE padelclub_query_rows_total counter")
+        for sql, h in datos['statements'].items():
+            lineas.append(f'padelclub_query_rows_total{{statement="{_escape(sql)}"}} {h["rows"]}')
+        lineas.append("# HELP padelclub_method_seconds Latencia por método de los managers.")
+        lineas.append("# TYPE padelclub_method_seconds histogram")
+        for metodo, h in datos['methods'].items():
+            histograma('padelclub_method_seconds', 'method', metodo, h)
+        lineas.append("# TYPE padelclub_slow_queries_total counter")
+        lineas.append(f"padelclub_slow_queries_total {datos['slow_queries']}")
+        lineas.append("# TYPE padelclub_connections_opened_total counter")
+        lineas.append(f"padelclub_connections_opened_total {datos['connections_opened']}")
+        lineas.append("# TYPE padelclub_connections_closed_total counter")
+        lineas.append(f"padelclub_connections_closed_total {datos['connections_closed']}")
+        return "\n".join(lineas) + "\n"
+
+
+def _escape(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _ProfiledConnection:
+    """Conexión que entrega cursores medidos mientras el perfilado esté activo."""
+
+    def __init__(self, conn, profiler):
+        self._conn = conn
+        self._profiler = profiler
+
+    def cursor(self, *args):
+        cur = self._conn.cursor(*args)
+        if not self._profiler.enabled:
+            return cur
+        return _ProfiledCursor(cur, self._profiler)
+
+    def close(self):
+        if self._profiler.enabled:
+            self._profiler._record_close()
+        self._conn.close()
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+
+class _ProfiledCursor:
+    def __init__(self, cur, profiler):
+        self._cur = cur
+        self._profiler = profiler
+        self._sql = ""
+
+    def execute(self, sql, params=None):
+        self._sql = sql
+        t0 = time.perf_counter()
+        try:
+            resultado = self._cur.execute(sql, params)
+        except Exception:
+            self._profiler._record_query(sql, time.perf_counter() - t0, error=True)
+            raise
+        self._profiler._record_query(sql, time.perf_counter() - t0)
+        return resultado
+
+    def executemany(self, sql, seq):
+        self._sql = sql
+        t0 = time.perf_counter()
+        try:
+            resultado = self._cur.executemany(sql, seq)
+        except Exception:
+            self._profiler._record_query(sql, time.perf_counter() - t0, error=True)
+            raise
+        self._profiler._record_query(sql, time.perf_counter() - t0)
+        return resultado
+
+    def fetchone(self):
+        fila = self._cur.fetchone()
+        if fila is not None:
+            self._profiler._record_rows(self._sql, 1)
+        return fila
+
+    def fetchmany(self, size):
+        filas = self._cur.fetchmany(size)
+        self._profiler._record_rows(self._sql, len(filas))
+        return filas
+
+    def fetchall(self):
+        filas = self._cur.fetchall()
+        self._profiler._record_rows(self._sql, len(filas))
+        return filas
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cur.close()
+
+    def __getattr__(self, nombre):
+        return getattr(self._cur, nombre)
@@ -0,0 +1,139 @@
+import bisect
+import threading
+
+
+def a_minutos(hora):
+    """'HH:MM[:SS]' -> minutos desde la medianoche."""
+    h, m = hora.split(':')[:2]
+    return int(h) * 60 + int(m)
+
+
+def a_hora(minutos):
+    return f"{minutos // 60:02d}:{minutos % 60:02d}:00"
+
+
+class CourtSchedule:
+    """Ocupación de una cancha en un día: intervalos [inicio, fin) en minutos,
+    disjuntos y ordenados. Al ser disjuntos, los fines quedan ordenados igual
+    que los inicios y alcanza con mirar el vecino anterior del punto de
+    búsqueda: cada consulta es una bisección."""
+    __slots__ = ('inicios', 'fines')
+
+    def __init__(self):
+        self.inicios = []
+        self.fines   = []
+
+    def is_free(self, a, b):
+        i = bisect.bisect_left(self.inicios, b)
+        return i == 0 or self.fines[i - 1] <= a
+
+    def add(self, a, b):
+        """Agrega [a, b). Si pisa intervalos existentes (bloqueos que se
+        superponen entre sí) se fusionan: el índice guarda ocupación."""
+        i = bisect.bisect_left(self.fines, a + 1)       # primero con fin > a
+        j = bisect.bisect_left(self.inicios, b)         # primero con inicio >= b
+        if i < j:
+            a = min(a, self.inicios[i])
+            b = max(b, self.fines[j - 1])
+        self.inicios[i:j] = [a]
+        self.fines[i:j]   = [b]
+
+    def remove(self, a, b):
+        """Quita exactamente [a, b); devuelve False si no estaba así (fusionado)."""
+        i = bisect.bisect_left(self.inicios, a)
+        if i < len(self.inicios) and self.inicios[i] == a and self.fines[i] == b:
+            del self.inicios[i], self.fines[i]
+            return True
+        return False
+
+    def gaps(self, apertura, cierre):
+        """Huecos libres [a, b) entre `apertura` y `cierre`."""
+        huecos, desde = [], apertura
+        i = bisect.bisect_right(self.fines, apertura)
+        while i < len(self.inicios) and self.inicios[i] < cierre:
+            if self.inicios[i] > desde:
+                huecos.append((desde, self.inicios[i]))
+            desde = max(desde, self.fines[i])
+            i += 1
+        if desde < cierre:
+            huecos.append((desde, cierre))
+        return huecos
+
+
+class IntervalIndex:
+    """Reservas y bloqueos de mantenimiento de la ventana, por día y cancha.
+
+    Igual que `AvailabilityBitmap`, cada día recuerda la versión de
+    `canchas_version` con la que se cargó; el dueño recarga los días que
+    cambiaron. Entre recargas se mantiene con `add`/`remove` después de
+    cada escritura propia.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._days = {}         # 'AAAA-MM-DD' -> {cancha: CourtSchedule}
+        self._versions = {}
+
+    def load_day(self, fecha, filas, version=None):
+        """Reemplaza un día con filas (cancha, inicio, fin), horas 'HH:MM:SS'."""
+        canchas = {}
+        for cancha, inicio, fin in sorted(filas, key=lambda f: (f[0], f[1])):
+            # Un intervalo que termina a la medianoche del día siguiente
+            b = a_minutos(fin) or 24 * 60
+            canchas.setdefault(cancha, CourtSchedule()).add(a_minutos(inicio), b)
+        with self._lock:
+            self._days[fecha] = canchas
+            self._versions[fecha] = version
+
+    def drop_before(self, fecha):
+        with self._lock:
+            for f in [f for f in self._days if f < fecha]:
+                del self._days[f]
+                self._versions.pop(f, None)
+
+    def version(self, fecha):
+        with self._lock:
+            return self._versions.get(fecha)
+
+    def invalidate(self, fecha):
+        """Fuerza a recargar el día en la próxima sincronización."""
+        with self._lock:
+            self._versions[fecha] = None
+
+    # ---------------------- consultas ----------------------
+    def is_free(self, fecha, cancha, inicio, minutos):
+        a = a_minutos(inicio)
+        with self._lock:
+            agenda = self._days.get(fecha, {}).get(cancha)
+            return agenda is None or agenda.is_free(a, a + minutos)
+
+    def free_courts(self, fecha, inicio, minutos, canchas):
+        """De `canchas`, las libres durante [inicio, inicio + minutos)."""
+        a = a_minutos(inicio)
+        with self._lock:
+            dia = self._days.get(fecha, {})
+            return [c for c in canchas
+                    if c not in dia or dia[c].is_free(a, a + minutos)]
+
+    def gaps(self, fecha, cancha, apertura, cierre):
+        """Huecos libres de la cancha entre dos horas, como ('HH:MM:SS', 'HH:MM:SS')."""
+        with self._lock:
+            agenda = self._days.get(fecha, {}).get(cancha) or CourtSchedule()
+            huecos = agenda.gaps(a_minutos(apertura), a_minutos(cierre))
+        return [(a_hora(a), a_hora(b)) for a, b in huecos]
+
+    # ---------------------- actualización ----------------------
+    def add(self, fecha, cancha, inicio, minutos):
+        a = a_minutos(inicio)
+        with self._lock:
+            dia = self._days.get(fecha)
+            if dia is not None:
+                dia.setdefault(cancha, CourtSchedule()).add(a, a + minutos)
+
+    def remove(self, fecha, cancha, inicio, minutos):
+        a = a_minutos(inicio)
+        with self._lock:
+            agenda = self._days.get(fecha, {}).get(cancha)
+            if agenda is not None and not agenda.remove(a, a + minutos):
+                # Estaba fusionado con un bloqueo: que se recargue el día
+                self._versions[fecha] = None
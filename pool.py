@@ -0,0 +1,172 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """No se pudo obtener una conexión del pool dentro del tiempo límite."""
+
+
+class ConnectionPool:
+    """Pool de conexiones acotado y seguro entre hilos.
+
+    Las conexiones se crean bajo demanda con `factory` hasta `max_size`.
+    Al prestarse se verifican (ping) si estuvieron ociosas más de
+    `ping_after` segundos, se descartan si superaron `idle_timeout` sin
+    uso y se reciclan al cumplir `max_lifetime` desde su creación.
+    """
+
+    def __init__(self, factory, max_size=10, timeout=10.0,
+                 idle_timeout=300.0, max_lifetime=3600.0, ping_after=30.0):
+        self.factory      = factory
+        self.max_size     = max_size
+        self.timeout      = timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after   = ping_after
+
+        self._cond    = threading.Condition()
+        self._idle    = []      # [(conexion, creada, ultimo_uso)], LIFO
+        self._created = {}      # id(conexion) -> momento de creación
+        self._pending = 0       # conexiones que se están abriendo
+        self._closed  = False
+
+        # Métricas
+        self._checkouts   = 0
+        self._wait_total  = 0.0
+        self._wait_max    = 0.0
+        self._n_created   = 0
+        self._n_discarded = 0
+
+    # ---------------------- préstamo / devolución ----------------------
+    def acquire(self, timeout=None):
+        """Presta una conexión; espera hasta `timeout` si el pool está lleno."""
+        timeout = self.timeout if timeout is None else timeout
+        inicio = time.monotonic()
+        limite = inicio + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("El pool está cerrado")
+                conn = self._take_idle()
+                if conn is not None:
+                    self._count_checkout(inicio)
+                    return conn
+                if len(self._created) + self._pending < self.max_size:
+                    # Reservar el lugar y conectar fuera del lock
+                    self._pending += 1
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise PoolTimeout(
+                        f"Sin conexiones libres tras {timeout:.1f}s "
+                        f"(max_size={self.max_size})"
+                    )
+                self._cond.wait(restante)
+
+        try:
+            conn = self.factory()
+        except Exception:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._pending -= 1
+            self._created[id(conn)] = time.monotonic()
+            self._n_created += 1
+            self._count_checkout(inicio)
+        return conn
+
+    def release(self, conn):
+        """Devuelve una conexión al pool cerrando cualquier transacción abierta."""
+        with self._cond:
+            creada = self._created.get(id(conn))
+        if creada is None:
+            return
+        try:
+            # Termina la transacción implícita para no arrastrar un snapshot viejo
+            conn.rollback()
+            sana = True
+        except Exception:
+            sana = False
+
+        ahora = time.monotonic()
+        with self._cond:
+            if (not sana or self._closed
+                    or ahora - creada >= self.max_lifetime):
+                self._discard(conn)
+            else:
+                self._idle.append((conn, creada, ahora))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Uso: `with pool.connection() as db: ...`"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Cierra las conexiones ociosas; las prestadas se cierran al volver."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _, _ = self._idle.pop()
+                self._discard(conn)
+            self._cond.notify_all()
+
+    # ---------------------- métricas ----------------------
+    def metrics(self):
+        with self._cond:
+            return {
+                'checkouts':          self._checkouts,
+                'wait_total_s':       self._wait_total,
+                'wait_avg_s':         self._wait_total / self._checkouts if self._checkouts else 0.0,
+                'wait_max_s':         self._wait_max,
+                'connections_created':   self._n_created,
+                'connections_discarded': self._n_discarded,
+                'open':               len(self._created),
+                'idle':               len(self._idle),
+                'in_use':             len(self._created) - len(self._idle),
+                'max_size':           self.max_size,
+            }
+
+    # ---------------------- internos (con el lock tomado) ----------------------
+    def _take_idle(self):
+        ahora = time.monotonic()
+        while self._idle:
+            conn, creada, ultimo_uso = self._idle.pop()
+            if (ahora - ultimo_uso >= self.idle_timeout
+                    or ahora - creada >= self.max_lifetime):
+                self._discard(conn)
+                continue
+            if ahora - ultimo_uso >= self.ping_after and not self._ping(conn):
+                self._discard(conn)
+                continue
+            return conn
+        return None
+
+    def _count_checkout(self, inicio):
+        espera = time.monotonic() - inicio
+        self._checkouts  += 1
+        self._wait_total += espera
+        self._wait_max    = max(self._wait_max, espera)
+
+    def _discard(self, conn):
+        self._created.pop(id(conn), None)
+        self._n_discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _ping(conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
@@ -0,0 +1,206 @@
+"""Lecturas repartidas entre réplicas; escrituras siempre al primario.
+
+`ReplicaRouter` elige de qué pool leer:
+
+- Sin réplicas configuradas (o sin ninguna sana) lee del primario, así que
+  el mismo código sirve para una sola base.
+- Las réplicas sanas se turnan (round robin). Un chequeo periódico, en un
+  hilo aparte, mide el atraso de cada una y saca las que pasan `max_lag`
+  segundos o no responden; vuelven solas cuando el chequeo pasa.
+- Si una réplica no da conexión, o se corta en medio de una lectura hecha
+  con `read`, la lectura se hace en el primario en el momento (failover) y
+  la réplica queda fuera hasta el próximo chequeo. `connection` (para
+  cursores que se consumen de a poco) solo cubre el primer caso.
+- Leer lo propio: después de escribir, el dueño anota claves con
+  `note_write` (p. ej. ('fecha', '2025-06-01') o ('usuario', 7)). Las
+  lecturas que pasan alguna de esas claves van al primario durante
+  `read_your_writes` segundos, más que el atraso tolerado.
+"""
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+log = logging.getLogger('padelclub.replicas')
+
+
+class ReplicaRouter:
+    def __init__(self, primary, replicas=(), storage=None, check_interval=5.0,
+                 max_lag=5.0, read_your_writes=5.0, acquire_timeout=2.0, clock=time.monotonic):
+        self.primary          = primary
+        self.replicas         = list(replicas)      # [(nombre, pool)]
+        self.storage          = storage
+        self.check_interval   = check_interval
+        self.max_lag          = max_lag
+        self.read_your_writes = read_your_writes
+        self.acquire_timeout  = acquire_timeout
+        self.clock            = clock
+
+        self._lock       = threading.Lock()
+        self._healthy    = tuple(pool for _, pool in self.replicas)
+        self._lag        = {nombre: None for nombre, _ in self.replicas}
+        self._turn       = itertools.count()
+        self._writes     = {}       # clave -> hasta cuándo se lee del primario
+        self._next_check = 0.0
+        self._checking   = False
+
+        # Métricas
+        self._reads_primary = 0
+        self._reads_replica = 0
+        self._failovers     = 0
+
+    # ---------------------- leer lo propio ----------------------
+    def note_write(self, *claves):
+        """Las próximas lecturas con alguna de estas claves van al primario."""
+        if not self.replicas:
+            return
+        hasta = self.clock() + self.read_your_writes
+        with self._lock:
+            for clave in claves:
+                self._writes[clave] = hasta
+            if len(self._writes) > 10000:
+                ahora = self.clock()
+                self._writes = {c: t for c, t in self._writes.items() if t > ahora}
+
+    def _recent_write(self, claves):
+        ahora = self.clock()
+        return any(self._writes.get(c, 0.0) > ahora for c in claves)
+
+    # ---------------------- ruteo ----------------------
+    def pool_for_read(self, *claves):
+        if not self.replicas:
+            return self.primary
+        self._maybe_check()
+        sanas = self._healthy
+        if not sanas or self._recent_write(claves):
+            return self.primary
+        return sanas[next(self._turn) % len(sanas)]
+
+    @contextmanager
+    def connection(self, *claves, prestada=None):
+        """Conexión de lectura. `prestada` es una conexión del primario que el
+        llamador ya tiene: si la lectura va al primario se usa esa, en lugar
+        de pedir otra al pool."""
+        pool = self.pool_for_read(*claves)
+        conn = None
+        if pool is not self.primary:
+            try:
+                conn = pool.acquire(timeout=self.acquire_timeout)
+            except Exception as e:
+                self._mark_down(pool, e)
+                pool = self.primary
+        if pool is self.primary:
+            self._reads_primary += 1
+            if prestada is not None:
+                yield prestada
+                return
+            conn = pool.acquire()
+        else:
+            self._reads_replica += 1
+        try:
+            yield conn
+        except Exception as e:
+            if pool is not self.primary and self.storage and self.storage.is_disconnect(e):
+                self._mark_down(pool, e)
+            raise
+        finally:
+            pool.release(conn)
+
+    def read(self, fn, *claves, prestada=None):
+        """Corre `fn(cursor)` en una conexión de lectura y devuelve su
+        resultado. Si la réplica se desconecta mientras tanto, queda fuera y
+        `fn` se repite una vez en el primario, así que tiene que poder correr
+        de nuevo desde cero (consultas y cargas idempotentes)."""
+        pool = self.pool_for_read(*claves)
+        if pool is not self.primary:
+            try:
+                conn = pool.acquire(timeout=self.acquire_timeout)
+            except Exception as e:
+                self._mark_down(pool, e)
+            else:
+                self._reads_replica += 1
+                try:
+                    with conn.cursor() as cur:
+                        return fn(cur)
+                except Exception as e:
+                    if not (self.storage and self.storage.is_disconnect(e)):
+                        raise
+                    self._mark_down(pool, e)
+                finally:
+                    pool.release(conn)
+        self._reads_primary += 1
+        if prestada is not None:
+            with prestada.cursor() as cur:
+                return fn(cur)
+        conn = self.primary.acquire()
+        try:
+            with conn.cursor() as cur:
+                return fn(cur)
+        finally:
+            self.primary.release(conn)
+
+    def _mark_down(self, pool, exc):
+        with self._lock:
+            self._healthy = tuple(p for p in self._healthy if p is not pool)
+            self._failovers += 1
+        nombre = next((n for n, p in self.replicas if p is pool), '?')
+        log.warning("Réplica %s fuera de servicio: %s", nombre, exc)
+
+    # ---------------------- chequeo de salud ----------------------
+    def _maybe_check(self):
+        if self.clock() < self._next_check:
+            return
+        with self._lock:
+            if self._checking or self.clock() < self._next_check:
+                return
+            self._checking = True
+        threading.Thread(target=self.check, name='replicas-check', daemon=True).start()
+
+    def check(self):
+        """Mide cada réplica y rearma la lista de sanas. Devuelve {nombre: atraso}
+        (None si no respondió o no está replicando)."""
+        sanas, atrasos = [], {}
+        try:
+            for nombre, pool in self.replicas:
+                atrasos[nombre] = lag = self._measure(nombre, pool)
+                if lag is not None and lag <= self.max_lag:
+                    sanas.append(pool)
+        finally:
+            with self._lock:
+                if atrasos:
+                    self._healthy = tuple(sanas)
+                    self._lag.update(atrasos)
+                self._next_check = self.clock() + self.check_interval
+                self._checking = False
+        return atrasos
+
+    def _measure(self, nombre, pool):
+        try:
+            conn = pool.acquire(timeout=self.acquire_timeout)
+        except Exception as e:
+            log.warning("Réplica %s no responde: %s", nombre, e)
+            return None
+        try:
+            return self.storage.replica_lag(conn) if self.storage else 0
+        except Exception as e:
+            log.warning("Réplica %s: no se pudo medir el atraso: %s", nombre, e)
+            return None
+        finally:
+            pool.release(conn)
+
+    # ---------------------- varios ----------------------
+    def metrics(self):
+        sanas = self._healthy
+        return {
+            'replicas':      {n: {'sana': p in sanas, 'atraso': self._lag[n]}
+                              for n, p in self.replicas},
+            'reads_primary': self._reads_primary,
+            'reads_replica': self._reads_replica,
+            'failovers':     self._failovers,
+        }
+
+    def close(self):
+        """Cierra los pools de las réplicas (el primario es de su dueño)."""
+        for _, pool in self.replicas:
+            pool.close()
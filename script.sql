@@ -16,7 +16,48 @@ CREATE TABLE IF NOT EXISTS reservas (
     cancha INT NOT NULL,
     fecha_inicio DATETIME NOT NULL,
     fecha_fin DATETIME NOT NULL,
-    FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+    FOREIGN KEY (usuario_id) REFERENCES usuarios(id),
+    -- Listados paginados por fecha (InnoDB agrega el id al final del índice)
+    INDEX idx_reservas_fecha (fecha_inicio),
+    -- Filtro por cancha dentro de un rango de fechas
+    INDEX idx_reservas_cancha (cancha, fecha_inicio),
+    -- "Mis reservas": las de un jugador, próximas o pasadas, en orden
+    INDEX idx_reservas_usuario (usuario_id, fecha_inicio)
+);
+
+-- Resúmenes de ocupación, mantenidos en la misma transacción que cada
+-- reserva o cancelación (ver analitica.py; `python analitica.py
+-- reconstruir` los rehace desde reservas). Los reportes leen solo estas
+-- tablas: unas pocas filas por día aunque haya años de historial.
+CREATE TABLE IF NOT EXISTS ocupacion_horaria (
+    fecha DATE NOT NULL,
+    cancha INT NOT NULL,
+    hora TINYINT NOT NULL,          -- 0..23: minutos jugados dentro de esa hora
+    reservas INT NOT NULL DEFAULT 0,    -- reservas que empiezan en esa hora
+    minutos INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, cancha, hora)
+);
+
+CREATE TABLE IF NOT EXISTS uso_jugador (
+    mes DATE NOT NULL,              -- primer día del mes
+    usuario_id INT NOT NULL,
+    reservas INT NOT NULL DEFAULT 0,
+    minutos INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (mes, usuario_id)
+);
+
+-- Lista de espera por franja (hora en punto). Al cancelarse una reserva,
+-- el primero que espera se queda con la cancha liberada.
+CREATE TABLE IF NOT EXISTS lista_espera (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    usuario_id INT NOT NULL,
+    fecha_hora DATETIME NOT NULL,
+    estado ENUM('esperando', 'asignada', 'cancelada') NOT NULL DEFAULT 'esperando',
+    reserva_id INT NULL,
+    creada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (usuario_id) REFERENCES usuarios(id),
+    -- El primero de la cola de cada franja sale por índice
+    INDEX idx_espera_franja (fecha_hora, estado, id)
 );
 
 -- Tabla de torneos
@@ -28,11 +69,91 @@ CREATE TABLE IF NOT EXISTS torneos (
     ubicacion VARCHAR(100)
 );
 
--- Tabla de inscripciones a torneos
+-- Tabla de inscripciones a torneos (en dobles, los dos jugadores de una
+-- pareja comparten `equipo`: el menor de sus ids; en singles es el propio)
 CREATE TABLE IF NOT EXISTS inscripciones_torneo (
     id INT AUTO_INCREMENT PRIMARY KEY,
     torneo_id INT NOT NULL,
     usuario_id INT NOT NULL,
+    equipo INT NOT NULL,
     FOREIGN KEY (torneo_id) REFERENCES torneos(id),
-    FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+    FOREIGN KEY (usuario_id) REFERENCES usuarios(id),
+    UNIQUE KEY uq_inscripcion (torneo_id, usuario_id)
 );
+
+-- Partidos de cada torneo. Un lado es un equipo ya conocido o el ganador
+-- de otro partido (origen_*); cancha y fecha_hora se llenan al programar.
+CREATE TABLE IF NOT EXISTS partidos_torneo (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    torneo_id INT NOT NULL,
+    numero INT NOT NULL,
+    ronda INT NOT NULL,
+    grupo INT NULL,
+    equipo_a INT NULL,
+    equipo_b INT NULL,
+    origen_a INT NULL,
+    origen_b INT NULL,
+    cancha INT NULL,
+    fecha_hora DATETIME NULL,
+    FOREIGN KEY (torneo_id) REFERENCES torneos(id),
+    UNIQUE KEY uq_partido (torneo_id, numero)
+);
+
+-- ------------------------------------------------------------------
+-- Migraciones de bases existentes. CREATE TABLE IF NOT EXISTS no toca
+-- una tabla que ya existe: las columnas e índices que se agregaron
+-- después se aplican acá. Todo el bloque se puede correr varias veces.
+-- ------------------------------------------------------------------
+DROP PROCEDURE IF EXISTS agregar_columna;
+DROP PROCEDURE IF EXISTS agregar_indice;
+
+DELIMITER $$
+CREATE PROCEDURE agregar_columna(tabla VARCHAR(64), columna VARCHAR(64), definicion TEXT)
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_schema = DATABASE() AND table_name = tabla
+                     AND column_name = columna) THEN
+        SET @ddl = CONCAT('ALTER TABLE ', tabla, ' ADD COLUMN ', columna, ' ', definicion);
+        PREPARE ddl FROM @ddl;
+        EXECUTE ddl;
+        DEALLOCATE PREPARE ddl;
+    END IF;
+END$$
+
+-- `definicion` es lo que va después de ADD: 'INDEX nombre (...)', 'UNIQUE KEY nombre (...)'
+CREATE PROCEDURE agregar_indice(tabla VARCHAR(64), indice VARCHAR(64), definicion TEXT)
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM information_schema.statistics
+                   WHERE table_schema = DATABASE() AND table_name = tabla
+                     AND index_name = indice) THEN
+        SET @ddl = CONCAT('ALTER TABLE ', tabla, ' ADD ', definicion);
+        PREPARE ddl FROM @ddl;
+        EXECUTE ddl;
+        DEALLOCATE PREPARE ddl;
+    END IF;
+END$$
+DELIMITER ;
+
+-- Torneos: `equipo` en las inscripciones. Las anteriores eran individuales,
+-- así que cada una es su propio equipo; se sacan inscripciones duplicadas
+-- (queda la primera) antes de crear la clave única.
+CALL agregar_columna('inscripciones_torneo', 'equipo', 'INT NULL AFTER usuario_id');
+UPDATE inscripciones_torneo SET equipo = usuario_id WHERE equipo IS NULL;
+ALTER TABLE inscripciones_torneo MODIFY COLUMN equipo INT NOT NULL;
+DELETE i FROM inscripciones_torneo i
+JOIN inscripciones_torneo o
+  ON o.torneo_id = i.torneo_id AND o.usuario_id = i.usuario_id AND o.id < i.id;
+CALL agregar_indice('inscripciones_torneo', 'uq_inscripcion',
+                    'UNIQUE KEY uq_inscripcion (torneo_id, usuario_id)');
+
+-- Reservas: listados paginados por fecha y filtro por cancha
+CALL agregar_indice('reservas', 'idx_reservas_fecha', 'INDEX idx_reservas_fecha (fecha_inicio)');
+CALL agregar_indice('reservas', 'idx_reservas_cancha',
+                    'INDEX idx_reservas_cancha (cancha, fecha_inicio)');
+
+-- "Mis reservas": las de un jugador, por fecha
+CALL agregar_indice('reservas', 'idx_reservas_usuario',
+                    'INDEX idx_reservas_usuario (usuario_id, fecha_inicio)');
+
+DROP PROCEDURE agregar_columna;
+DROP PROCEDURE agregar_indice;
@@ -0,0 +1,136 @@
+-- ------------------------------------------------------------------
+-- script_sqlite.sql: Esquema de script.sql + canchas.sql para SQLite
+-- (modo embebido: un solo kiosco, pruebas y benchmarks).
+-- Las fechas se guardan como texto 'AAAA-MM-DD HH:MM:SS'. El avance
+-- diario de la ventana (rodar_ventana en MySQL) lo hace storage.py.
+-- ------------------------------------------------------------------
+
+-- Tabla de usuarios
+CREATE TABLE IF NOT EXISTS usuarios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario VARCHAR(50) NOT NULL UNIQUE,
+    contraseña VARCHAR(255) NOT NULL,
+    tipo TEXT NOT NULL CHECK (tipo IN ('admin', 'jugador'))
+);
+
+-- Tabla de reservas
+CREATE TABLE IF NOT EXISTS reservas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario_id INTEGER NOT NULL REFERENCES usuarios(id),
+    cancha INTEGER NOT NULL,
+    fecha_inicio DATETIME NOT NULL,
+    fecha_fin DATETIME NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reservas_fecha ON reservas (fecha_inicio, id);
+CREATE INDEX IF NOT EXISTS idx_reservas_cancha ON reservas (cancha, fecha_inicio);
+CREATE INDEX IF NOT EXISTS idx_reservas_usuario ON reservas (usuario_id, fecha_inicio, id);
+
+-- Resúmenes de ocupación (ver analitica.py)
+CREATE TABLE IF NOT EXISTS ocupacion_horaria (
+    fecha DATE NOT NULL,
+    cancha INTEGER NOT NULL,
+    hora INTEGER NOT NULL,
+    reservas INTEGER NOT NULL DEFAULT 0,
+    minutos INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, cancha, hora)
+);
+
+CREATE TABLE IF NOT EXISTS uso_jugador (
+    mes DATE NOT NULL,
+    usuario_id INTEGER NOT NULL,
+    reservas INTEGER NOT NULL DEFAULT 0,
+    minutos INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (mes, usuario_id)
+);
+
+-- Lista de espera por franja
+CREATE TABLE IF NOT EXISTS lista_espera (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario_id INTEGER NOT NULL REFERENCES usuarios(id),
+    fecha_hora DATETIME NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'esperando'
+        CHECK (estado IN ('esperando', 'asignada', 'cancelada')),
+    reserva_id INTEGER,
+    creada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_espera_franja ON lista_espera (fecha_hora, estado, id);
+
+-- Tabla de torneos
+CREATE TABLE IF NOT EXISTS torneos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre VARCHAR(100) NOT NULL,
+    tipo TEXT NOT NULL CHECK (tipo IN ('singles', 'dobles')),
+    fecha DATE NOT NULL,
+    ubicacion VARCHAR(100)
+);
+
+-- Tabla de inscripciones a torneos (`equipo`: ver script.sql). En bases
+-- creadas antes de `equipo` la columna y la clave única las agrega
+-- SQLiteStorage.migrate (SQLite no tiene ADD COLUMN IF NOT EXISTS).
+CREATE TABLE IF NOT EXISTS inscripciones_torneo (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    torneo_id INTEGER NOT NULL REFERENCES torneos(id),
+    usuario_id INTEGER NOT NULL REFERENCES usuarios(id),
+    equipo INTEGER NOT NULL,
+    UNIQUE (torneo_id, usuario_id)
+);
+
+-- Partidos de cada torneo
+CREATE TABLE IF NOT EXISTS partidos_torneo (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    torneo_id INTEGER NOT NULL REFERENCES torneos(id),
+    numero INTEGER NOT NULL,
+    ronda INTEGER NOT NULL,
+    grupo INTEGER,
+    equipo_a INTEGER,
+    equipo_b INTEGER,
+    origen_a INTEGER,
+    origen_b INTEGER,
+    cancha INTEGER,
+    fecha_hora DATETIME,
+    UNIQUE (torneo_id, numero)
+);
+
+-- Configuración de la grilla
+CREATE TABLE IF NOT EXISTS config_reservas (
+    clave VARCHAR(50) PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO config_reservas (clave, valor) VALUES ('dias_ventana', 4);
+
+CREATE TABLE IF NOT EXISTS canchas (
+    numero INTEGER PRIMARY KEY
+);
+INSERT OR IGNORE INTO canchas (numero) VALUES (1), (2), (3), (4);
+
+CREATE TABLE IF NOT EXISTS franjas_horarias (
+    hora TEXT PRIMARY KEY
+);
+INSERT OR IGNORE INTO franjas_horarias (hora) VALUES
+    ('12:00:00'), ('16:00:00'), ('17:00:00'), ('18:00:00'), ('19:00:00');
+
+-- Una fila por (franja, cancha)
+CREATE TABLE IF NOT EXISTS slots (
+    fecha_hora DATETIME NOT NULL,
+    cancha_numero INTEGER NOT NULL,
+    disponible BOOLEAN NOT NULL DEFAULT 1,
+    personas_jugando INTEGER NOT NULL DEFAULT 0
+        CHECK (personas_jugando IN (0,1,2,4)),
+    PRIMARY KEY (fecha_hora, cancha_numero)
+) WITHOUT ROWID;
+
+-- Bloqueos de mantenimiento por cancha
+CREATE TABLE IF NOT EXISTS bloqueos_cancha (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    cancha INTEGER NOT NULL,
+    fecha_inicio DATETIME NOT NULL,
+    fecha_fin DATETIME NOT NULL,
+    motivo VARCHAR(100)
+);
+CREATE INDEX IF NOT EXISTS idx_bloqueos_cancha ON bloqueos_cancha (cancha, fecha_inicio);
+
+-- Versión por día para los cachés de disponibilidad
+CREATE TABLE IF NOT EXISTS canchas_version (
+    fecha DATE PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""Servidor HTTP/JSON sobre los managers de backendPRUEBA.
+
+Un solo proceso con un pool, un caché y un índice compartidos atiende a
+todos los kioscos: ningún cliente necesita credenciales de la base. Los
+kioscos hablan con `cliente.py` (frontend.py con PADEL_SERVIDOR=http://...).
+
+    python servidor.py --port 8080
+    python servidor.py --engine sqlite --sqlite-path padelclub.db
+
+Un hilo por conexión y HTTP/1.1 con keep-alive: el kiosco reusa su conexión
+en cada pedido. POST /batch ejecuta varios pedidos en un solo viaje.
+
+Rutas (el token va en `Authorization: Bearer <token>`):
+
+    POST /login                 {usuario, clave} -> {rol, usuario_id, token}
+    POST /logout
+    POST /usuarios              {usuario, clave, rol, clave_admin}   (admin: con la clave maestra)
+    GET  /disponibilidad?fecha=AAAA-MM-DD -> {horas}
+    GET  /grilla                -> {fechas, horas, libres}
+    POST /reservas              {fecha, hora, minutos}
+    GET  /reservas?after_fecha=&after_id=&limit=&desde=&hasta=&cancha=   (admin)
+    GET  /mis-reservas?cuando=proximas|pasadas&after_fecha=&after_id=&limit=
+    POST /reservas/<id>/cancelar
+    POST /espera                {fecha, hora}
+    GET  /ocupacion?desde=&hasta=&n=   tablero de ocupación (admin)
+    GET  /torneos
+    POST /torneos/<id>/inscripcion  {pareja}
+    GET  /torneos/<id>/partidos
+    GET  /eventos?desde=N&espera=25  long-poll de los avisos de `events`
+    GET  /metricas              (admin)
+    POST /batch                 {pedidos: [{metodo, ruta, cuerpo}]} -> {respuestas}
+"""
+import argparse
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import backendPRUEBA
+from backendPRUEBA import (UsuarioManager, ReservationManager, TorneoManager, OcupacionManager,
+                           validar_sesion, cerrar_sesion, tiene_sesion, events)
+
+log = logging.getLogger('padelclub.servidor')
+
+MAX_BODY   = 1 << 20        # 1 MiB por pedido
+MAX_BATCH  = 50
+MAX_ESPERA = 30.0           # segundos de long-poll como máximo
+
+# Clave maestra para dar de alta administradores. El servidor es quien la
+# controla: el kiosco solo la reenvía.
+ADMIN_SECRET = os.environ.get('PADEL_ADMIN_SECRET', 'padel')
+
+
+class HTTPError(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+class EventLog:
+    """Últimos avisos de `events` numerados, para entregarlos por long-poll.
+
+    Además de 'disponibilidad' escucha el canal de cada usuario con sesión.
+    El canal se suelta al cerrar su última sesión (`dejar_usuario`) y, para
+    las que vencen solas, con `podar`, que el servicio llama cada
+    `PODA_CADA` segundos.
+    """
+    PODA_CADA = 60.0
+
+    def __init__(self, maxlen=1000, clock=time.monotonic):
+        self._cond = threading.Condition()
+        self._eventos = deque(maxlen=maxlen)      # (seq, canal, evento)
+        self._seq = 0
+        self._cancelar = events.subscribe('disponibilidad', self._publicado)
+        self._por_usuario = {}                    # usuario_id -> desuscribir
+        self._clock = clock
+        self._proxima_poda = clock() + self.PODA_CADA
+
+    def _publicado(self, canal, evento):
+        with self._cond:
+            self._seq += 1
+            self._eventos.append((self._seq, canal, evento))
+            self._cond.notify_all()
+
+    def seguir_usuario(self, usuario_id):
+        with self._cond:
+            if usuario_id not in self._por_usuario:
+                self._por_usuario[usuario_id] = events.subscribe(f"usuario:{usuario_id}",
+                                                                 self._publicado)
+
+    def dejar_usuario(self, usuario_id):
+        with self._cond:
+            cancelar = self._por_usuario.pop(usuario_id, None)
+        if cancelar:
+            cancelar()
+
+    def podar(self, activo, forzar=False):
+        """Suelta los canales de usuarios sin sesión (`activo(uid)` falso).
+        Sin `forzar` no hace nada hasta que pasen PODA_CADA segundos de la
+        anterior. Devuelve cuántos soltó."""
+        with self._cond:
+            if not forzar and self._clock() < self._proxima_poda:
+                return 0
+            self._proxima_poda = self._clock() + self.PODA_CADA
+            seguidos = list(self._por_usuario)
+        sueltos = [uid for uid in seguidos if not activo(uid)]
+        for uid in sueltos:
+            self.dejar_usuario(uid)
+        return len(sueltos)
+
+    def seguidos(self):
+        with self._cond:
+            return len(self._por_usuario)
+
+    def ultimo(self):
+        with self._cond:
+            return self._seq
+
+    def esperar(self, desde, canales, espera):
+        """Avisos con número > `desde` de esos canales; espera hasta `espera`
+        segundos si todavía no hay ninguno. Devuelve (eventos, último número)."""
+        limite = time.monotonic() + espera
+        with self._cond:
+            while True:
+                nuevos = [(s, c, e) for s, c, e in self._eventos if s > desde and c in canales]
+                restante = limite - time.monotonic()
+                if nuevos or restante <= 0:
+                    return nuevos, self._seq
+                self._cond.wait(restante)
+
+    def cerrar(self):
+        self._cancelar()
+        with self._cond:
+            for cancelar in self._por_usuario.values():
+                cancelar()
+            self._por_usuario.clear()
+
+
+class Servicio:
+    """Rutas del servidor, independientes de HTTP: `atender` recibe método,
+    ruta, cuerpo y token y devuelve (estado, respuesta)."""
+
+    def __init__(self):
+        self.reservas = ReservationManager()
+        self.torneos  = TorneoManager(reservas=self.reservas)
+        self.ocupacion = OcupacionManager()
+        self.eventos  = EventLog()
+
+    def atender(self, metodo, ruta, cuerpo, token):
+        self.eventos.podar(tiene_sesion)
+        try:
+            return 200, self._despachar(metodo, ruta, cuerpo or {}, token)
+        except HTTPError as e:
+            return e.estado, {'error': str(e)}
+        except (KeyError, TypeError, ValueError) as e:
+            # Fecha mal escrita, número que no es número, cuerpo incompleto
+            return 400, {'error': f"Pedido inválido: {e}"}
+        except Exception:
+            log.exception("Error atendiendo %s %s", metodo, ruta)
+            return 500, {'error': "Error interno"}
+
+    def _sesion(self, token, rol=None):
+        sesion = validar_sesion(token) if token else None
+        if sesion is None:
+            raise HTTPError(401, "La sesión venció, volvé a iniciar sesión")
+        if rol and sesion.rol != rol:
+            raise HTTPError(403, "No autorizado")
+        return sesion
+
+    @staticmethod
+    def _camino(ruta):
+        """Segmentos de la ruta, sin vacíos: '//batch/' es ['batch']."""
+        return [p for p in urlsplit(ruta).path.split('/') if p]
+
+    def _despachar(self, metodo, ruta, cuerpo, token):
+        partes = urlsplit(ruta)
+        q = {k: v[-1] for k, v in parse_qs(partes.query).items()}
+        camino = self._camino(ruta)
+        rm, tm = self.reservas, self.torneos
+
+        if metodo == 'POST' and camino == ['login']:
+            um = UsuarioManager()
+            try:
+                rol, uid, tok = um.abrir_sesion(cuerpo.get('usuario', ''), cuerpo.get('clave', ''))
+            finally:
+                um.desconectar()
+            if rol is None:
+                raise HTTPError(401, "Credenciales inválidas")
+            self.eventos.seguir_usuario(uid)
+            return {'rol': rol, 'usuario_id': uid, 'token': tok}
+        if metodo == 'POST' and camino == ['logout']:
+            sesion = validar_sesion(token) if token else None
+            ok = cerrar_sesion(token)
+            if sesion is not None and not tiene_sesion(sesion.usuario_id):
+                self.eventos.dejar_usuario(sesion.usuario_id)
+            return {'ok': ok}
+        if metodo == 'POST' and camino == ['usuarios']:
+            if cuerpo.get('rol') not in ('jugador', 'admin'):
+                raise HTTPError(400, "Rol inválido")
+            if cuerpo['rol'] == 'admin' and not hmac.compare_digest(
+                    str(cuerpo.get('clave_admin') or '').encode(), ADMIN_SECRET.encode()):
+                raise HTTPError(403, "Clave admin inválida")
+            um = UsuarioManager()
+            try:
+                return {'ok': um.crear_usuario(cuerpo.get('usuario', ''), cuerpo.get('clave', ''),
+                                               cuerpo['rol'])}
+            finally:
+                um.desconectar()
+
+        if metodo == 'GET' and camino == ['disponibilidad']:
+            if 'fecha' not in q:
+                raise HTTPError(400, "Falta la fecha")
+            return {'horas': rm.get_available_slots(q['fecha'])}
+        if metodo == 'GET' and camino == ['grilla']:
+            fechas, horas, libres = rm.get_availability_grid()
+            return {'fechas': fechas, 'horas': horas, 'libres': libres}
+
+        if metodo == 'POST' and camino == ['reservas']:
+            ok, msg = rm.reservar_sesion(token, cuerpo.get('fecha'), cuerpo.get('hora'),
+                                         int(cuerpo.get('minutos', 60)))
+            return {'ok': ok, 'mensaje': msg}
+        if metodo == 'GET' and camino == ['reservas']:
+            self._sesion(token, 'admin')
+            after = (q['after_fecha'], int(q['after_id'])) if 'after_id' in q else None
+            filas, siguiente = rm.get_reservations_page(
+                after, min(int(q.get('limit', 200)), 1000), q.get('desde'), q.get('hasta'),
+                int(q['cancha']) if q.get('cancha') else None)
+            return {'filas': filas, 'siguiente': siguiente}
+        if metodo == 'GET' and camino == ['mis-reservas']:
+            sesion = self._sesion(token)
+            after = (q['after_fecha'], int(q['after_id'])) if 'after_id' in q else None
+            filas, siguiente = rm.mis_reservas(sesion.usuario_id, q.get('cuando', 'proximas'),
+                                               after, min(int(q.get('limit', 20)), 200))
+            return {'filas': filas, 'siguiente': siguiente}
+        if (metodo == 'POST' and len(camino) == 3 and camino[0] == 'reservas'
+                and camino[1].isdigit() and camino[2] == 'cancelar'):
+            ok, msg = rm.cancelar_reserva_sesion(token, int(camino[1]))
+            return {'ok': ok, 'mensaje': msg}
+        if metodo == 'POST' and camino == ['espera']:
+            ok, msg = rm.anotar_espera_sesion(token, cuerpo.get('fecha'), cuerpo.get('hora'))
+            return {'ok': ok, 'mensaje': msg}
+
+        if metodo == 'GET' and camino == ['ocupacion']:
+            self._sesion(token, 'admin')
+            return self.ocupacion.resumen(q.get('desde'), q.get('hasta'), int(q.get('n', 10)))
+
+        if metodo == 'GET' and camino == ['torneos']:
+            return {'torneos': tm.listar_torneos(q.get('desde'))}
+        if len(camino) == 3 and camino[0] == 'torneos' and camino[1].isdigit():
+            if metodo == 'POST' and camino[2] == 'inscripcion':
+                ok, msg = tm.inscribir_sesion(token, int(camino[1]), cuerpo.get('pareja'))
+                return {'ok': ok, 'mensaje': msg}
+            if metodo == 'GET' and camino[2] == 'partidos':
+                return {'partidos': tm.partidos(int(camino[1]))}
+
+        if metodo == 'GET' and camino == ['eventos']:
+            canales = {'disponibilidad'}
+            sesion = validar_sesion(token) if token else None
+            if sesion is not None:
+                canales.add(f"usuario:{sesion.usuario_id}")
+            if 'desde' not in q:
+                # Primer pedido: solo el punto de partida
+                return {'eventos': [], 'ultimo': self.eventos.ultimo()}
+            nuevos, ultimo = self.eventos.esperar(
+                int(q['desde']), canales, min(float(q.get('espera', 25)), MAX_ESPERA))
+            return {'eventos': [{'canal': c, 'evento': e} for _, c, e in nuevos], 'ultimo': ultimo}
+        if metodo == 'GET' and camino == ['metricas']:
+            self._sesion(token, 'admin')
+            return {'pool': backendPRUEBA.pool_metrics(),
+                    'cache': backendPRUEBA.availability_cache.metrics(),
+                    'mis_reservas': backendPRUEBA.user_reservations_cache.metrics(),
+                    'eventos': {'usuarios_seguidos': self.eventos.seguidos()},
+                    'replicas': backendPRUEBA.replica_metrics()}
+
+        if metodo == 'POST' and camino == ['batch']:
+            pedidos = cuerpo.get('pedidos') or []
+            if len(pedidos) > MAX_BATCH:
+                raise HTTPError(400, f"Hasta {MAX_BATCH} pedidos por lote")
+            respuestas = []
+            for p in pedidos:
+                ruta = p.get('ruta', '/')
+                # Se decide sobre el camino ya partido, igual que al rutear
+                camino = self._camino(ruta) if isinstance(ruta, str) else None
+                if camino is None or camino[:1] in (['batch'], ['eventos']):
+                    respuestas.append({'estado': 400, 'cuerpo': {'error': "Ruta no permitida en un lote"}})
+                    continue
+                estado, resp = self.atender(p.get('metodo', 'GET'), ruta, p.get('cuerpo'), token)
+                respuestas.append({'estado': estado, 'cuerpo': resp})
+            return {'respuestas': respuestas}
+
+        raise HTTPError(404, "Ruta desconocida")
+
+    def cerrar(self):
+        self.eventos.cerrar()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep-alive
+    # Cabeceras y cuerpo salen en dos escrituras: sin esto, Nagle más el ACK
+    # demorado del cliente suman ~40 ms a cada respuesta en keep-alive
+    disable_nagle_algorithm = True
+    server_version = "PadelClub/1.0"
+    servicio = None                     # lo asigna `crear_servidor`
+
+    def do_GET(self):
+        self._atender('GET')
+
+    def do_POST(self):
+        self._atender('POST')
+
+    def _atender(self, metodo):
+        cuerpo = None
+        largo = int(self.headers.get('Content-Length') or 0)
+        if largo > MAX_BODY:
+            self.close_connection = True
+            return self._responder(413, {'error': "Pedido demasiado grande"})
+        if largo:
+            try:
+                cuerpo = json.loads(self.rfile.read(largo))
+            except ValueError:
+                return self._responder(400, {'error': "JSON inválido"})
+        autorizacion = self.headers.get('Authorization', '')
+        token = autorizacion[7:] if autorizacion.startswith('Bearer ') else None
+        self._responder(*self.servicio.atender(metodo, self.path, cuerpo, token))
+
+    def _responder(self, estado, datos):
+        cuerpo = json.dumps(datos, default=str).encode('utf-8')
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        log.debug("%s " + formato, self.address_string(), *args)
+
+
+def crear_servidor(host='127.0.0.1', port=8080):
+    """Servidor listo para `serve_forever()` (en un hilo aparte para tests y
+    benchmarks); `server.servicio.cerrar()` al terminar."""
+    servicio = Servicio()
+    handler = type('PadelHandler', (Handler,), {'servicio': servicio})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.servicio = servicio
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8080)
+    ap.add_argument('--engine', choices=('mysql', 'sqlite'), default='mysql')
+    ap.add_argument('--sqlite-path', default='padelclub.db')
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    if args.engine == 'sqlite':
+        backendPRUEBA.configure_storage('sqlite', sqlite_path=args.sqlite_path)
+    server = crear_servidor(args.host, args.port)
+    log.info("Escuchando en http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.servicio.cerrar()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Sesiones en memoria del proceso.
+
+Al iniciar sesión se emite un token firmado con HMAC; las operaciones
+siguientes (reservar, listados propios) lo validan contra este almacén
+sin volver a consultar `usuarios`. La firma descarta tokens inventados
+sin tocar el diccionario; el almacén aporta vencimiento y revocación.
+
+Las sesiones se guardan en orden de emisión y todas duran lo mismo, así
+que las vencidas siempre están al principio: `purge` corta desde ahí.
+Con `max_sessions` lleno se desalojan las más viejas.
+"""
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+
+class Session:
+    __slots__ = ('sid', 'usuario_id', 'rol', 'expira')
+
+    def __init__(self, sid, usuario_id, rol, expira):
+        self.sid        = sid
+        self.usuario_id = usuario_id
+        self.rol        = rol
+        self.expira     = expira
+
+    def __repr__(self):
+        return f"Session(usuario_id={self.usuario_id}, rol={self.rol!r})"
+
+
+class SessionStore:
+    def __init__(self, ttl=8 * 3600, max_sessions=10000, secret=None, clock=time.monotonic):
+        self.ttl          = ttl
+        self.max_sessions = max_sessions
+        self._secret = secret.encode('utf-8') if isinstance(secret, str) else (
+            secret or secrets.token_bytes(32))
+        self._clock = clock
+        self._lock  = threading.Lock()
+        self._sessions = OrderedDict()     # sid -> Session, en orden de emisión
+        self._by_user  = {}                # usuario_id -> {sid}
+        self._issued = self._expired = self._evicted = self._revoked = 0
+        self._rejected = 0
+
+    # ---------------------- tokens ----------------------
+    def _sign(self, sid):
+        firma = hmac.new(self._secret, sid.encode('ascii'), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(firma[:18]).decode('ascii')
+
+    def issue(self, usuario_id, rol):
+        """Crea una sesión y devuelve su token."""
+        sid = secrets.token_urlsafe(18)
+        sesion = Session(sid, usuario_id, rol, self._clock() + self.ttl)
+        with self._lock:
+            self._purge_locked()
+            while len(self._sessions) >= self.max_sessions:
+                self._drop_locked(next(iter(self._sessions)))
+                self._evicted += 1
+            self._sessions[sid] = sesion
+            self._by_user.setdefault(usuario_id, set()).add(sid)
+            self._issued += 1
+        return f"{sid}.{self._sign(sid)}"
+
+    def validate(self, token):
+        """Devuelve la `Session` del token, o None si es inválido o venció."""
+        sid, _, firma = (token or "").partition('.')
+        if not firma or not hmac.compare_digest(firma, self._sign(sid)):
+            self._rejected += 1
+            return None
+        with self._lock:
+            sesion = self._sessions.get(sid)
+            if sesion is None:
+                return None
+            if sesion.expira <= self._clock():
+                self._drop_locked(sid)
+                self._expired += 1
+                return None
+            return sesion
+
+    # ---------------------- revocación y desalojo ----------------------
+    def revoke(self, token):
+        """Cierra una sesión (logout). Devuelve True si existía."""
+        sid = (token or "").partition('.')[0]
+        with self._lock:
+            if sid not in self._sessions:
+                return False
+            self._drop_locked(sid)
+            self._revoked += 1
+            return True
+
+    def revoke_user(self, usuario_id):
+        """Cierra todas las sesiones del usuario; devuelve cuántas."""
+        with self._lock:
+            sids = self._by_user.pop(usuario_id, ())
+            for sid in sids:
+                del self._sessions[sid]
+            self._revoked += len(sids)
+            return len(sids)
+
+    def has_user(self, usuario_id):
+        """True si el usuario tiene alguna sesión vigente."""
+        with self._lock:
+            self._purge_locked()
+            return usuario_id in self._by_user
+
+    def purge(self):
+        """Descarta las sesiones vencidas; devuelve cuántas."""
+        with self._lock:
+            return self._purge_locked()
+
+    def _purge_locked(self):
+        ahora, n = self._clock(), 0
+        while self._sessions:
+            sid, sesion = next(iter(self._sessions.items()))
+            if sesion.expira > ahora:
+                break
+            self._drop_locked(sid)
+            n += 1
+        self._expired += n
+        return n
+
+    def _drop_locked(self, sid):
+        sesion = self._sessions.pop(sid)
+        sids = self._by_user.get(sesion.usuario_id)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._by_user[sesion.usuario_id]
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'active':   len(self._sessions),
+                'users':    len(self._by_user),
+                'issued':   self._issued,
+                'expired':  self._expired,
+                'evicted':  self._evicted,
+                'revoked':  self._revoked,
+                'rejected': self._rejected,
+            }
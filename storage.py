@@ -0,0 +1,361 @@
+"""Motores de almacenamiento para UsuarioManager y ReservationManager.
+
+Los managers escriben SQL con parámetros `%s` (estilo pymysql) y piden al
+motor las pocas piezas que cambian entre bases: formato de fechas, bloqueo
+de filas, upsert, inicio de transacción, cursores de servidor y qué errores
+vale la pena reintentar.
+
+- MySQLStorage: la base del club (script.sql + canchas.sql).
+- SQLiteStorage: base embebida en un archivo o en memoria (':memory:'), con
+  el mismo esquema (script_sqlite.sql), sin red ni servidor.
+"""
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+_SCHEMA_SQLITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'script_sqlite.sql')
+
+
+class MySQLStorage:
+    name = 'mysql'
+    max_connections  = None                 # sin límite propio; manda el pool
+    RETRYABLE_ERRORS = (1205, 1213)         # lock wait timeout, deadlock
+    DISCONNECT_ERRORS = (2003, 2006, 2013)  # no conecta, se fue el servidor, se perdió
+    skip_locked      = " FOR UPDATE SKIP LOCKED"
+    for_update       = " FOR UPDATE"
+    insert_ignore    = "INSERT IGNORE INTO"     # saltea filas que chocan con una clave única
+
+    def __init__(self, config):
+        self.config = config
+
+    def connect(self):
+        import pymysql
+        return pymysql.connect(**self.config)
+
+    # Fragmentos de SQL (con % escapado, las consultas siempre llevan parámetros)
+    @staticmethod
+    def fmt_date(expr):
+        return f"DATE_FORMAT({expr}, '%%Y-%%m-%%d')"
+
+    @staticmethod
+    def fmt_time(expr):
+        return f"DATE_FORMAT({expr}, '%%H:%%i:%%s')"
+
+    @staticmethod
+    def fmt_datetime(expr):
+        return f"DATE_FORMAT({expr}, '%%Y-%%m-%%d %%H:%%i:%%s')"
+
+    @staticmethod
+    def upsert_increment(tabla, clave, columna):
+        return (f"INSERT INTO {tabla} ({clave}, {columna}) VALUES (%s, 1) "
+                f"ON DUPLICATE KEY UPDATE {columna} = {columna} + 1")
+
+    @staticmethod
+    def upsert_add(tabla, claves, columnas):
+        """Inserta la fila o suma sus `columnas` a la existente (contadores)."""
+        todas = list(claves) + list(columnas)
+        return (f"INSERT INTO {tabla} ({', '.join(todas)}) "
+                f"VALUES ({', '.join(['%s'] * len(todas))}) ON DUPLICATE KEY UPDATE "
+                + ", ".join(f"{c} = {c} + VALUES({c})" for c in columnas))
+
+    def begin(self, cur):
+        """MySQL abre la transacción con la primera sentencia."""
+
+    def maybe_roll(self, pool):
+        """La ventana la avanza el evento actualizar_canchas."""
+
+    def roll_window(self, conn):
+        """Corre a mano lo mismo que el evento nocturno."""
+        with conn.cursor() as cur:
+            cur.execute("CALL rodar_ventana()")
+        conn.commit()
+
+    def server_cursor(self, db):
+        import pymysql.cursors
+        return db.cursor(pymysql.cursors.SSCursor)
+
+    def is_retryable(self, exc):
+        import pymysql
+        return (isinstance(exc, pymysql.err.OperationalError)
+                and exc.args[0] in self.RETRYABLE_ERRORS)
+
+    def is_disconnect(self, exc):
+        import pymysql
+        return (isinstance(exc, pymysql.err.InterfaceError)
+                or (isinstance(exc, pymysql.err.OperationalError)
+                    and exc.args[0] in self.DISCONNECT_ERRORS))
+
+    def replica_lag(self, conn):
+        """Segundos de atraso de la réplica; 0 si el servidor no replica de
+        nadie (copia de solo lectura) y None si la replicación está cortada."""
+        import pymysql
+        with conn.cursor() as cur:
+            try:
+                cur.execute("SHOW REPLICA STATUS", ())
+            except pymysql.err.ProgrammingError:
+                cur.execute("SHOW SLAVE STATUS", ())        # MySQL < 8.0.22
+            fila = cur.fetchone()
+            if not fila:
+                return 0
+            columnas = [d[0] for d in cur.description]
+        estado = dict(zip(columnas, fila))
+        return estado.get('Seconds_Behind_Source', estado.get('Seconds_Behind_Master'))
+
+
+class _SQLiteCursor:
+    """Cursor de sqlite3 que acepta parámetros `%s` y se usa con `with`."""
+    _PARAM = re.compile(r"%(s|%)")
+
+    def __init__(self, cursor):
+        self._cur = cursor
+
+    @classmethod
+    def _translate(cls, sql, params):
+        if params is None:
+            return sql
+        return cls._PARAM.sub(lambda m: '?' if m.group(1) == 's' else '%', sql)
+
+    def execute(self, sql, params=None):
+        self._cur.execute(self._translate(sql, params), tuple(params or ()))
+        return self._cur.rowcount
+
+    def executemany(self, sql, seq):
+        self._cur.executemany(self._translate(sql, ()), [tuple(p) for p in seq])
+        return self._cur.rowcount
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchmany(self, size):
+        return self._cur.fetchmany(size)
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cur.lastrowid
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def close(self):
+        self._cur.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _SQLiteConnection:
+    """Conexión sqlite3 con la interfaz que usan los managers y el pool."""
+
+    def __init__(self, raw, owned=True):
+        self._raw   = raw
+        self._owned = owned
+
+    def cursor(self, *_):
+        return _SQLiteCursor(self._raw.cursor())
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def ping(self, reconnect=False):
+        self._raw.execute("SELECT 1")
+
+    def close(self):
+        # La base en memoria vive mientras viva su única conexión
+        if self._owned:
+            self._raw.close()
+
+
+class SQLiteStorage:
+    """Base embebida. `path=':memory:'` usa una única conexión compartida
+    (el pool la presta de a un hilo por vez); con un archivo cada conexión
+    del pool es propia y la base corre en modo WAL."""
+    name = 'sqlite'
+    skip_locked = ""        # la escritura ya es exclusiva con BEGIN IMMEDIATE
+    for_update  = ""
+    insert_ignore = "INSERT OR IGNORE INTO"
+
+    def __init__(self, path=':memory:', busy_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.max_connections = 1 if path == ':memory:' else None
+        self._lock = threading.Lock()
+        self._memory = None
+        self._prepared = False
+        self._rolled_on = None
+
+    def connect(self):
+        with self._lock:
+            if self.path == ':memory:':
+                if self._memory is None:
+                    self._memory = self._open()
+                conn = _SQLiteConnection(self._memory, owned=False)
+            else:
+                conn = _SQLiteConnection(self._open())
+            if not self._prepared:
+                self.prepare(conn)
+                self._prepared = True
+        return conn
+
+    def _open(self):
+        # isolation_level=None: sin transacciones implícitas, `begin` las abre
+        raw = sqlite3.connect(self.path, timeout=self.busy_timeout,
+                              isolation_level=None, check_same_thread=False)
+        raw.execute("PRAGMA foreign_keys = ON")
+        if self.path != ':memory:':
+            raw.execute("PRAGMA journal_mode = WAL")
+            raw.execute("PRAGMA synchronous = NORMAL")
+        return raw
+
+    # ---------------------- esquema y ventana ----------------------
+    def prepare(self, conn):
+        """Crea el esquema si falta, abre la ventana y marca lo ya reservado."""
+        with open(_SCHEMA_SQLITE, encoding='utf-8') as f:
+            conn._raw.executescript(f.read())
+        self.migrate(conn._raw)
+        self.roll_window(conn)
+        with conn.cursor() as cur:
+            for tabla in ('reservas', 'bloqueos_cancha'):
+                cur.execute(self._MARK_TAKEN.format(tabla=tabla), ('',))
+
+    @staticmethod
+    def migrate(raw):
+        """Lo que script_sqlite.sql no puede agregar a una base existente
+        (SQLite no tiene ADD COLUMN IF NOT EXISTS). Idempotente; es el
+        equivalente del bloque de migraciones de script.sql."""
+        columnas = {fila[1] for fila in raw.execute("PRAGMA table_info(inscripciones_torneo)")}
+        if 'equipo' not in columnas:
+            # Las inscripciones anteriores eran individuales: cada una es su equipo
+            raw.execute("ALTER TABLE inscripciones_torneo "
+                        "ADD COLUMN equipo INTEGER NOT NULL DEFAULT 0")
+            raw.execute("UPDATE inscripciones_torneo SET equipo = usuario_id")
+        unicas = [fila[1] for fila in raw.execute("PRAGMA index_list(inscripciones_torneo)")
+                  if fila[2]]
+        if not any([c[2] for c in raw.execute(f"PRAGMA index_info('{indice}')")]
+                   == ['torneo_id', 'usuario_id'] for indice in unicas):
+            raw.execute("DELETE FROM inscripciones_torneo WHERE id NOT IN ("
+                        "SELECT MIN(id) FROM inscripciones_torneo GROUP BY torneo_id, usuario_id)")
+            raw.execute("CREATE UNIQUE INDEX uq_inscripcion "
+                        "ON inscripciones_torneo (torneo_id, usuario_id)")
+
+    # Ocupa las franjas que toca cualquier intervalo de `tabla` desde una fecha
+    _MARK_TAKEN = (
+        "UPDATE slots SET disponible = 0 WHERE fecha_hora >= %s AND EXISTS ("
+        "SELECT 1 FROM {tabla} r WHERE r.cancha = slots.cancha_numero "
+        "AND r.fecha_inicio < datetime(slots.fecha_hora, '+1 hour') "
+        "AND r.fecha_fin > slots.fecha_hora)"
+    )
+
+    def roll_window(self, conn):
+        """Equivalente a rodar_ventana(): borra días vencidos y agrega los que
+        faltan después del último cargado."""
+        hoy = date.today()
+        manana = (hoy + timedelta(days=1)).strftime("%Y-%m-%d")
+        with conn.cursor() as cur:
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                cur.execute("SELECT valor FROM config_reservas WHERE clave = 'dias_ventana'")
+                fila = cur.fetchone()
+                dias = fila[0] if fila else 4
+                cur.execute("DELETE FROM slots WHERE fecha_hora < %s", (manana,))
+                cur.execute("DELETE FROM canchas_version WHERE fecha < %s", (manana,))
+                cur.execute("SELECT MAX(fecha_hora) FROM slots", ())
+                fila = cur.fetchone()
+                ultimo = (datetime.strptime(fila[0][:10], "%Y-%m-%d").date()
+                          if fila and fila[0] else hoy)
+                nuevos = []
+                d = ultimo + timedelta(days=1)
+                while d <= hoy + timedelta(days=dias):
+                    nuevos.append(d.strftime("%Y-%m-%d"))
+                    d += timedelta(days=1)
+                for fecha in nuevos:
+                    cur.execute(
+                        "INSERT INTO slots (fecha_hora, cancha_numero) "
+                        "SELECT %s || ' ' || f.hora, c.numero "
+                        "FROM franjas_horarias f CROSS JOIN canchas c",
+                        (fecha,)
+                    )
+                    cur.execute(self.upsert_increment('canchas_version', 'fecha', 'version'),
+                                (fecha,))
+                if nuevos:
+                    # Bloqueos de mantenimiento cargados antes de abrir el día
+                    cur.execute(self._MARK_TAKEN.format(tabla='bloqueos_cancha'), (nuevos[0],))
+                conn.commit()
+                self._rolled_on = hoy
+            except Exception:
+                conn.rollback()
+                raise
+
+    def maybe_roll(self, pool):
+        """Reemplaza al evento actualizar_canchas: la primera operación de cada
+        día avanza la ventana (con una conexión del pool, como cualquier otra)."""
+        if self._rolled_on != date.today():
+            with pool.connection() as conn:
+                self.roll_window(conn)
+
+    # ---------------------- fragmentos de SQL ----------------------
+    @staticmethod
+    def fmt_date(expr):
+        return f"strftime('%%Y-%%m-%%d', {expr})"
+
+    @staticmethod
+    def fmt_time(expr):
+        return f"strftime('%%H:%%M:%%S', {expr})"
+
+    @staticmethod
+    def fmt_datetime(expr):
+        return f"strftime('%%Y-%%m-%%d %%H:%%M:%%S', {expr})"
+
+    @staticmethod
+    def upsert_increment(tabla, clave, columna):
+        return (f"INSERT INTO {tabla} ({clave}, {columna}) VALUES (%s, 1) "
+                f"ON CONFLICT ({clave}) DO UPDATE SET {columna} = {columna} + 1")
+
+    @staticmethod
+    def upsert_add(tabla, claves, columnas):
+        todas = list(claves) + list(columnas)
+        return (f"INSERT INTO {tabla} ({', '.join(todas)}) "
+                f"VALUES ({', '.join(['%s'] * len(todas))}) "
+                f"ON CONFLICT ({', '.join(claves)}) DO UPDATE SET "
+                + ", ".join(f"{c} = {c} + excluded.{c}" for c in columnas))
+
+    def begin(self, cur):
+        cur.execute("BEGIN IMMEDIATE")
+
+    def server_cursor(self, db):
+        # Los cursores de sqlite3 ya recorren el resultado sin materializarlo
+        return db.cursor()
+
+    def is_retryable(self, exc):
+        return isinstance(exc, sqlite3.OperationalError) and 'locked' in str(exc)
+
+    def is_disconnect(self, exc):
+        return False
+
+    def replica_lag(self, conn):
+        # Una "réplica" SQLite es otra conexión al mismo archivo
+        return 0
+
+
+def make_storage(engine, **opciones):
+    """`make_storage('mysql', **db_config)` o `make_storage('sqlite', path=...)`."""
+    if engine == 'mysql':
+        return MySQLStorage(opciones)
+    if engine == 'sqlite':
+        return SQLiteStorage(**opciones)
+    raise ValueError(f"Motor de almacenamiento desconocido: {engine}")
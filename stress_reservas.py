@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Prueba de estrés de ReservationManager.reservar.
+
+Lanza N clientes concurrentes que intentan reservar todas las franjas de la
+ventana hasta llenarlas, y después verifica en la base que ninguna cancha
+haya quedado reservada dos veces. Informa reservas/segundo y latencias.
+
+¡Usar contra una base de prueba! Con --reset se cancelan las reservas de
+los usuarios de estrés antes de cada ronda y al terminar. Se cancelan con
+`cancelar_reserva`, así que las franjas, los resúmenes de ocupación y las
+versiones de día quedan como si nunca se hubieran hecho.
+
+    python stress_reservas.py --clientes 50 --rondas 3 --reset
+    python stress_reservas.py --engine sqlite --sqlite-path estres.db --reset
+"""
+import argparse
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+import backendPRUEBA
+from backendPRUEBA import UsuarioManager, ReservationManager
+
+PREFIJO_USUARIO = "estres_"
+
+
+def preparar_usuarios(pool, n):
+    """Crea (si faltan) los usuarios de estrés y devuelve sus ids."""
+    ids = []
+    for i in range(n):
+        nombre = f"{PREFIJO_USUARIO}{i}"
+        um = UsuarioManager(pool)
+        um.crear_usuario(nombre, nombre, 'jugador')
+        _, uid = um.iniciar_sesion(nombre, nombre)
+        um.desconectar()
+        ids.append(uid)
+    return ids
+
+
+def resetear(pool, ids):
+    """Cancela las reservas futuras de los usuarios de estrés por el manager.
+    Devuelve (canceladas, no canceladas)."""
+    rm = ReservationManager(pool)
+    marcas = ", ".join(["%s"] * len(ids))
+    ahora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with pool.connection() as db, db.cursor() as cur:
+        cur.execute(f"SELECT id FROM reservas WHERE usuario_id IN ({marcas}) "
+                    "AND fecha_inicio > %s", ids + [ahora])
+        reservas = [r[0] for r in cur.fetchall()]
+    canceladas = sum(rm.cancelar_reserva(rid)[0] for rid in reservas)
+    return canceladas, len(reservas) - canceladas
+
+
+def franjas_de_la_ventana(pool):
+    rm = ReservationManager(pool)
+    dias = rm.get_window_days()
+    horas = rm.get_grid_config()[0]
+    hoy = datetime.today()
+    return [((hoy + timedelta(days=d)).strftime(ReservationManager.DATE_FORMAT), h)
+            for d in range(1, dias + 1) for h in horas]
+
+
+def cliente(rm, uid, franjas, inicio, resultados, lock):
+    """Recorre las franjas en orden aleatorio reservando hasta que se llenen."""
+    propias = list(franjas)
+    random.shuffle(propias)
+    exitos, fallos, latencias = 0, 0, []
+    inicio.wait()
+    for fecha, hora in propias:
+        while True:
+            t0 = time.perf_counter()
+            ok, msg = rm.reservar(uid, fecha, hora)
+            latencias.append(time.perf_counter() - t0)
+            if ok:
+                exitos += 1
+                continue
+            if not msg.startswith("No hay canchas"):
+                fallos += 1
+            break
+    with lock:
+        resultados['exitos']    += exitos
+        resultados['fallos']    += fallos
+        resultados['latencias'] += latencias
+
+
+def verificar(pool, ids):
+    """Devuelve (reservas dobles, reservas de estrés en la base)."""
+    with pool.connection() as db, db.cursor() as cur:
+        cur.execute(
+            "SELECT cancha, fecha_inicio, COUNT(*) FROM reservas "
+            "GROUP BY cancha, fecha_inicio HAVING COUNT(*) > 1"
+        )
+        dobles = cur.fetchall()
+        marcas = ", ".join(["%s"] * len(ids))
+        cur.execute(f"SELECT COUNT(*) FROM reservas WHERE usuario_id IN ({marcas})", ids)
+        total = cur.fetchone()[0]
+    return dobles, total
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    orden = sorted(valores)
+    return orden[min(len(orden) - 1, int(round(p / 100 * (len(orden) - 1))))]
+
+
+def ronda(pool, ids, n_reservas_previas):
+    rm = ReservationManager(pool)
+    franjas = franjas_de_la_ventana(pool)
+    inicio = threading.Event()
+    lock = threading.Lock()
+    resultados = {'exitos': 0, 'fallos': 0, 'latencias': []}
+    hilos = [threading.Thread(target=cliente,
+                              args=(rm, uid, franjas, inicio, resultados, lock))
+             for uid in ids]
+    for h in hilos:
+        h.start()
+    t0 = time.perf_counter()
+    inicio.set()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - t0
+
+    dobles, total = verificar(pool, ids)
+    lat = resultados['latencias']
+    print(f"  reservas OK:        {resultados['exitos']}")
+    print(f"  errores:            {resultados['fallos']}")
+    print(f"  reservas dobles:    {len(dobles)}")
+    print(f"  coherencia:         {total - n_reservas_previas == resultados['exitos']}")
+    print(f"  duración:           {duracion:.3f}s")
+    print(f"  reservas/s:         {resultados['exitos'] / duracion:.1f}")
+    print(f"  intentos/s:         {len(lat) / duracion:.1f}")
+    print(f"  latencia p50/p99:   {percentil(lat, 50) * 1000:.1f} / "
+          f"{percentil(lat, 99) * 1000:.1f} ms")
+    return not dobles
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--clientes', type=int, default=50)
+    ap.add_argument('--rondas', type=int, default=1)
+    ap.add_argument('--pool', type=int, default=None,
+                    help="tamaño del pool (por defecto, uno por cliente)")
+    ap.add_argument('--reset', action='store_true',
+                    help="cancelar lo reservado por los clientes antes de cada ronda y al final")
+    ap.add_argument('--engine', choices=('mysql', 'sqlite'), default='mysql')
+    ap.add_argument('--sqlite-path', default='padelclub.db')
+    args = ap.parse_args()
+
+    backendPRUEBA.pool_config['max_size'] = args.pool or args.clientes
+    if args.engine == 'sqlite':
+        backendPRUEBA.configure_storage('sqlite', sqlite_path=args.sqlite_path)
+    pool = backendPRUEBA.get_pool()
+    ids = preparar_usuarios(pool, args.clientes)
+
+    sin_dobles = True
+    for n in range(1, args.rondas + 1):
+        if args.reset:
+            resetear(pool, ids)
+        _, previas = verificar(pool, ids)
+        print(f"Ronda {n} ({args.clientes} clientes, {args.engine})")
+        sin_dobles &= ronda(pool, ids, previas)
+    if args.reset:
+        canceladas, fallidas = resetear(pool, ids)
+        print(f"Reset final: {canceladas} reservas canceladas, {fallidas} sin cancelar")
+
+    print(pool.metrics())
+    pool.close()
+    raise SystemExit(0 if sin_dobles else 1)
+
+
+if __name__ == '__main__':
+    main()
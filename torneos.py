@@ -0,0 +1,174 @@
+"""Cuadros y programación de partidos de torneos.
+
+Funciones puras (sin base de datos) que usa `TorneoManager`:
+
+- `eliminacion(participantes)`: cuadro de eliminación directa con cabezas
+  de serie; los mejores sembrados pasan la primera ronda si faltan rivales.
+- `todos_contra_todos(participantes, grupos=1)`: método del círculo, en
+  grupos para que cientos de inscriptos no generen decenas de miles de
+  partidos.
+- `programar(...)`: acomoda los partidos en franjas libres respetando el
+  descanso de cada participante y el orden de las rondas.
+
+Un participante es un número (el `equipo` de `inscripciones_torneo`): en
+singles es el id del jugador, en dobles el menor id de la pareja.
+"""
+import bisect
+from datetime import datetime, timedelta
+
+
+class Partido:
+    """Un partido del cuadro. `a`/`b` son participantes ya conocidos; si un
+    lado sale del ganador de otro partido, `origen_a`/`origen_b` tienen el
+    número de ese partido."""
+    __slots__ = ('numero', 'ronda', 'grupo', 'a', 'b', 'origen_a', 'origen_b')
+
+    def __init__(self, numero, ronda, a=None, b=None, origen_a=None, origen_b=None, grupo=None):
+        self.numero   = numero
+        self.ronda    = ronda
+        self.grupo    = grupo
+        self.a        = a
+        self.b        = b
+        self.origen_a = origen_a
+        self.origen_b = origen_b
+
+    def __repr__(self):
+        lado = lambda p, o: p if p is not None else f"G{o}"
+        return f"Partido({self.numero}, r{self.ronda}: {lado(self.a, self.origen_a)} vs {lado(self.b, self.origen_b)})"
+
+
+# ---------------------- cuadros ----------------------
+def _orden_siembra(tamano):
+    """Posiciones de las cabezas de serie en un cuadro de `tamano` (potencia
+    de 2): 1 y 2 solo pueden cruzarse en la final, 1-4 en semis, etc."""
+    orden = [1]
+    while len(orden) < tamano:
+        n = 2 * len(orden) + 1
+        orden = [x for s in orden for x in (s, n - s)]
+    return orden
+
+
+def eliminacion(participantes):
+    """Cuadro de eliminación directa; `participantes` en orden de siembra."""
+    n = len(participantes)
+    if n < 2:
+        return []
+    tamano = 1 << (n - 1).bit_length()
+    # Lado de la ronda siguiente: ('p', participante) o ('g', número de partido)
+    lados = [('p', participantes[s - 1]) if s <= n else None for s in _orden_siembra(tamano)]
+    partidos, numero, ronda = [], 0, 1
+    while len(lados) > 1:
+        siguientes = []
+        for i in range(0, len(lados), 2):
+            x, y = lados[i], lados[i + 1]
+            if x is None or y is None:
+                # Pasa sin jugar (solo en primera ronda)
+                siguientes.append(x or y)
+                continue
+            numero += 1
+            partidos.append(Partido(
+                numero, ronda,
+                a=x[1] if x[0] == 'p' else None, origen_a=x[1] if x[0] == 'g' else None,
+                b=y[1] if y[0] == 'p' else None, origen_b=y[1] if y[0] == 'g' else None,
+            ))
+            siguientes.append(('g', numero))
+        lados, ronda = siguientes, ronda + 1
+    return partidos
+
+
+def todos_contra_todos(participantes, grupos=1):
+    """Todos contra todos por grupos (repartidos en serpentina por siembra).
+    Los partidos salen ordenados por ronda, intercalando grupos."""
+    grupos = max(1, min(grupos, len(participantes) // 2 or 1))
+    reparto = [[] for _ in range(grupos)]
+    for i, p in enumerate(participantes):
+        vuelta, pos = divmod(i, grupos)
+        reparto[pos if vuelta % 2 == 0 else grupos - 1 - pos].append(p)
+
+    por_ronda = {}
+    for g, miembros in enumerate(reparto, start=1):
+        lista = miembros + ([None] if len(miembros) % 2 else [])
+        m = len(lista)
+        for r in range(m - 1):
+            for i in range(m // 2):
+                a, b = lista[i], lista[m - 1 - i]
+                if a is not None and b is not None:
+                    por_ronda.setdefault(r + 1, []).append((g, a, b))
+            # Método del círculo: el primero queda fijo y el resto rota
+            lista = [lista[0], lista[-1]] + lista[1:-1]
+
+    partidos, numero = [], 0
+    for ronda in sorted(por_ronda):
+        for g, a, b in por_ronda[ronda]:
+            numero += 1
+            partidos.append(Partido(numero, ronda, a=a, b=b, grupo=g))
+    return partidos
+
+
+# ---------------------- programación ----------------------
+def programar(partidos, franjas, descanso=60, duracion=60):
+    """Asigna a cada partido una franja libre `(fecha_hora, cancha)`.
+
+    `franjas` son pares ('AAAA-MM-DD HH:MM:SS', cancha) libres. Los
+    partidos se toman en orden (ronda por ronda); cada uno va a la primera
+    franja que empiece después de que sus participantes (o los partidos de
+    los que sale su rival) terminen y descansen `descanso` minutos. Devuelve
+    `(asignados, sin_lugar)` con `asignados` {número: (fecha_hora, cancha)}.
+
+    Los horarios con canchas agotadas se saltean con una unión-búsqueda, así
+    que el costo es O(partidos · log horarios) aunque la grilla esté llena.
+    """
+    por_hora = {}
+    for fecha_hora, cancha in franjas:
+        por_hora.setdefault(fecha_hora, []).append(cancha)
+    horas = sorted(por_hora)
+    base = datetime.strptime(horas[0], "%Y-%m-%d %H:%M:%S") if horas else None
+    minutos = [int((datetime.strptime(h, "%Y-%m-%d %H:%M:%S") - base).total_seconds() // 60)
+               for h in horas]
+    canchas = [sorted(por_hora[h], reverse=True) for h in horas]    # pop() da la menor
+
+    siguiente = list(range(len(horas) + 1))     # unión-búsqueda: próximo horario con lugar
+
+    def buscar(i):
+        raiz = i
+        while siguiente[raiz] != raiz:
+            raiz = siguiente[raiz]
+        while siguiente[i] != raiz:
+            siguiente[i], i = raiz, siguiente[i]
+        return raiz
+
+    libre_desde = {}        # participante -> minuto desde el que puede volver a jugar
+    fin_partido = {}        # número -> minuto en que termina
+    asignados, sin_lugar = {}, []
+    for p in partidos:
+        listo = 0
+        for lado, origen in ((p.a, p.origen_a), (p.b, p.origen_b)):
+            if origen is not None:
+                if origen not in fin_partido:
+                    listo = None
+                    break
+                listo = max(listo, fin_partido[origen] + descanso)
+            elif lado is not None:
+                listo = max(listo, libre_desde.get(lado, 0))
+        if listo is None:
+            sin_lugar.append(p.numero)
+            continue
+        i = buscar(bisect.bisect_left(minutos, listo))
+        if i >= len(horas):
+            sin_lugar.append(p.numero)
+            continue
+        cancha = canchas[i].pop()
+        if not canchas[i]:
+            siguiente[i] = i + 1
+        asignados[p.numero] = (horas[i], cancha)
+        fin = minutos[i] + duracion
+        fin_partido[p.numero] = fin
+        for lado in (p.a, p.b):
+            if lado is not None:
+                libre_desde[lado] = fin + descanso
+    return asignados, sin_lugar
+
+
+def fin_de(fecha_hora, duracion=60):
+    fin = datetime.strptime(fecha_hora, "%Y-%m-%d %H:%M:%S") + timedelta(minutes=duracion)
+    return fin.strftime("%Y-%m-%d %H:%M:%S")